@@ -0,0 +1,79 @@
+"""Read-through cache for the MCP server's graph-reading tools.
+
+Agents triaging an outlier call inspect_endpoint and fetch_traffic over and over for
+the same arguments; each call re-runs the same Cypher. Results are cached per (tool,
+arguments) in a bounded LRU with a TTL, and every entry records the graph's write
+generation (jaws_utils.READ_GENERATION_QUERY) it was computed at. Every writer bumps that
+generation, so a lookup that sees a different one treats the entry as stale — a capture,
+compute or finder run invalidates everything cached before it, without the writer
+having to know what the server holds. The TTL bounds staleness that writes don't
+cause, such as fetch_traffic's "last N minutes" window moving on.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+CACHE_ENTRIES = int(os.environ.get("JAWS_MCP_CACHE_SIZE", "256"))
+CACHE_TTL = float(os.environ.get("JAWS_MCP_CACHE_TTL", "300"))
+
+
+class ResultCache:
+    """LRU of tool results keyed by (tool, arguments), valid for one write generation."""
+
+    def __init__(self, max_entries=CACHE_ENTRIES, ttl=CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.expired = 0
+        self.evictions = 0
+
+    def get(self, key, generation):
+        """The cached result for `key` at `generation`, or None (a miss) — then compute and put()."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                cached_generation, expires_at, value = entry
+                if cached_generation == generation and now < expires_at:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+                if cached_generation != generation:
+                    self.stale += 1
+                else:
+                    self.expired += 1
+            self.misses += 1
+        return None
+
+    def put(self, key, generation, value):
+        """Cache a result computed at `generation`; only ok results are kept."""
+        if self.max_entries <= 0 or not value.get("ok"):
+            return
+        with self._lock:
+            self._entries[key] = (generation, time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+                "invalidated_by_writes": self.stale,
+                "expired": self.expired,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,154 @@
+"""Background jobs for the long-running JAWS MCP tools.
+
+A job runs one tool call (capture, compute, anomaly detection, ...) on a worker thread
+and returns its id at once, so the MCP call that started it doesn't block until the
+pipeline finishes and several jobs can run side by side. While it runs, the script's
+Reporter narration and activity counts arrive through Job.progress (see
+jaws_utils.CollectingReporter for in-process runs, the "[PROGRESS] n" stderr lines for
+subprocess runs); the server relays them as MCP notifications and job_status reports
+the latest. The final {"ok": ...} envelope is kept on the job for job_result.
+"""
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+
+# Concurrent jobs (JAWS_MCP_JOB_WORKERS); further jobs queue until a worker frees up.
+JOB_WORKERS = int(os.environ.get("JAWS_MCP_JOB_WORKERS", "4"))
+# Finished jobs kept for job_status/job_result; the oldest finished job is dropped first.
+JOB_HISTORY = 50
+# Narration lines kept per job (the most recent).
+JOB_LOG_LINES = 20
+# Item-count-only progress is relayed at most this often; narration lines always are.
+JOB_NOTIFY_INTERVAL = 1.0
+
+_local = threading.local()
+
+
+def current():
+    """The Job running on this thread, or None outside a job."""
+    return getattr(_local, "job", None)
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+class Job:
+    """One tool call run in the background: its state, progress and final envelope."""
+
+    def __init__(self, tool, args, notify=None):
+        self.id = uuid.uuid4().hex[:12]
+        self.tool = tool
+        self.args = args
+        self.notify = notify
+        self.state = "queued"
+        self.created_at = _now()
+        self.started_at = None
+        self.finished_at = None
+        self.items = 0
+        self.queue_position = None
+        self.log = []
+        self.result = None
+        self.done = threading.Event()
+        self._lock = threading.Lock()
+        self._notified = 0.0
+
+    def progress(self, message=None, items=None):
+        """Record a narration line and/or a running item count, and relay it."""
+        with self._lock:
+            if message is not None:
+                self.log.append(message)
+                del self.log[:-JOB_LOG_LINES]
+            if items is not None:
+                self.items = items
+            now = time.monotonic()
+            if message is None and now - self._notified < JOB_NOTIFY_INTERVAL:
+                return
+            self._notified = now
+        if self.notify is not None:
+            try:
+                self.notify(self, message)
+            except Exception:
+                # A client that went away must not fail the job it started.
+                pass
+
+    def wait(self, position, waiting_for):
+        """Mark the job as held in the server's scheduler queue (MCP/scheduler.py)."""
+        with self._lock:
+            self.state = "queued"
+            self.queue_position = position
+        self.progress(message=f"[QUEUE] position {position}, waiting for {waiting_for}")
+
+    def resume(self):
+        with self._lock:
+            self.state = "running"
+            self.queue_position = None
+
+    def status(self):
+        with self._lock:
+            return {
+                "job_id": self.id,
+                "tool": self.tool,
+                "args": self.args,
+                "state": self.state,
+                "created_at": self.created_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+                "items": self.items,
+                "queue_position": self.queue_position,
+                "message": self.log[-1] if self.log else None,
+                "log": list(self.log),
+            }
+
+
+class JobRegistry:
+    """Starts jobs on a bounded thread pool and keeps them addressable by id."""
+
+    def __init__(self, workers=JOB_WORKERS):
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="jaws-job")
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def start(self, tool, fn, args, notify=None):
+        job = Job(tool, args, notify)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+        self._pool.submit(self._run, job, fn)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self):
+        with self._lock:
+            return list(self._jobs.values())
+
+    def _prune(self):
+        finished = [j for j in self._jobs.values() if j.done.is_set()]
+        for job in finished[:max(0, len(finished) - JOB_HISTORY)]:
+            del self._jobs[job.id]
+
+    def _run(self, job, fn):
+        _local.job = job
+        with job._lock:
+            job.state = "running"
+            job.started_at = _now()
+        try:
+            result = fn(**job.args)
+        except Exception as e:
+            result = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+        finally:
+            _local.job = None
+        with job._lock:
+            job.result = result
+            job.state = "succeeded" if result.get("ok") else "failed"
+            job.finished_at = _now()
+        job.done.set()
+        job.progress(message=f"[JOB] {job.state}")
@@ -0,0 +1,147 @@
+"""Admission control for the MCP server's pipeline tools.
+
+Two clients, or one agent issuing parallel calls, can otherwise start compute_embeddings
+and anomaly_detection against the same database at once — each reading what the other
+is half-way through writing, and on a small host each loading its own torch model onto
+the same few cores. Every pipeline tool call instead passes through one Scheduler
+before it runs:
+
+- at most `max_running` scheduled calls execute at a time (JAWS_MCP_WORKERS);
+- a tool listed in `limits` runs at most that many calls of itself at once;
+- each call takes its database's read/write lock: writers (capture, enrichment,
+  compute, detection) run alone, readers (the sweep) share it with other readers.
+
+Waiting calls form one FIFO queue. A call starts once it is admissible and no earlier
+waiter it conflicts with (same limited tool, or a writer on its database) is still
+queued, so a stream of readers can't starve a writer nor a cheap call overtake an
+expensive one it would collide with. The queue — every call's position, what it is
+waiting for, and what is running — is visible through snapshot(). The graph's cheap
+read tools (fetch_traffic, inspect_endpoint, ...) are not scheduled: each of their
+queries reads a consistent snapshot, and they must stay fast while a write runs.
+"""
+import itertools
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+
+# Scheduled calls executing at once, across all tools (JAWS_MCP_WORKERS).
+MAX_RUNNING = int(os.environ.get("JAWS_MCP_WORKERS", "2"))
+
+READ = "read"
+WRITE = "write"
+
+
+class Ticket:
+    """One scheduled call: queued until admitted, then running until released."""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, tool, database, mode):
+        self.id = next(self._ids)
+        self.tool = tool
+        self.database = database
+        self.mode = mode
+        self.state = "queued"
+        self.queued_at = time.monotonic()
+        self.started_at = None
+        self.blocked_by = None
+
+    def describe(self, now, position=None):
+        started = self.started_at if self.started_at is not None else now
+        return {
+            "ticket": self.id,
+            "tool": self.tool,
+            "database": self.database,
+            "mode": self.mode,
+            "state": self.state,
+            "position": position,
+            "waiting_for": self.blocked_by,
+            "queued_seconds": round(started - self.queued_at, 3),
+            "running_seconds": round(now - self.started_at, 3) if self.started_at is not None else None,
+        }
+
+
+class Scheduler:
+    """FIFO admission under a running-call cap, per-tool limits and per-database RW locks."""
+
+    def __init__(self, max_running=MAX_RUNNING, limits=None):
+        self.max_running = max(1, max_running)
+        self.limits = dict(limits or {})
+        self._cond = threading.Condition()
+        self._queue = []
+        self._running = []
+        self.admitted = 0
+        self.waited = 0
+
+    def _conflicts(self, a, b):
+        if a.tool == b.tool and a.tool in self.limits:
+            return True
+        return a.database == b.database and WRITE in (a.mode, b.mode)
+
+    def _blocker(self, ticket):
+        """Why `ticket` can't start now, or None when it can."""
+        for earlier in self._queue:
+            if earlier is ticket:
+                break
+            if self._conflicts(ticket, earlier):
+                return f"queued {earlier.tool}"
+        if len(self._running) >= self.max_running:
+            return f"worker ({self.max_running} busy)"
+        limit = self.limits.get(ticket.tool)
+        if limit is not None and sum(r.tool == ticket.tool for r in self._running) >= limit:
+            return f"{ticket.tool} limit ({limit})"
+        for running in self._running:
+            if running.database == ticket.database and WRITE in (running.mode, ticket.mode):
+                return f"{running.mode} lock on '{ticket.database}' ({running.tool})"
+        return None
+
+    def acquire(self, tool, database, mode, on_wait=None):
+        """Block until the call may run; returns its Ticket for release().
+
+        `on_wait(position, waiting_for)` is called whenever a waiting call's queue
+        position or blocker changes (1 = next in line).
+        """
+        ticket = Ticket(tool, database, mode)
+        with self._cond:
+            self._queue.append(ticket)
+            reported = None
+            waited = False
+            while True:
+                ticket.blocked_by = self._blocker(ticket)
+                if ticket.blocked_by is None:
+                    break
+                waited = True
+                position = self._queue.index(ticket) + 1
+                if on_wait is not None and (position, ticket.blocked_by) != reported:
+                    reported = (position, ticket.blocked_by)
+                    on_wait(position, ticket.blocked_by)
+                self._cond.wait()
+            self._queue.remove(ticket)
+            ticket.state = "running"
+            ticket.started_at = time.monotonic()
+            self._running.append(ticket)
+            self.admitted += 1
+            self.waited += waited
+            # Whoever was queued behind this call may now be first in line.
+            self._cond.notify_all()
+        return ticket
+
+    def release(self, ticket):
+        with self._cond:
+            self._running.remove(ticket)
+            self._cond.notify_all()
+
+    def snapshot(self):
+        now = time.monotonic()
+        with self._cond:
+            return {
+                "max_running": self.max_running,
+                "limits": dict(self.limits),
+                "running": [t.describe(now) for t in self._running],
+                "queued": [t.describe(now, i + 1) for i, t in enumerate(self._queue)],
+                "admitted": self.admitted,
+                "waited": self.waited,
+                "at": datetime.now(timezone.utc).isoformat(),
+            }
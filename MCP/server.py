@@ -1,14 +1,32 @@
 """JAWS MCP Server — exposes the full JAWS network-analysis pipeline via FastMCP."""
 
-from mcp.server.fastmcp import FastMCP
+from mcp.server.fastmcp import Context, FastMCP
 import subprocess
 import sys
 import os
+import io
 import json
+import asyncio
+import base64
+import importlib
+import inspect
+import contextlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache, partial, wraps
 from pathlib import Path
 from typing import Any
 
-from jaws.config import DATABASE, get_neo4j_driver
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
+
+from jaws.config import DATABASE, ENDPOINT_EMBEDDING_INDEX, get_neo4j_async_driver, get_neo4j_driver
+from MCP.cache import ResultCache
+from MCP.jobs import JobRegistry, current as current_job
+from MCP.metrics import Registry
+from MCP.scheduler import READ, WRITE, Scheduler
 
 ROOT = Path(__file__).parent.parent   # /path/to/jaws/
 SCRIPTS = ROOT / "jaws"
@@ -22,6 +40,16 @@ SCRIPTS = ROOT / "jaws"
 _env_timeout = os.environ.get("JAWS_MCP_TIMEOUT")
 TIMEOUT = int(_env_timeout) if _env_timeout else None
 
+# How pipeline tools run. "inprocess" (the default) calls each script's main() inside
+# this server: modules (torch, sklearn, pandas) are imported once and every run shares
+# one Neo4j driver, so a call pays neither interpreter startup nor a connection
+# handshake, and the result dict comes straight back without a stdout round trip.
+# "subprocess" restores one isolated `python jaws/<script>.py` per call — a crash or
+# leak can't touch the server, and JAWS_MCP_TIMEOUT can kill a runaway run (an
+# in-process run can't be interrupted). Live capture always runs isolated: pyshark
+# drives its own asyncio loop, which can't nest inside the server's.
+ISOLATION = os.environ.get("JAWS_MCP_ISOLATION", "inprocess")
+
 INSTRUCTIONS = """JAWS captures network traffic into a Neo4j graph, enriches it with OSINT, embeds it, and flags anomalies.
 
 The tools form a linear pipeline — run them in order:
@@ -29,29 +57,86 @@ The tools form a linear pipeline — run them in order:
   2. capture_packets      — sniff that interface for N seconds into the graph.
   3. document_organizations — enrich the captured IPs with org/ASN ownership.
   4. compute_embeddings   — aggregate each IP's traffic into an endpoint profile and embed it.
-  5. anomaly_detection    — cluster the endpoint (per-IP) embeddings (PCA + DBSCAN) and flag outliers.
+  5. anomaly_detection    — cluster the endpoint (per-IP) embeddings (PCA + DBSCAN, or another detector) and flag outliers.
 
 The unit of analysis is the IP address (labeled with its organization): each IP becomes one
 endpoint profile describing its outbound and inbound traffic, and outliers are anomalous IPs —
 including unusual outbound traffic from the local host.
 
+Or run steps 2-5 at once with run_pipeline (one process, data handed between stages in memory).
+
 Anytime:
   - fetch_traffic   — read the per-IP endpoint profiles back from the graph (windowed overview).
   - inspect_endpoint — drill into ONE IP (e.g. an outlier): its profile, who it talked to (peers),
                        and a raw packet sample. The join key from an anomaly back to its detail.
+  - inspect_endpoints — the same for many IPs in one call (e.g. every ranked outlier). A `warning`
+                       on the result means the graph predates its conversation rollups (peers empty).
+  - similar_endpoints — the k IPs whose endpoint embeddings are nearest to ONE IP's (indexed k-NN),
+                       i.e. "which other hosts behave like this outlier".
+  - window_anomalies — score per-IP time windows (compute_embeddings(window='5m') first) against each
+                       IP's own history, to catch short bursts a whole-capture profile averages away.
+  - parameter_sweep — evaluate many eps/components/feature_weight settings in one call when
+                       anomaly_detection flags nothing (or too much); returns the most stable setting.
+  - start_job / job_status / job_result — run any long pipeline step in the background and poll it.
+  - scheduler_status — running and queued pipeline calls; colliding calls (two writers, a second
+                       compute or detection run) wait their turn rather than run side by side.
+  - metrics         — Prometheus metrics (tool latencies, stage timings, query times, result counts);
+                       also served at GET /metrics on the HTTP transport.
   - drop_database   — wipe the graph (typically before a fresh capture session).
 
 Notes:
   - Keep captures short (30-120s); capture again rather than running one long session.
   - After every capture, run document_organizations and compute_embeddings before anomaly_detection.
-  - Use compute_embeddings(api='transformers') on a GPU host; otherwise api='openai'. The local
+  - Use compute_embeddings(api='transformers') on a GPU host; otherwise api='openai', or api='hashing'
+    for a fast model-free embedding on constrained hardware. The local
     transformer model must be downloaded on the host beforehand (`jaws-utils --model ...`); this is
     a one-time setup step done outside the MCP.
-  - compute_embeddings and anomaly_detection can run for a while on large captures — if your client
-    aborts them early, raise its per-tool-call timeout (e.g. Claude Code's MCP_TOOL_TIMEOUT).
+  - capture_packets, compute_embeddings and anomaly_detection can run for a while on large captures —
+    run them with start_job(tool, args) and follow job_status / job_result rather than raising the
+    client's per-tool-call timeout (e.g. Claude Code's MCP_TOOL_TIMEOUT).
   - All tools operate on the single '%s' database.""" % DATABASE
 
-mcp = FastMCP("JAWS - Wireshark MCP with Network Analysis Tools", instructions=INSTRUCTIONS)
+# Where time goes on the box: every tool call, every pipeline script run (and each
+# run_pipeline stage), the scheduler queue, and the read tools' Neo4j queries, plus the
+# counts each pipeline result reports. Served at /metrics on the HTTP transport and by
+# the `metrics` tool (MCP/metrics.py).
+_metrics = Registry()
+_TOOL_CALLS = _metrics.counter("jaws_mcp_tool_calls_total", "MCP tool calls by tool and outcome (returned, or raised an exception).", ("tool", "outcome"))
+_TOOL_SECONDS = _metrics.histogram("jaws_mcp_tool_seconds", "Wall time of MCP tool calls, scheduler queueing included.", ("tool",))
+_QUEUE_SECONDS = _metrics.histogram("jaws_mcp_queue_wait_seconds", "Time pipeline tool calls waited in the scheduler queue before running.", ("tool",))
+_SCRIPT_SECONDS = _metrics.histogram("jaws_mcp_script_seconds", "Wall time of pipeline script runs, in-process or as a subprocess.", ("script", "mode"))
+_SCRIPT_RUNS = _metrics.counter("jaws_mcp_script_runs_total", "Pipeline script runs by outcome of their result envelope.", ("script", "mode", "ok"))
+_STAGE_SECONDS = _metrics.histogram("jaws_pipeline_stage_seconds", "Wall time of each run_pipeline stage.", ("stage",))
+_RESULT_COUNTS = _metrics.counter("jaws_pipeline_result_count_total", "Running sum of the counts in pipeline script results (packets_captured, endpoints_embedded, outliers_flagged, ...).", ("script", "field"))
+_RESULT_LAST = _metrics.gauge("jaws_pipeline_result_count", "The counts in each pipeline script's latest successful result.", ("script", "field"))
+_QUERY_SECONDS = _metrics.histogram("jaws_neo4j_query_seconds", "Neo4j time of the read tools' queries, results consumed.", ("query",))
+_CACHE_STATS = _metrics.gauge("jaws_mcp_cache", "Read-through cache statistics, as cache_stats reports them.", ("stat",))
+_SCHEDULED_CALLS = _metrics.gauge("jaws_mcp_scheduler_calls", "Pipeline tool calls currently running or queued in the scheduler.", ("state",))
+
+# The result fields that are counts of work done. Results also carry integer settings
+# (components, min_samples, window_seconds, ...), which must not be summed as counts.
+RESULT_COUNT_FIELDS = (
+    "packets_captured", "addresses_scanned", "organizations_added", "endpoints_embedded", "packets",
+    "endpoints_clustered", "endpoints_scored", "windows_scored", "outliers_flagged", "excluded_local",
+)
+
+
+class _MeteredMCP(FastMCP):
+    """FastMCP that times every tool call, whatever the tool, into the metrics registry."""
+
+    async def call_tool(self, name, arguments):
+        start = time.perf_counter()
+        outcome = "raised"
+        try:
+            result = await super().call_tool(name, arguments)
+            outcome = "returned"
+            return result
+        finally:
+            _TOOL_SECONDS.observe(time.perf_counter() - start, tool=name)
+            _TOOL_CALLS.inc(tool=name, outcome=outcome)
+
+
+mcp = _MeteredMCP("JAWS - Wireshark MCP with Network Analysis Tools", instructions=INSTRUCTIONS)
 
 
 def _try_json(text: str) -> Any:
@@ -62,6 +147,40 @@ def _try_json(text: str) -> Any:
         return None
 
 
+def _stream(args: list[str], timeout: int | None, job) -> tuple[int, str, str]:
+    """subprocess.run for a job: stderr is read line by line as it is written, so the
+    Reporter's narration and "[PROGRESS] n" counts reach job.progress while it runs."""
+    process = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, cwd=ROOT)
+    stdout = []
+    reader = threading.Thread(target=lambda: stdout.append(process.stdout.read()), daemon=True)
+    reader.start()
+    expired = threading.Event()
+
+    def kill():
+        expired.set()
+        process.kill()
+    timer = threading.Timer(timeout, kill) if timeout else None
+    if timer:
+        timer.start()
+    stderr = []
+    try:
+        for line in process.stderr:
+            stderr.append(line)
+            line = line.rstrip()
+            if line.startswith("[PROGRESS] ") and line[11:].isdigit():
+                job.progress(items=int(line[11:]))
+            elif line:
+                job.progress(message=line)
+        returncode = process.wait()
+        reader.join()
+    finally:
+        if timer:
+            timer.cancel()
+    if expired.is_set():
+        raise subprocess.TimeoutExpired(args, timeout)
+    return returncode, "".join(stdout), "".join(stderr)
+
+
 def _run(args: list[str], timeout: int | None = TIMEOUT) -> dict[str, Any]:
     """Run a JAWS CLI and return its result as a native dict.
 
@@ -81,20 +200,24 @@ def _run(args: list[str], timeout: int | None = TIMEOUT) -> dict[str, Any]:
     stdout) are stamped with ok=False here so they conform to the same shape.
     """
     try:
-        result = subprocess.run(args, capture_output=True, text=True, cwd=ROOT, timeout=timeout)
+        if current_job() is None:
+            result = subprocess.run(args, capture_output=True, text=True, cwd=ROOT, timeout=timeout)
+            returncode, stdout, stderr = result.returncode, result.stdout, result.stderr
+        else:
+            returncode, stdout, stderr = _stream(args, timeout, current_job())
     except subprocess.TimeoutExpired:
         return {"ok": False, "error": f"process exceeded the JAWS_MCP_TIMEOUT backstop of {timeout}s"}
-    out = (result.stdout or "").strip()
-    err = (result.stderr or "").strip()
+    out = (stdout or "").strip()
+    err = (stderr or "").strip()
     parsed = _try_json(out)
-    if result.returncode != 0:
+    if returncode != 0:
         # A non-zero exit may still carry the structured envelope on stdout (a
         # reporter.error already stamped ok=False); prefer it, else synthesize one
         # from stderr (tracebacks / argparse) or stdout.
         if isinstance(parsed, dict):
             parsed.setdefault("ok", False)
             return parsed
-        return {"ok": False, "error": err or out or "no output", "exit_code": result.returncode}
+        return {"ok": False, "error": err or out or "no output", "exit_code": returncode}
     if isinstance(parsed, dict):
         # Already enveloped by the Reporter; backstop ok in case a CLI printed a
         # bare dict outside reporter.result.
@@ -110,8 +233,224 @@ def _run(args: list[str], timeout: int | None = TIMEOUT) -> dict[str, Any]:
     return {"ok": False, "error": "process produced non-JSON output", "raw": out}
 
 
-def _script(name: str, *args: str) -> dict[str, Any]:
-    return _run([sys.executable, str(SCRIPTS / name), *args])
+@lru_cache(maxsize=1)
+def _driver():
+    """The server's one Neo4j driver, also handed to in-process script runs."""
+    from jaws.jaws_utils import share_driver
+    driver = get_neo4j_driver()
+    share_driver(driver)
+    return driver
+
+
+class _RoutedStream:
+    """sys.stdout / sys.stderr stand-in that sends each thread's writes where that thread
+    asked (see _routed), and everything else to the stream it replaced. Lets in-process
+    runs on concurrent job threads each redirect their output, which contextlib's
+    process-wide redirect_stdout/redirect_stderr cannot do."""
+
+    def __init__(self, default):
+        self.default = default
+        self.local = threading.local()
+
+    def _target(self):
+        return getattr(self.local, "target", None) or self.default
+
+    def write(self, text):
+        return self._target().write(text)
+
+    def flush(self):
+        return self._target().flush()
+
+    def __getattr__(self, name):
+        return getattr(self.default, name)
+
+
+_route_lock = threading.Lock()
+
+
+@contextlib.contextmanager
+def _routed(stdout, stderr):
+    """Route this thread's sys.stdout and sys.stderr writes to `stdout` and `stderr`."""
+    with _route_lock:
+        for name in ("stdout", "stderr"):
+            if not isinstance(getattr(sys, name), _RoutedStream):
+                setattr(sys, name, _RoutedStream(getattr(sys, name)))
+    streams = (sys.stdout, sys.stderr)
+    streams[0].local.target, streams[1].local.target = stdout, stderr
+    try:
+        yield
+    finally:
+        streams[0].local.target = streams[1].local.target = None
+
+
+def _run_inprocess(name: str, args: list[str]) -> dict[str, Any]:
+    """Call jaws/<name>'s main(argv, reporter) in this process; same contract as _run.
+
+    The script reports through a CollectingReporter, so its envelope is returned
+    directly; inside a job its narration and activity counts also feed the job's
+    progress. Anything it prints goes to stderr — on the stdio transport stdout is the
+    MCP channel — and its stderr is kept for the error when no envelope was produced
+    (argparse usage errors exit via SystemExit before any reporter call).
+    """
+    from jaws.jaws_utils import CollectingReporter
+    _driver()
+    module = importlib.import_module(f"jaws.{Path(name).stem}")
+    job = current_job()
+    reporter = CollectingReporter(progress=job.progress if job is not None else None)
+    captured = io.StringIO()
+    failure = None
+    try:
+        with _routed(sys.__stderr__, captured):
+            module.main(list(args), reporter=reporter)
+    except SystemExit as e:
+        failure = {"ok": False, "error": captured.getvalue().strip() or f"exited with status {e.code}", "exit_code": e.code}
+    except Exception as e:
+        failure = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+    if reporter.payload is not None:
+        return reporter.payload
+    return failure or {"ok": False, "error": "process produced no output"}
+
+
+def _script(name: str, *args: str, isolated: bool = False) -> dict[str, Any]:
+    mode = "subprocess" if isolated or ISOLATION == "subprocess" else "inprocess"
+    script = Path(name).stem
+    with _SCRIPT_SECONDS.time(script=script, mode=mode):
+        if mode == "subprocess":
+            result = _run([sys.executable, str(SCRIPTS / name), *args])
+        else:
+            result = _run_inprocess(name, list(args))
+    ok = bool(result.get("ok"))
+    _SCRIPT_RUNS.inc(script=script, mode=mode, ok=str(ok).lower())
+    if ok:
+        for field in RESULT_COUNT_FIELDS:
+            value = result.get(field)
+            if isinstance(value, int) and not isinstance(value, bool):
+                _RESULT_COUNTS.inc(value, script=script, field=field)
+                _RESULT_LAST.set(value, script=script, field=field)
+        for stage in result.get("stages") or []:
+            _STAGE_SECONDS.observe(stage["seconds"], stage=stage["stage"])
+    return result
+
+
+def _jsonable(value: Any) -> Any:
+    """Neo4j result values as JSON-native types in one typed pass: temporal values
+    (DateTime, Date, Time, Duration) become their ISO-8601 strings, containers are walked,
+    and anything else unknown is stringified — what FastMCP can serialize as is."""
+    if value is None or isinstance(value, (str, bool, int, float)):
+        return value
+    if isinstance(value, dict):
+        return {k: _jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(v) for v in value]
+    if hasattr(value, "iso_format"):
+        return value.iso_format()
+    return str(value)
+
+
+# Keyset pagination. A cursor is the sort key of the last row a page returned, encoded
+# opaquely (urlsafe base64 of JSON); the next page asks for rows strictly after it in
+# the same order, so pages stay stable while rows are added and each page costs the
+# same however deep it is — no OFFSET re-reading every earlier row.
+def _encode_cursor(key: dict[str, Any]) -> str:
+    return base64.urlsafe_b64encode(json.dumps(key, separators=(",", ":")).encode()).decode()
+
+
+def _decode_cursor(cursor: str | None, fields: tuple[str, ...]) -> dict[str, Any] | None:
+    """The key a cursor encodes, or None for the first page; ValueError when malformed."""
+    if not cursor:
+        return None
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"invalid cursor ({e})")
+    if not isinstance(key, dict) or any(f not in key for f in fields):
+        raise ValueError("invalid cursor")
+    return key
+
+
+def _page(rows: list[dict[str, Any]], limit: int, key) -> tuple[list[dict[str, Any]], str | None]:
+    """Split limit+1 fetched rows into the page and the cursor after it (None on the last page)."""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, _encode_cursor(key(rows[-1]))
+
+
+_cache = ResultCache()
+
+
+def _cached(fn):
+    """Serve a read-only tool from the result cache (MCP/cache.py), keyed by its arguments.
+
+    The graph's write generation is read first — one indexed single-node lookup — and a
+    result cached under another generation is recomputed. If the generation can't be
+    read the call goes straight to the graph, uncached.
+    """
+    signature = inspect.signature(fn)
+
+    @wraps(fn)
+    async def wrapper(*args, **kwargs):
+        from jaws.jaws_utils import GENERATION_KEY, READ_GENERATION_QUERY
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        try:
+            rows = await _aread("generation", READ_GENERATION_QUERY, key=GENERATION_KEY)
+        except Exception:
+            return await fn(*args, **kwargs)
+        generation = (rows[0]["epoch"], rows[0]["generation"]) if rows else (None, None)
+        key = (fn.__name__, json.dumps(bound.arguments, sort_keys=True, default=str))
+        result = _cache.get(key, generation)
+        if result is None:
+            result = await fn(*args, **kwargs)
+            _cache.put(key, generation, result)
+        return result
+    return wrapper
+
+
+# Pipeline tools are admitted by the scheduler (MCP/scheduler.py): writers hold the
+# database exclusively, the sweep shares it with other readers, and the CPU-heavy tools
+# run one call at a time — a Pi can't host two torch models or two clustering process
+# pools at once. Override with JAWS_MCP_TOOL_LIMITS, e.g. "parameter_sweep=2,compute_embeddings=1".
+TOOL_LIMITS = {"compute_embeddings": 1, "anomaly_detection": 1, "parameter_sweep": 1, "run_pipeline": 1}
+TOOL_LIMITS.update({
+    tool.strip(): int(limit)
+    for tool, _, limit in (item.partition("=") for item in os.environ.get("JAWS_MCP_TOOL_LIMITS", "").split(",") if "=" in item)
+})
+
+_scheduler = Scheduler(limits=TOOL_LIMITS)
+# Threads that carry scheduled calls, waiting ones included; the scheduler, not this
+# pool, bounds how many execute.
+_tool_pool = ThreadPoolExecutor(max_workers=32, thread_name_prefix="jaws-tool")
+
+
+def _scheduled(mode: str):
+    """Run a pipeline tool under the scheduler, off the event loop.
+
+    FastMCP calls a plain function on its event loop, so a tool waiting for the database
+    lock would stall every other call, job_status included. The registered tool is an
+    async wrapper that waits and runs on a worker thread instead; `.run` is the blocking
+    call, which jobs use on their own threads — a queued job reports its position through
+    job_status.
+    """
+    def decorate(fn):
+        @wraps(fn)
+        def run(*args, **kwargs):
+            job = current_job()
+            ticket = _scheduler.acquire(fn.__name__, DATABASE, mode, job.wait if job is not None else None)
+            _QUEUE_SECONDS.observe(ticket.started_at - ticket.queued_at, tool=fn.__name__)
+            if job is not None:
+                job.resume()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                _scheduler.release(ticket)
+
+        @wraps(fn)
+        async def call(*args, **kwargs):
+            return await asyncio.get_running_loop().run_in_executor(_tool_pool, partial(run, *args, **kwargs))
+        call.run = run
+        return call
+    return decorate
 
 
 @mcp.tool(name="list_interfaces", description=(
@@ -128,11 +467,13 @@ def list_interfaces() -> dict[str, Any]:
     "Use an interface name from list_interfaces. Keep captures short (30-120s) and capture "
     "again rather than running one long session. The call runs for roughly `duration` seconds."
 ))
+@_scheduled(WRITE)
 def capture_packets(interface: str, duration: int = 60) -> dict[str, Any]:
     return _script(
         "jaws_capture.py",
         "--interface", interface,
         "--duration", str(duration),
+        isolated=True,
     )
 
 
@@ -140,6 +481,7 @@ def capture_packets(interface: str, duration: int = 60) -> dict[str, Any]:
     "Step 3. Enrich the captured IP addresses with organization/ASN ownership via Ipinfo. "
     "Run after each capture and before compute_embeddings."
 ))
+@_scheduled(WRITE)
 def document_organizations() -> dict[str, Any]:
     return _script("jaws_ipinfo.py")
 
@@ -149,10 +491,18 @@ def document_organizations() -> dict[str, Any]:
     "that profile — one vector per IP — for downstream clustering. "
     "Use api='transformers' (default) on a GPU host — the local model produces tighter clusters and "
     "surfaces anomalies that OpenAI embeddings miss (the model must be pre-downloaded on the host). "
-    "Use api='openai' as a fallback when no GPU is available. May run for a while on large captures."
+    "Use api='openai' as a fallback when no GPU is available. Use api='hashing' for a model-free embedder "
+    "(hashed n-gram TF-IDF reduced with randomized SVD): no download or GPU, near-instant on edge hardware, "
+    "at the cost of semantic nuance — a good fit when behavioral features drive the anomalies anyway. "
+    "May run for a while on large captures. Pass `window` (e.g. '5m', '30s', '1h') to also write one "
+    "time-windowed profile per IP per window, which window_anomalies scores."
 ))
-def compute_embeddings(api: str = "transformers") -> dict[str, Any]:
-    return _script("jaws_compute.py", "--api", api)
+@_scheduled(WRITE)
+def compute_embeddings(api: str = "transformers", window: str | None = None) -> dict[str, Any]:
+    args = ["--api", api]
+    if window:
+        args += ["--window", window]
+    return _script("jaws_compute.py", *args)
 
 
 @mcp.tool(name="anomaly_detection", description=(
@@ -167,10 +517,12 @@ def compute_embeddings(api: str = "transformers") -> dict[str, Any]:
     "Counts are from each endpoint's OWN perspective and scored endpoints are REMOTE (host excluded by "
     "default), so a remote IP's high bytes_out is traffic it sent TO the host (a host DOWNLOAD), NOT exfil; "
     "the outbound-from-host signal is its bytes_in. Read `host_relative` before labeling a finding — that "
-    "lets you tell a host-upload/exfil from a download from a low-interval_cv beacon. The top-level "
+    "lets you tell a host-upload/exfil from a download from a low-interval_cv beacon. A high-`periodicity` reason "
+    "(with its `period` in seconds) marks traffic that repeats on a fixed cadence even when interleaved "
+    "with other conversations — the beacon signal that interval_cv misses on busy hosts. The top-level "
     "`perspective` field restates this. outliers_flagged == 0 is not a failure. "
     "The result also carries a `host_outbound` section — the defender-frame counterpart to `endpoints`: "
-    "the CAPTURE HOST's own outbound, per destination, isolated from raw packets (host as source) and "
+    "the CAPTURE HOST's own outbound, per destination, isolated per host→peer conversation (host as source) and "
     "ranked by `outbound_score` on the host-upload distribution, with `upload_download_ratio` high = "
     "exfil-shaped. The host is excluded from clustering (a hub), so its real outbound is demoted in the "
     "`endpoints` ranking; use `host_outbound.destinations` to judge host exfiltration or beaconing. "
@@ -178,15 +530,37 @@ def compute_embeddings(api: str = "transformers") -> dict[str, Any]:
     "component to unit variance — helps with a few strong components but amplifies noise when many are retained. "
     "`eps` overrides the DBSCAN epsilon; when omitted it is auto-recommended, but that recommendation "
     "tends to overshoot on small captures and return 0 outliers — if outliers_flagged is 0 and you "
-    "expected some, re-run with a smaller eps (e.g. 50-70% of the eps shown in the result). "
+    "expected some, re-run with a smaller eps (e.g. 50-70% of the eps shown in the result), or call "
+    "parameter_sweep once to evaluate many eps/components/feature_weight settings together. "
     "`feature_weight` controls how much each endpoint's behavioral numbers (bytes/packets/peers, in & "
     "out) drive clustering vs. the text profile: 0 clusters on text/org/protocol only, higher (default "
     "1.0) surfaces volume/fan-out anomalies like unusual outbound traffic. "
     "The capture host itself is excluded by default (it is a structural hub that dominates clustering; "
-    "its outbound traffic still appears as remote endpoints' inbound) — set include_local=true to keep it."
+    "its outbound traffic still appears as remote endpoints' inbound) — set include_local=true to keep it. "
+    "`fit_baseline` also saves this run as the baseline for incremental scoring. `incremental` scores ONLY "
+    "endpoints whose embedding is new or changed since that baseline (by content hash; projected with its "
+    "saved PCA/scaler, flagged when farther than eps from every baseline core sample — `core_distance`), in "
+    "milliseconds and without refitting; it refits automatically when the baseline is missing, stale, or fit "
+    "on embeddings from another model (always, for api='hashing' embeddings, whose basis changes every "
+    "compute run). Incremental results carry `mode: score` and the `baseline` they were scored against, and "
+    "omit the host_outbound section. "
+    "`detector` picks the outlier detector: 'dbscan' (default), 'hdbscan' (no eps to tune — try it instead of "
+    "retrying eps), 'isolation-forest' (fastest on very large captures) or 'lof' (endpoints sparse relative to "
+    "their own neighbors). Every detector sets `is_outlier` and a continuous `detector_score` (higher = more "
+    "anomalous) on each endpoint; the result names the `detector` and its `detector_params`, and eps is null "
+    "for the non-DBSCAN detectors. fit_baseline and incremental require 'dbscan'. "
+    "Plots are skipped by default (they cost more than the clustering on large captures); set plots=true to "
+    "also save PNGs (top outliers labeled) on the host — the result's `plots` field names the directory."
 ))
-def anomaly_detection(components: int = 2, whiten: bool = False, eps: float | None = None, feature_weight: float = 1.0, include_local: bool = False) -> dict[str, Any]:
-    args = ["--components", str(components), "--feature-weight", str(feature_weight)]
+@_scheduled(WRITE)
+def anomaly_detection(components: int = 2, whiten: bool = False, eps: float | None = None, feature_weight: float = 1.0, include_local: bool = False, fit_baseline: bool = False, incremental: bool = False, plots: bool = False, detector: str = "dbscan") -> dict[str, Any]:
+    args = ["--components", str(components), "--feature-weight", str(feature_weight), "--detector", detector]
+    if plots:
+        args.append("--plots")
+    if fit_baseline:
+        args.append("--fit")
+    if incremental:
+        args.append("--score")
     if whiten:
         args.append("--whiten")
     if eps is not None:
@@ -196,16 +570,188 @@ def anomaly_detection(components: int = 2, whiten: bool = False, eps: float | No
     return _script("jaws_finder.py", *args)
 
 
+@mcp.tool(name="parameter_sweep", description=(
+    "Evaluate a grid of anomaly_detection settings in ONE call instead of retrying anomaly_detection with "
+    "different eps values. Every combination of `components` × `feature_weights` × eps is clustered over the "
+    "same fetched endpoints (shared PCA fit, spaces clustered in parallel). `eps` lists absolute values; when "
+    "omitted each space is swept at 0.5-1.0 × its own auto-recommended eps. Returns `cells` — per setting: "
+    "clusters, outliers, silhouette (cluster quality, higher is better) and `stability` (mean Jaccard of its "
+    "outlier set with the neighboring settings; high = the flags survive small parameter changes) — and `best`, "
+    "the most stable setting that flags at least one outlier without flagging a large share of endpoints, with "
+    "its `outlier_ips`. Writes nothing; pass `best`'s components/feature_weight/eps to anomaly_detection to "
+    "score and persist that run."
+))
+@_scheduled(READ)
+def parameter_sweep(components: list[int] | None = None, feature_weights: list[float] | None = None, eps: list[float] | None = None, whiten: bool = False, include_local: bool = False) -> dict[str, Any]:
+    args = ["--sweep"]
+    if components:
+        args += ["--sweep-components", ",".join(str(c) for c in components)]
+    if feature_weights:
+        args += ["--sweep-weights", ",".join(str(w) for w in feature_weights)]
+    if eps:
+        args += ["--sweep-eps", ",".join(str(e) for e in eps)]
+    if whiten:
+        args.append("--whiten")
+    if include_local:
+        args.append("--include-local")
+    return _script("jaws_finder.py", *args)
+
+
+@mcp.tool(name="window_anomalies", description=(
+    "Time-resolved anomaly detection over the per-IP window profiles written by compute_embeddings(window=...). "
+    "Each (IP, window) is scored against the population of windows AND against that IP's own other windows, "
+    "so a short burst (e.g. two minutes of exfil in a six-hour capture) stands out even though it is averaged "
+    "away in the whole-capture endpoint profile. Returns the top-ranked `windows`, each with window_start/"
+    "window_end, directional counts, `self_score` (departure from its own history), `population_score`, "
+    "`anomaly_score` (the larger), `is_outlier` (a feature departed from its own history by at least "
+    "`outlier_z`) and `reasons` tagged with the `basis` (self or population) they were measured against. "
+    "`window` picks the window size (e.g. '5m'); by default the most recently computed size is used."
+))
+@_scheduled(WRITE)
+def window_anomalies(window: str | None = None, include_local: bool = False) -> dict[str, Any]:
+    args = ["--windows"]
+    if window:
+        args.append(window)
+    if include_local:
+        args.append("--include-local")
+    return _script("jaws_finder.py", *args)
+
+
+@mcp.tool(name="run_pipeline", description=(
+    "Steps 2-5 in ONE call: capture `interface` for `duration` seconds, enrich the IPs with Ipinfo (skipped "
+    "when `enrich` is false or no Ipinfo key is configured), embed per-IP profiles with `api` (and `window` "
+    "profiles, as compute_embeddings), then run anomaly_detection with `detector` / `eps` / `feature_weight`. "
+    "The stages run back to back in one process and hand packets, profiles and embeddings to each other in "
+    "memory instead of re-reading what the previous stage just wrote — everything is still persisted, so "
+    "fetch_traffic, inspect_endpoint and the standalone tools see the same graph afterwards. Returns "
+    "`stages` (each stage's wall time in `seconds`), headline counts, and every stage's own result under "
+    "`results` (`results.detect` is exactly anomaly_detection's result). Stops at the first failing stage, "
+    "naming it. Runs for at least `duration` seconds — prefer start_job('run_pipeline', ...)."
+))
+@_scheduled(WRITE)
+def run_pipeline(interface: str, duration: int = 60, api: str = "transformers", window: str | None = None,
+                 enrich: bool = True, detector: str = "dbscan", eps: float | None = None,
+                 feature_weight: float = 1.0, include_local: bool = False) -> dict[str, Any]:
+    args = ["--interface", interface, "--duration", str(duration), "--api", api,
+            "--detector", detector, "--feature-weight", str(feature_weight)]
+    if window:
+        args += ["--window", window]
+    if not enrich:
+        args.append("--no-enrich")
+    if eps is not None:
+        args += ["--eps", str(eps)]
+    if include_local:
+        args.append("--include-local")
+    # Isolated like capture_packets: its capture stage drives pyshark's own event loop.
+    return _script("jaws_pipeline.py", *args, isolated=True)
+
+
+# Background jobs (MCP/jobs.py): any of these tools can be started with start_job and
+# return immediately, instead of holding the MCP call open for the whole run. Progress
+# (the script's Reporter narration and item counts) is relayed to the client that
+# started the job as MCP log notifications, and to job_status(wait=...) callers as
+# progress notifications on their own request.
+JOB_TOOLS = {
+    "capture_packets": capture_packets.run,
+    "document_organizations": document_organizations.run,
+    "compute_embeddings": compute_embeddings.run,
+    "anomaly_detection": anomaly_detection.run,
+    "parameter_sweep": parameter_sweep.run,
+    "window_anomalies": window_anomalies.run,
+    "run_pipeline": run_pipeline.run,
+}
+# Longest job_status(wait=...) long-poll, in seconds.
+JOB_MAX_WAIT = 60.0
+
+_jobs = JobRegistry()
+
+
+def _notifier(ctx: Context):
+    """Relay a job's progress to the starting client's session from the job's thread."""
+    loop = asyncio.get_running_loop()
+    session = ctx.session
+
+    def notify(job, message):
+        data = {"job_id": job.id, "tool": job.tool, "state": job.state, "items": job.items, "message": message}
+        asyncio.run_coroutine_threadsafe(session.send_log_message(level="info", data=data, logger="jaws.jobs"), loop)
+    return notify
+
+
+@mcp.tool(name="start_job", description=(
+    "Start a long-running tool in the background and return at once with its `job_id`, instead of holding "
+    "the call open until it finishes (no need to raise the client's tool timeout). `tool` is one of "
+    "capture_packets, document_organizations, compute_embeddings, anomaly_detection, parameter_sweep, "
+    "window_anomalies or run_pipeline; `args` are that tool's own arguments, e.g. {\"interface\": \"eth0\", \"duration\": 60}. "
+    "Several jobs can run at once. Progress is sent as log notifications while the job runs; poll "
+    "job_status for state, item counts and the latest narration, then fetch the tool's normal result "
+    "with job_result."
+))
+async def start_job(tool: str, args: dict[str, Any] | None = None, ctx: Context | None = None) -> dict[str, Any]:
+    fn = JOB_TOOLS.get(tool)
+    if fn is None:
+        return {"ok": False, "error": f"unknown job tool '{tool}' (one of: {', '.join(JOB_TOOLS)})"}
+    args = args or {}
+    try:
+        inspect.signature(fn).bind(**args)
+    except TypeError as e:
+        return {"ok": False, "error": f"invalid args for {tool}: {e}"}
+    job = _jobs.start(tool, fn, args, _notifier(ctx) if ctx is not None else None)
+    return {"ok": True, **job.status()}
+
+
+@mcp.tool(name="job_status", description=(
+    "State of a background job started with start_job: `state` (queued, running, succeeded, failed) — a "
+    "queued job also carries its `queue_position` behind the calls it would collide with (see "
+    "scheduler_status) — "
+    "`items` processed so far (packets captured, organizations added, endpoints embedded), the latest "
+    "narration `message` and a short `log`. Pass `wait` (seconds, up to 60) to block until the job "
+    "finishes or the wait runs out, receiving progress notifications meanwhile. Without `job_id`, lists "
+    "every known job."
+))
+async def job_status(job_id: str | None = None, wait: float = 0, ctx: Context | None = None) -> dict[str, Any]:
+    if job_id is None:
+        return {"ok": True, "jobs": [job.status() for job in _jobs.list()]}
+    job = _jobs.get(job_id)
+    if job is None:
+        return {"ok": False, "error": f"unknown job '{job_id}'"}
+    deadline = asyncio.get_running_loop().time() + min(max(wait, 0.0), JOB_MAX_WAIT)
+    reported = None
+    while not job.done.is_set() and asyncio.get_running_loop().time() < deadline:
+        if ctx is not None and job.items != reported:
+            reported = job.items
+            await ctx.report_progress(job.items)
+        await asyncio.sleep(0.5)
+    return {"ok": True, **job.status()}
+
+
+@mcp.tool(name="job_result", description=(
+    "The final result of a background job — exactly what the tool returns when called directly, plus "
+    "`job_id`. While the job is still queued or running this returns ok=false with its `state`; use "
+    "job_status(wait=...) to wait for it."
+))
+def job_result(job_id: str) -> dict[str, Any]:
+    job = _jobs.get(job_id)
+    if job is None:
+        return {"ok": False, "error": f"unknown job '{job_id}'"}
+    if not job.done.is_set():
+        return {"ok": False, "error": f"job '{job_id}' is still {job.state}", "state": job.state}
+    return {**job.result, "job_id": job.id}
+
+
 @mcp.tool(name="drop_database", description=(
     "Wipe ALL data from the graph. Irreversible. Typically run before starting a fresh capture session."
 ))
+@_scheduled(WRITE)
 def drop_database() -> dict[str, Any]:
     return _script("jaws_utils.py")
 
 
 _FETCH_QUERY = """
 MATCH (endpoint:ENDPOINT)
-WHERE endpoint.TIMESTAMP > datetime() - duration({minutes: $duration})
+WHERE endpoint.TIMESTAMP > datetime($since)
+  AND ($after IS NULL
+       OR endpoint.TIMESTAMP < datetime($after.ts)
+       OR (endpoint.TIMESTAMP = datetime($after.ts) AND endpoint.IP_ADDRESS > $after.ip))
 OPTIONAL MATCH (ip:IP_ADDRESS {IP_ADDRESS: endpoint.IP_ADDRESS})<-[:OWNERSHIP]-(org:ORGANIZATION)
 RETURN DISTINCT
     endpoint.IP_ADDRESS AS ip_address,
@@ -223,10 +769,13 @@ RETURN DISTINCT
     endpoint.PROTOCOLS AS protocols,
     endpoint.INTERVAL_MEAN AS interval_mean,
     endpoint.INTERVAL_CV AS interval_cv,
+    endpoint.PERIOD AS period,
+    endpoint.PERIODICITY AS periodicity,
+    endpoint.PERIOD_PEER AS period_peer,
     endpoint.OUTLIER AS outlier,
     endpoint.TIMESTAMP AS timestamp
-ORDER BY endpoint.TIMESTAMP DESC
-LIMIT $limit
+ORDER BY timestamp DESC, ip_address
+LIMIT $limit + 1
 """
 
 
@@ -236,22 +785,28 @@ LIMIT $limit
     "directional traffic (bytes/packets/peers/ports, outbound and inbound), plus its outlier flag. "
     "Directions are from the endpoint's OWN perspective: for a remote IP, `bytes_out` is what it sent TO "
     "the capture host (a host download), and `bytes_in` is what the host sent to it (outbound from host). "
-    "`duration` is how many minutes of history to include; `limit` caps the rows. "
+    "`duration` is how many minutes of history to include; `limit` is the page size. When more rows "
+    "remain, `next_cursor` is set: pass it back as `cursor` (same duration) for the next page — pages "
+    "are ordered by (timestamp, IP) and anchored to the first page's window, so rows never repeat or skip. "
     "This is the windowed overview; to drill into ONE specific IP (e.g. an outlier from anomaly_detection) "
     "and see exactly who it talked to, use inspect_endpoint instead."
 ))
-def fetch_traffic(duration: int = 60, limit: int = 100) -> dict[str, Any]:
+@_cached
+async def fetch_traffic(duration: int = 60, limit: int = 100, cursor: str | None = None) -> dict[str, Any]:
+    limit = max(1, int(limit))
+    try:
+        after = _decode_cursor(cursor, ("since", "ts", "ip"))
+    except ValueError as e:
+        return {"ok": False, "error": str(e)}
+    # The window is anchored on the first page and carried in the cursor, so later pages
+    # read the same window even as "now" moves on.
+    since = after["since"] if after else (datetime.now(timezone.utc) - timedelta(minutes=duration)).isoformat()
     try:
-        driver = get_neo4j_driver()
-        with driver.session(database=DATABASE) as session:
-            result = session.run(_FETCH_QUERY, duration=duration, limit=limit)
-            data = [record.data() for record in result]
+        endpoints = _jsonable(await _aread("fetch", _FETCH_QUERY, since=since, after=after, limit=limit))
     except Exception as e:
         return {"ok": False, "error": f"could not fetch endpoints ({e})"}
-    # Round-trip through json with default=str to coerce Neo4j DateTime values into
-    # JSON-native strings, so FastMCP can serialize the returned dict cleanly.
-    endpoints = json.loads(json.dumps(data, default=str))
-    return {"ok": True, "endpoints": endpoints, "count": len(endpoints), "duration_minutes": duration}
+    endpoints, next_cursor = _page(endpoints, limit, lambda r: {"since": since, "ts": r["timestamp"], "ip": r["ip_address"]})
+    return {"ok": True, "endpoints": endpoints, "count": len(endpoints), "duration_minutes": duration, "next_cursor": next_cursor}
 
 
 # The join key back to detail: every PACKET node carries the full 5-tuple as
@@ -260,14 +815,19 @@ def fetch_traffic(duration: int = 60, limit: int = 100) -> dict[str, Any]:
 # an IP; these three queries turn that IP into its profile, its peer list, and a raw
 # packet sample.
 
-# One ENDPOINT (the aggregated profile) for a specific IP — the same fields
-# fetch_traffic returns, scoped to $ip. Empty when the IP was captured but
-# compute_embeddings hasn't run yet (the peers/packets below still resolve from raw
-# PACKET nodes in that case).
+# The three inspect reads are set queries over $ips (UNWIND), so inspect_endpoints
+# resolves any number of IPs in the same three round trips inspect_endpoint uses for one.
+# Each returns `ip` to key its rows back to the requested address.
+
+# One ENDPOINT (the aggregated profile) per requested IP — the same fields fetch_traffic
+# returns. No row for an IP that was captured but compute_embeddings hasn't run yet (the
+# peers/packets below still resolve from the rollups and PACKET nodes in that case).
 _INSPECT_PROFILE_QUERY = """
-MATCH (endpoint:ENDPOINT {IP_ADDRESS: $ip})
-OPTIONAL MATCH (ip:IP_ADDRESS {IP_ADDRESS: $ip})<-[:OWNERSHIP]-(org:ORGANIZATION)
+UNWIND $ips AS target
+MATCH (endpoint:ENDPOINT {IP_ADDRESS: target})
+OPTIONAL MATCH (ip:IP_ADDRESS {IP_ADDRESS: target})<-[:OWNERSHIP]-(org:ORGANIZATION)
 RETURN
+    target AS ip,
     endpoint.IP_ADDRESS AS ip_address,
     COALESCE(endpoint.ORGANIZATION, org.ORGANIZATION) AS org,
     COALESCE(endpoint.HOSTNAME, ip.HOSTNAME) AS hostname,
@@ -283,62 +843,129 @@ RETURN
     endpoint.PROTOCOLS AS protocols,
     endpoint.INTERVAL_MEAN AS interval_mean,
     endpoint.INTERVAL_CV AS interval_cv,
+    endpoint.PERIOD AS period,
+    endpoint.PERIODICITY AS periodicity,
+    endpoint.PERIOD_PEER AS period_peer,
     endpoint.OUTLIER AS outlier,
     endpoint.TIMESTAMP AS timestamp
 """
 
-# True totals for the IP across the whole capture (NOT truncated by the peer/packet
-# limits below), so the caller knows when the returned lists are samples.
-_INSPECT_TOTALS_QUERY = """
-MATCH (p:PACKET)
-WHERE p.SRC_IP = $ip OR p.DST_IP = $ip
-RETURN count(p) AS packets,
-       count(DISTINCT CASE WHEN p.SRC_IP = $ip THEN p.DST_IP ELSE p.SRC_IP END) AS peers
-"""
-
-# The conversation breakdown: every other IP this one exchanged packets with, split by
-# direction (outbound = this IP is the source). This is the handle the profile lacks —
-# it stores OUT_PEERS as a count, never which peers. Ranked by total bytes so the
-# heaviest conversations surface first.
+# Each IP's conversations, read from its CONVERSATION rollups (one per direction per
+# peer, maintained at capture) so the cost is the IP's degree rather than its packet
+# count. `packets`/`peers` are the true totals across the whole capture (NOT truncated
+# by $peer_limit, so the caller knows when the list is a sample), from an aggregate of
+# their own. `rows` is the per-peer breakdown split by direction (outbound = this IP is
+# the source) — the handle the profile lacks, since it stores OUT_PEERS as a count, never
+# which peers. Ranked by total bytes so the heaviest conversations surface first (ties
+# by peer IP). The $peer_after keyset applies right after the per-peer aggregation, so
+# ORDER BY ... LIMIT keeps only the page (plus one row to tell whether more remain)
+# rather than collecting the IP's whole ranked peer list on every page; org/hostname are
+# looked up for the returned peers only. The subqueries aggregate, so every requested IP
+# gets exactly one row, zeros included.
 _INSPECT_PEERS_QUERY = """
-MATCH (p:PACKET)
-WHERE p.SRC_IP = $ip OR p.DST_IP = $ip
-WITH p,
-     CASE WHEN p.SRC_IP = $ip THEN p.DST_IP ELSE p.SRC_IP END AS peer,
-     (p.SRC_IP = $ip) AS outbound
-WITH peer,
-     sum(CASE WHEN outbound THEN p.SIZE ELSE 0 END) AS bytes_out,
-     sum(CASE WHEN outbound THEN 1 ELSE 0 END) AS packets_out,
-     sum(CASE WHEN NOT outbound THEN p.SIZE ELSE 0 END) AS bytes_in,
-     sum(CASE WHEN NOT outbound THEN 1 ELSE 0 END) AS packets_in,
-     collect(DISTINCT p.PROTOCOL) AS protocols,
-     collect(DISTINCT p.SRC_PORT) AS src_ports,
-     collect(DISTINCT p.DST_PORT) AS dst_ports
-OPTIONAL MATCH (peer_ip:IP_ADDRESS {IP_ADDRESS: peer})<-[:OWNERSHIP]-(peer_org:ORGANIZATION)
-RETURN peer AS peer_ip,
-       peer_org.ORGANIZATION AS peer_org,
-       peer_ip.HOSTNAME AS peer_hostname,
-       peer_ip.LOCATION AS peer_location,
-       bytes_out, packets_out, bytes_in, packets_in,
-       (bytes_out + bytes_in) AS bytes_total,
-       protocols, src_ports, dst_ports
-ORDER BY bytes_total DESC
-LIMIT $peer_limit
+UNWIND $ips AS target
+CALL {
+    WITH target
+    OPTIONAL MATCH (:IP_ADDRESS {IP_ADDRESS: target})-[c:CONVERSATION]-(peer_ip:IP_ADDRESS)
+    RETURN count(DISTINCT peer_ip) AS peers, sum(c.PACKETS) AS packets
+}
+CALL {
+    WITH target
+    MATCH (ip:IP_ADDRESS {IP_ADDRESS: target})-[c:CONVERSATION]-(peer_ip:IP_ADDRESS)
+    WITH peer_ip, c, startNode(c) = ip AS outbound
+    WITH peer_ip,
+         sum(CASE WHEN outbound THEN c.BYTES ELSE 0 END) AS bytes_out,
+         sum(CASE WHEN outbound THEN c.PACKETS ELSE 0 END) AS packets_out,
+         sum(CASE WHEN NOT outbound THEN c.BYTES ELSE 0 END) AS bytes_in,
+         sum(CASE WHEN NOT outbound THEN c.PACKETS ELSE 0 END) AS packets_in,
+         reduce(acc = [], ps IN collect(c.PROTOCOLS) | acc + ps) AS protocols,
+         reduce(acc = [], ps IN collect(c.SRC_PORTS) | acc + ps) AS src_ports,
+         reduce(acc = [], ps IN collect(c.DST_PORTS) | acc + ps) AS dst_ports
+    WITH peer_ip, bytes_out, packets_out, bytes_in, packets_in, protocols, src_ports, dst_ports,
+         bytes_out + bytes_in AS bytes_total
+    WHERE $peer_after IS NULL
+       OR bytes_total < $peer_after.bytes
+       OR (bytes_total = $peer_after.bytes AND peer_ip.IP_ADDRESS > $peer_after.ip)
+    WITH peer_ip, bytes_out, packets_out, bytes_in, packets_in, protocols, src_ports, dst_ports, bytes_total
+    ORDER BY bytes_total DESC, peer_ip.IP_ADDRESS
+    LIMIT $peer_limit + 1
+    RETURN collect({bytes_out: bytes_out, packets_out: packets_out, bytes_in: bytes_in, packets_in: packets_in,
+        bytes_total: bytes_total, protocols: protocols, src_ports: src_ports, dst_ports: dst_ports,
+        peer_ip: peer_ip.IP_ADDRESS,
+        peer_org: head([(peer_ip)<-[:OWNERSHIP]-(org:ORGANIZATION) | org.ORGANIZATION]),
+        peer_hostname: peer_ip.HOSTNAME,
+        peer_location: peer_ip.LOCATION}) AS rows
+}
+RETURN target AS ip, peers, packets, rows
 """
 
-# A raw, most-recent packet sample for the IP — for inspecting a specific conversation
-# at 5-tuple granularity once the peer breakdown points somewhere interesting.
+# A raw, most-recent packet sample per IP — for inspecting a specific conversation at
+# 5-tuple granularity once the peer breakdown points somewhere interesting. An
+# `SRC_IP = $ip OR DST_IP = $ip` filter defeats the indexes and scans every PACKET;
+# instead each direction is its own seek on the (SRC_IP|DST_IP, TIMESTAMP) indexes, cut
+# to the newest $packet_limit, and the UNION (which also drops a self-addressed packet's
+# duplicate) is cut again. Pages are keyed on (TIMESTAMP, elementId) — packets share
+# timestamps — and $packet_before is that key of the last packet already returned (a
+# far-future sentinel on the first page, so the range predicate stays an index seek).
 _INSPECT_PACKETS_QUERY = """
-MATCH (p:PACKET)
-WHERE p.SRC_IP = $ip OR p.DST_IP = $ip
-RETURN p.SRC_IP AS src_ip, p.SRC_PORT AS src_port,
-       p.DST_IP AS dst_ip, p.DST_PORT AS dst_port,
-       p.PROTOCOL AS protocol, p.SIZE AS size,
-       p.TIMESTAMP AS timestamp
-ORDER BY p.TIMESTAMP DESC
-LIMIT $packet_limit
+UNWIND $ips AS target
+CALL {
+    WITH target
+    CALL {
+        WITH target
+        MATCH (p:PACKET) WHERE p.SRC_IP = target AND p.TIMESTAMP <= datetime($packet_before.ts)
+          AND (p.TIMESTAMP < datetime($packet_before.ts) OR elementId(p) < $packet_before.id)
+        RETURN p ORDER BY p.TIMESTAMP DESC, elementId(p) DESC LIMIT $packet_limit + 1
+        UNION
+        WITH target
+        MATCH (p:PACKET) WHERE p.DST_IP = target AND p.TIMESTAMP <= datetime($packet_before.ts)
+          AND (p.TIMESTAMP < datetime($packet_before.ts) OR elementId(p) < $packet_before.id)
+        RETURN p ORDER BY p.TIMESTAMP DESC, elementId(p) DESC LIMIT $packet_limit + 1
+    }
+    WITH p ORDER BY p.TIMESTAMP DESC, elementId(p) DESC LIMIT $packet_limit + 1
+    RETURN collect(p {src_ip: p.SRC_IP, src_port: p.SRC_PORT,
+                      dst_ip: p.DST_IP, dst_port: p.DST_PORT,
+                      protocol: p.PROTOCOL, size: p.SIZE,
+                      timestamp: p.TIMESTAMP, key: elementId(p)}) AS packets
+}
+RETURN target AS ip, packets
 """
 
+# The read tools run on the async Neo4j driver, so a slow query awaits on the event loop
+# instead of blocking it — other clients' calls and the SSE heartbeat carry on. Its pool
+# is sized by NEO4J_MAX_POOL_SIZE / NEO4J_ACQUISITION_TIMEOUT (jaws.config). An async
+# driver is bound to the loop it first ran on: the server has one, and a caller that
+# runs tools on a new loop (a benchmark, say) gets a driver of its own. Each driver is
+# closed on its own loop as that loop shuts down: asyncio.run and anyio cancel every
+# pending task before closing the loop, and the driver's keeper task closes its pool
+# as it is cancelled — a later loop never inherits, or leaks, an earlier one's pool.
+_async_drivers = {}
+
+
+def _async_driver():
+    loop = asyncio.get_running_loop()
+    entry = _async_drivers.get(loop)
+    if entry is None:
+        driver = get_neo4j_async_driver()
+        entry = _async_drivers[loop] = (driver, loop.create_task(_keep_async_driver(loop, driver)))
+    return entry[0]
+
+
+async def _keep_async_driver(loop, driver):
+    try:
+        await loop.create_future()
+    finally:
+        _async_drivers.pop(loop, None)
+        await driver.close()
+
+
+async def _aread(name: str, query: str, **params) -> list[dict[str, Any]]:
+    """Every row of `query` in its own session, timed as jaws_neo4j_query_seconds{query=name}."""
+    with _QUERY_SECONDS.time(query=name):
+        async with _async_driver().session(database=DATABASE) as session:
+            result = await session.run(query, **params)
+            return await result.data()
+
 
 def _clean_ports(*port_lists) -> list[int]:
     """Merge collected SRC/DST port lists into one sorted set of real ports.
@@ -366,63 +993,275 @@ def _clean_ports(*port_lists) -> list[int]:
     "and `packets` — a most-recent raw 5-tuple packet sample. Directions are from the inspected IP's OWN "
     "perspective (outbound = this IP is the packet source): for a remote IP, its outbound bytes are what it "
     "sent TO the capture host (a host download), and its inbound bytes are what the host sent to it (outbound "
-    "from host). `peer_limit` caps the peer rows, `packet_limit` caps the packet sample. This answers 'now "
-    "show me this IP's packets and peers' without pulling and filtering the whole window client-side."
+    "from host). `peer_limit` and `packet_limit` are page sizes: when more peers or packets remain, "
+    "`peers_next_cursor` / `packets_next_cursor` are set — pass them back as `peer_cursor` / `packet_cursor` "
+    "to page through the rest (each list pages independently; totals always cover everything). This answers "
+    "'now show me this IP's packets and peers' without pulling and filtering the whole window client-side."
 ))
-def inspect_endpoint(ip_address: str, peer_limit: int = 50, packet_limit: int = 20) -> dict[str, Any]:
+@_cached
+async def inspect_endpoint(ip_address: str, peer_limit: int = 50, packet_limit: int = 20,
+                           peer_cursor: str | None = None, packet_cursor: str | None = None) -> dict[str, Any]:
+    try:
+        peer_after = _decode_cursor(peer_cursor, ("bytes", "ip"))
+        packet_before = _decode_cursor(packet_cursor, ("ts", "id"))
+    except ValueError as e:
+        return {"ok": False, "error": str(e)}
     try:
-        driver = get_neo4j_driver()
-        with driver.session(database=DATABASE) as session:
-            profile_rows = [r.data() for r in session.run(_INSPECT_PROFILE_QUERY, ip=ip_address)]
-            totals = session.run(_INSPECT_TOTALS_QUERY, ip=ip_address).single()
-            peer_rows = [r.data() for r in session.run(_INSPECT_PEERS_QUERY, ip=ip_address, peer_limit=peer_limit)]
-            packet_rows = [r.data() for r in session.run(_INSPECT_PACKETS_QUERY, ip=ip_address, packet_limit=packet_limit)]
+        payloads = await _inspect([ip_address], peer_limit, packet_limit, peer_after, packet_before)
     except Exception as e:
         return {"ok": False, "error": f"could not inspect endpoint {ip_address!r} ({e})"}
+    return {"ok": True, **payloads[ip_address]}
+
+
+# Upper bound on IPs per inspect_endpoints call; larger lists are refused, not truncated.
+INSPECT_BATCH_LIMIT = 200
+
+
+@mcp.tool(name="inspect_endpoints", description=(
+    "inspect_endpoint for MANY IPs in one call — e.g. every outlier anomaly_detection ranked. Returns "
+    "`endpoints`, a map keyed by IP whose values have exactly inspect_endpoint's per-IP shape (`found`, "
+    "`profile`, `totals`, `peers`, `packets`, ...), with `peer_limit` and `packet_limit` applied per IP. "
+    "All IPs are resolved by the same three set queries, so triaging 50 outliers costs one call rather "
+    f"than 50. Up to {INSPECT_BATCH_LIMIT} IPs per call; duplicates are folded. This returns each IP's first "
+    "page; follow its `peers_next_cursor` / `packets_next_cursor` with inspect_endpoint."
+))
+@_cached
+async def inspect_endpoints(ip_addresses: list[str], peer_limit: int = 50, packet_limit: int = 20) -> dict[str, Any]:
+    ips = list(dict.fromkeys(ip_addresses))
+    if len(ips) > INSPECT_BATCH_LIMIT:
+        return {"ok": False, "error": f"{len(ips)} IPs requested; inspect at most {INSPECT_BATCH_LIMIT} per call"}
+    try:
+        payloads = await _inspect(ips, peer_limit, packet_limit)
+    except Exception as e:
+        return {"ok": False, "error": f"could not inspect endpoints ({e})"}
+    return {"ok": True, "endpoints": payloads, "count": len(payloads)}
 
-    peers = []
-    for r in peer_rows:
-        peers.append({
-            "peer_ip": r["peer_ip"],
-            "peer_org": r["peer_org"],
-            "peer_hostname": r["peer_hostname"],
-            "peer_location": r["peer_location"],
-            "bytes_out": r["bytes_out"],
-            "packets_out": r["packets_out"],
-            "bytes_in": r["bytes_in"],
-            "packets_in": r["packets_in"],
-            "bytes_total": r["bytes_total"],
-            "protocols": sorted(p for p in (r["protocols"] or []) if p),
-            "ports": _clean_ports(r["src_ports"], r["dst_ports"]),
-        })
 
-    total_packets = totals["packets"] if totals else 0
-    total_peers = totals["peers"] if totals else 0
+_ROLLUPS_MISSING_WARNING = (
+    "This database has packets but no conversation rollups (it was captured before capture maintained "
+    "them), so `peers` and `totals` are empty. Rebuild them with `jaws-utils --rollup` on the host; the "
+    "next capture_packets or full (non-incremental) anomaly_detection run also rebuilds them."
+)
 
-    payload = {
+# The packet cursor of a first page: later than any capture, so every packet qualifies.
+_PACKETS_FROM_NEWEST = {"ts": "9999-12-31T23:59:59Z", "id": ""}
+
+
+async def _inspect(ips: list[str], peer_limit: int, packet_limit: int,
+                   peer_after: dict[str, Any] | None = None,
+                   packet_before: dict[str, Any] | None = None) -> dict[str, dict[str, Any]]:
+    """The inspect_endpoint payload (without `ok`) for each of `ips`, keyed by IP.
+
+    The three set queries are independent, so they run concurrently, each in its own
+    session: the call costs the slowest read, not the sum. Rows are keyed back to each IP.
+    `peer_after` / `packet_before` are decoded cursors, applied to every IP. A fourth,
+    constant-time read checks that the conversation rollups exist: on a database captured
+    before they did, each payload carries a `warning` instead of silently empty peers.
+    """
+    from jaws.jaws_utils import ROLLUPS_MISSING_QUERY
+    peer_limit, packet_limit = max(1, int(peer_limit)), max(1, int(packet_limit))
+    reads = await asyncio.gather(
+        _aread("inspect_profile", _INSPECT_PROFILE_QUERY, ips=ips),
+        _aread("inspect_peers", _INSPECT_PEERS_QUERY, ips=ips, peer_limit=peer_limit, peer_after=peer_after),
+        _aread("inspect_packets", _INSPECT_PACKETS_QUERY, ips=ips, packet_limit=packet_limit,
+               packet_before=packet_before or _PACKETS_FROM_NEWEST),
+        _aread("rollups_missing", ROLLUPS_MISSING_QUERY),
+    )
+    profile_rows, conversation_rows, packet_rows = [_jsonable(rows) for rows in reads[:3]]
+    rollups_missing = bool(reads[3] and reads[3][0]["missing"])
+    profiles = {}
+    for r in profile_rows:
+        profiles.setdefault(r.pop("ip"), r)
+    conversations = {r["ip"]: r for r in conversation_rows}
+    samples = {r["ip"]: r["packets"] for r in packet_rows}
+
+    payloads = {}
+    for ip in ips:
+        totals = conversations.get(ip)
+        peers = []
+        for r in (totals["rows"] if totals else []):
+            peers.append({
+                "peer_ip": r["peer_ip"],
+                "peer_org": r["peer_org"],
+                "peer_hostname": r["peer_hostname"],
+                "peer_location": r["peer_location"],
+                "bytes_out": r["bytes_out"],
+                "packets_out": r["packets_out"],
+                "bytes_in": r["bytes_in"],
+                "packets_in": r["packets_in"],
+                "bytes_total": r["bytes_total"],
+                "protocols": sorted({p for p in (r["protocols"] or []) if p}),
+                "ports": _clean_ports(r["src_ports"], r["dst_ports"]),
+            })
+        peers, peers_next = _page(peers, peer_limit, lambda r: {"bytes": r["bytes_total"], "ip": r["peer_ip"]})
+        packets, packets_next = _page(samples.get(ip, []), packet_limit, lambda r: {"ts": r["timestamp"], "id": r["key"]})
+        for packet in packets:
+            del packet["key"]
+        total_packets = totals["packets"] if totals else 0
+        total_peers = totals["peers"] if totals else 0
+        payloads[ip] = {
+            "ip_address": ip,
+            # True if the IP appears anywhere in the capture (raw packets) or as a profile.
+            "found": bool(total_packets > 0 or packets or ip in profiles),
+            "profile": profiles.get(ip),
+            "totals": {"packets": total_packets, "peers": total_peers},
+            "peers": peers,
+            "peers_returned": len(peers),
+            "peers_next_cursor": peers_next,
+            "packets": packets,
+            "packets_returned": len(packets),
+            "packets_next_cursor": packets_next,
+        }
+        if rollups_missing:
+            payloads[ip]["warning"] = _ROLLUPS_MISSING_WARNING
+    return payloads
+
+
+# Indexed k-NN over endpoint embeddings. The target's own vector is the query, so the
+# lookup needs no client-side embedding; k+1 neighbors are requested because the target
+# is its own nearest neighbor and is filtered out. Neo4j's cosine score is (1 + cos) / 2,
+# returned as `similarity`; `distance` restates it as cosine distance (1 - cos).
+_SIMILAR_TARGET_QUERY = """
+MATCH (endpoint:ENDPOINT {IP_ADDRESS: $ip})
+RETURN endpoint.EMBEDDING IS NOT NULL AS embedded
+"""
+
+_SIMILAR_QUERY = """
+MATCH (target:ENDPOINT {IP_ADDRESS: $ip})
+WHERE target.EMBEDDING IS NOT NULL
+CALL db.index.vector.queryNodes($index, $k + 1, target.EMBEDDING)
+YIELD node AS endpoint, score
+WHERE endpoint <> target
+OPTIONAL MATCH (ip:IP_ADDRESS {IP_ADDRESS: endpoint.IP_ADDRESS})<-[:OWNERSHIP]-(org:ORGANIZATION)
+RETURN
+    endpoint.IP_ADDRESS AS ip_address,
+    COALESCE(endpoint.ORGANIZATION, org.ORGANIZATION) AS org,
+    COALESCE(endpoint.HOSTNAME, ip.HOSTNAME) AS hostname,
+    COALESCE(endpoint.LOCATION, ip.LOCATION) AS location,
+    endpoint.BYTES_OUT AS bytes_out,
+    endpoint.PACKETS_OUT AS packets_out,
+    endpoint.OUT_PEERS AS out_peers,
+    endpoint.OUT_PORTS AS out_ports,
+    endpoint.BYTES_IN AS bytes_in,
+    endpoint.PACKETS_IN AS packets_in,
+    endpoint.IN_PEERS AS in_peers,
+    endpoint.IN_PORTS AS in_ports,
+    endpoint.PROTOCOLS AS protocols,
+    endpoint.INTERVAL_MEAN AS interval_mean,
+    endpoint.INTERVAL_CV AS interval_cv,
+    endpoint.PERIOD AS period,
+    endpoint.PERIODICITY AS periodicity,
+    endpoint.PERIOD_PEER AS period_peer,
+    endpoint.OUTLIER AS outlier,
+    endpoint.TIMESTAMP AS timestamp,
+    score AS similarity
+ORDER BY similarity DESC
+LIMIT $k
+"""
+
+# Upper bound on neighbors per similar_endpoints call; a larger k is clamped to it.
+SIMILAR_K_LIMIT = 100
+
+
+@mcp.tool(name="similar_endpoints", description=(
+    "Find the `k` IPs whose endpoint embeddings are nearest to ONE IP's — 'which other hosts behave like "
+    "this outlier'. Uses the Neo4j vector index on the endpoint embeddings, so it answers without pulling "
+    "every vector. Returns `neighbors`, nearest first, each with the neighbor's full endpoint profile (same "
+    "fields as fetch_traffic), `similarity` (Neo4j cosine score, 1 = identical) and `distance` (cosine "
+    f"distance, 0 = identical); `k` is capped at {SIMILAR_K_LIMIT}. `found` is false when the IP has no "
+    "endpoint profile, `embedded` is false when it has one but no embedding yet (run compute_embeddings). "
+    "Neighbors are only as comparable as their embeddings: mixing embedding backends across runs makes "
+    "distances meaningless."
+))
+@_cached
+async def similar_endpoints(ip_address: str, k: int = 10) -> dict[str, Any]:
+    k = max(1, min(int(k), SIMILAR_K_LIMIT))
+    try:
+        # The k-NN query needs the target's embedding, so the two reads run in order.
+        targets = await _aread("similar_target", _SIMILAR_TARGET_QUERY, ip=ip_address)
+        target = targets[0] if targets else None
+        rows = []
+        if target and target["embedded"]:
+            rows = await _aread("similar", _SIMILAR_QUERY, ip=ip_address, k=k, index=ENDPOINT_EMBEDDING_INDEX)
+    except Exception as e:
+        return {"ok": False, "error": f"could not find endpoints similar to {ip_address!r} ({e})"}
+
+    neighbors = []
+    for r in _jsonable(rows):
+        similarity = float(r.pop("similarity"))
+        neighbors.append({
+            **r,
+            "similarity": round(similarity, 6),
+            "distance": round(2.0 * (1.0 - similarity), 6),
+        })
+
+    return {
+        "ok": True,
         "ip_address": ip_address,
-        # True if the IP appears anywhere in the capture (raw packets) or as a profile.
-        "found": bool(total_packets > 0 or profile_rows),
-        "profile": profile_rows[0] if profile_rows else None,
-        "totals": {"packets": total_packets, "peers": total_peers},
-        "peers": peers,
-        "peers_returned": len(peers),
-        "packets": packet_rows,
-        "packets_returned": len(packet_rows),
+        "found": target is not None,
+        "embedded": bool(target and target["embedded"]),
+        "k": k,
+        "neighbors": neighbors,
+        "neighbors_returned": len(neighbors),
     }
-    # Coerce Neo4j DateTime values (in profile.timestamp and each packet) to strings so
-    # FastMCP can serialize the dict cleanly, matching fetch_traffic.
-    payload = json.loads(json.dumps(payload, default=str))
-    return {"ok": True, **payload}
+
+
+@mcp.tool(name="scheduler_status", description=(
+    "What the pipeline tools are doing right now: `running` calls (tool, read/write mode, seconds running) "
+    "and the `queued` ones in order, each with its `position` and what it is `waiting_for` — a database write "
+    "lock, its tool's concurrency limit (`limits`), or a free worker (`max_running`). Pipeline calls that "
+    "would collide (two writers on the database, or a second compute/detection run) wait their turn here "
+    "instead of thrashing each other; fetch_traffic, inspect_endpoint(s) and similar_endpoints are never "
+    "queued."
+))
+def scheduler_status() -> dict[str, Any]:
+    return {"ok": True, **_scheduler.snapshot()}
+
+
+@mcp.tool(name="cache_stats", description=(
+    "Hit rate and size of the server's read-through cache for fetch_traffic, inspect_endpoint, "
+    "inspect_endpoints and similar_endpoints. Results are cached per tool and arguments and invalidated whenever a pipeline "
+    "step writes to the graph (`invalidated_by_writes`) or after `ttl_seconds`."
+))
+def cache_stats() -> dict[str, Any]:
+    return {"ok": True, **_cache.stats()}
+
+
+def _metrics_text() -> str:
+    cache = _cache.stats()
+    for stat in ("entries", "hits", "misses", "invalidated_by_writes", "expired", "evictions"):
+        _CACHE_STATS.set(cache[stat], stat=stat)
+    scheduler = _scheduler.snapshot()
+    _SCHEDULED_CALLS.set(len(scheduler["running"]), state="running")
+    _SCHEDULED_CALLS.set(len(scheduler["queued"]), state="queued")
+    return _metrics.render()
+
+
+@mcp.custom_route("/metrics", methods=["GET"])
+async def metrics_route(request: Request) -> PlainTextResponse:
+    return PlainTextResponse(_metrics_text(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@mcp.tool(name="metrics", description=(
+    "The server's Prometheus metrics as exposition text (the same as GET /metrics on the HTTP transport): "
+    "per-tool call counts and latency histograms, pipeline script and run_pipeline stage durations, "
+    "scheduler queue waits, Neo4j timings of the fetch/inspect/similar queries, and running totals of the "
+    "counts each pipeline result reported (packets captured, endpoints embedded, outliers flagged, ...)."
+))
+def metrics() -> dict[str, Any]:
+    return {"ok": True, "content_type": "text/plain; version=0.0.4", "metrics": _metrics_text()}
 
 
 def main():
+    global ISOLATION
     import argparse
     parser = argparse.ArgumentParser()
     parser.add_argument("--stdio", action="store_true", help="Serve over stdio (for MCP clients that spawn the server) instead of the default SSE HTTP server.")
     parser.add_argument("--host", default="0.0.0.0")
     parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--isolation", choices=["inprocess", "subprocess"], default=ISOLATION, help="Run pipeline tools inside the server (shared driver, warm imports) or as one subprocess per call (default: JAWS_MCP_ISOLATION, else inprocess).")
     args = parser.parse_args()
+    ISOLATION = args.isolation
 
     if args.stdio:
         mcp.run(transport="stdio")
@@ -0,0 +1,84 @@
+"""Fit/score time and DBSCAN agreement of the jaws-finder detectors on synthetic endpoints.
+
+Run from an environment with the package installed (pip install -e .):
+
+    python benchmarks/bench_detectors.py --sizes 1000,10000,100000,1000000
+
+Each synthetic set mimics the finder's feature matrix: a few text PCA components plus
+the standardized behavioral block, drawn as dense Gaussian "host populations" with a
+small share of planted outliers scattered uniformly around them. For every size and
+detector it reports the wall time of fit_predict, how many endpoints were flagged,
+recall of the planted outliers, and the Jaccard overlap of the flagged set with
+DBSCAN's. A detector whose run exceeds --budget seconds is skipped at larger sizes.
+"""
+import argparse
+import time
+import numpy as np
+from jaws.detectors import DETECTORS, DEFAULT_DETECTOR, make_detector
+from jaws.jaws_finder import NUMERIC_FEATURE_COUNT
+
+
+COMPONENTS = 2
+POPULATIONS = 8
+OUTLIER_FRACTION = 0.01
+
+
+def synthetic_endpoints(n, seed=0):
+    """(features, planted): n rows of components + numeric features and the planted outlier mask."""
+    rng = np.random.default_rng(seed)
+    dims = COMPONENTS + NUMERIC_FEATURE_COUNT
+    centers = rng.normal(scale=4.0, size=(POPULATIONS, dims))
+    n_outliers = max(1, int(n * OUTLIER_FRACTION))
+    members = rng.integers(POPULATIONS, size=n - n_outliers)
+    inliers = centers[members] + rng.normal(scale=0.5, size=(len(members), dims))
+    low, high = centers.min(axis=0) - 4.0, centers.max(axis=0) + 4.0
+    outliers = rng.uniform(low, high, size=(n_outliers, dims))
+    features = np.vstack([inliers, outliers])
+    planted = np.zeros(n, dtype=bool)
+    planted[-n_outliers:] = True
+    order = rng.permutation(n)
+    return features[order], planted[order]
+
+
+def _jaccard(a, b):
+    union = np.count_nonzero(a | b)
+    return float(np.count_nonzero(a & b) / union) if union else 1.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the jaws-finder outlier detectors on synthetic endpoint sets.")
+    parser.add_argument("--sizes", default="1000,10000,100000,1000000", help="Comma-separated endpoint counts (default: 1k to 1M).")
+    parser.add_argument("--detectors", default=",".join(DETECTORS), help=f"Comma-separated detectors (default: {','.join(DETECTORS)}).")
+    parser.add_argument("--budget", type=float, default=300.0, help="Skip a detector at larger sizes once one run takes longer than this many seconds (default: 300).")
+    args = parser.parse_args()
+    sizes = [int(float(s)) for s in args.sizes.split(",")]
+    names = [d.strip() for d in args.detectors.split(",")]
+    # DBSCAN runs first at every size: the others are compared against its flags.
+    names = [DEFAULT_DETECTOR] + [d for d in names if d != DEFAULT_DETECTOR]
+    min_samples = 2 * COMPONENTS
+
+    print(f"{'rows':>9}  {'detector':<17}{'seconds':>9}{'flagged':>9}{'recall':>8}{'vs dbscan':>11}")
+    over_budget = set()
+    for n in sizes:
+        features, planted = synthetic_endpoints(n)
+        reference = None
+        for name in names:
+            if name in over_budget:
+                print(f"{n:>9}  {name:<17}{'skipped':>9}")
+                continue
+            detector = make_detector(name, min_samples)
+            start = time.perf_counter()
+            labels, _ = detector.fit_predict(features)
+            seconds = time.perf_counter() - start
+            flagged = labels == -1
+            if name == DEFAULT_DETECTOR:
+                reference = flagged
+            recall = np.count_nonzero(flagged & planted) / np.count_nonzero(planted)
+            agreement = _jaccard(flagged, reference) if reference is not None else float("nan")
+            print(f"{n:>9}  {name:<17}{seconds:>9.2f}{np.count_nonzero(flagged):>9}{recall:>8.2f}{agreement:>11.2f}")
+            if seconds > args.budget:
+                over_budget.add(name)
+
+
+if __name__ == "__main__":
+    main()
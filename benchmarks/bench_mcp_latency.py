@@ -0,0 +1,56 @@
+"""Per-call latency of MCP pipeline tools, in-process vs one subprocess per call.
+
+Run from an environment with the package installed (pip install -e .) and, for
+tools that read the graph, Neo4j reachable via NEO4J_URI / NEO4J_USERNAME / NEO4J_PASSWORD:
+
+    python benchmarks/bench_mcp_latency.py --tool list_interfaces --calls 10
+    python benchmarks/bench_mcp_latency.py --tool anomaly_detection --args '{"detector": "isolation-forest"}'
+
+Both modes call the same tool function from MCP/server.py; only JAWS_MCP_ISOLATION
+differs. Pipeline tools are called through their scheduled `.run` (the scheduler is
+idle, so it adds only admission); the async read tools are awaited on one event loop,
+as the server runs them. The first in-process call pays the imports and the driver
+handshake once, so it is reported separately from the warm calls that follow.
+"""
+import argparse
+import asyncio
+import inspect
+import json
+import statistics
+import time
+from MCP import server
+
+
+async def time_calls(tool, kwargs, calls):
+    seconds = []
+    ok = True
+    for _ in range(calls):
+        start = time.perf_counter()
+        result = tool(**kwargs)
+        if inspect.isawaitable(result):
+            result = await result
+        seconds.append(time.perf_counter() - start)
+        ok = ok and bool(result.get("ok"))
+    return seconds, ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare MCP tool-call latency in-process vs subprocess.")
+    parser.add_argument("--tool", default="list_interfaces", help="MCP tool function to call (default: list_interfaces).")
+    parser.add_argument("--args", default="{}", help="Tool keyword arguments as a JSON object (default: {}).")
+    parser.add_argument("--calls", type=int, default=10, help="Calls per mode (default: 10).")
+    args = parser.parse_args()
+    tool = getattr(server, args.tool)
+    tool = getattr(tool, "run", tool)
+    kwargs = json.loads(args.args)
+
+    print(f"{'mode':<11}{'first':>9}{'median':>9}{'min':>9}{'ok':>5}")
+    for mode in ("subprocess", "inprocess"):
+        server.ISOLATION = mode
+        seconds, ok = asyncio.run(time_calls(tool, kwargs, args.calls))
+        warm = seconds[1:] or seconds
+        print(f"{mode:<11}{seconds[0]:>9.3f}{statistics.median(warm):>9.3f}{min(warm):>9.3f}{str(ok):>5}")
+
+
+if __name__ == "__main__":
+    main()
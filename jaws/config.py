@@ -1,9 +1,10 @@
 import os
 import sys
+import tempfile
 from functools import lru_cache
 from rich.console import Console
 from openai import OpenAI
-from neo4j import GraphDatabase
+from neo4j import AsyncGraphDatabase, GraphDatabase
 
 
 # Used for the message panels below.
@@ -21,6 +22,11 @@ DATABASE = "captures" # Created using the Neo4j Desktop app. Default is 'capture
 NEO4J_URI = os.getenv("NEO4J_URI") # See README.md
 NEO4J_USERNAME = os.getenv("NEO4J_USERNAME") # See README.md
 NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD") # See README.md
+# Connection pool of each driver: the most connections it opens, and how long a session
+# waits for a free one (seconds) before failing. The MCP server's concurrent read tools
+# draw on the pool of its async driver. Defaults are the Neo4j driver's own.
+NEO4J_MAX_POOL_SIZE = int(os.getenv("NEO4J_MAX_POOL_SIZE", "100"))
+NEO4J_ACQUISITION_TIMEOUT = float(os.getenv("NEO4J_ACQUISITION_TIMEOUT", "60"))
 
 
 # The OpenAI client and Neo4j driver are created lazily so that importing this
@@ -30,7 +36,17 @@ NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD") # See README.md
 # each a process-wide singleton, matching the previous module-level behavior.
 @lru_cache(maxsize=1)
 def get_neo4j_driver():
-    return GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USERNAME, NEO4J_PASSWORD))
+    return GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USERNAME, NEO4J_PASSWORD),
+                                max_connection_pool_size=NEO4J_MAX_POOL_SIZE,
+                                connection_acquisition_timeout=NEO4J_ACQUISITION_TIMEOUT)
+
+
+# Not cached: an async driver belongs to the event loop it is first used on, so its
+# owner (the MCP server) keeps one per loop.
+def get_neo4j_async_driver():
+    return AsyncGraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USERNAME, NEO4J_PASSWORD),
+                                     max_connection_pool_size=NEO4J_MAX_POOL_SIZE,
+                                     connection_acquisition_timeout=NEO4J_ACQUISITION_TIMEOUT)
 
 
 @lru_cache(maxsize=1)
@@ -60,5 +76,37 @@ PACKET_MODELS = {
 }
 DEFAULT_PACKET_MODEL = "jina-code"
 
+# Model-free embedding backend (jaws-compute --api hashing): word uni/bigrams of each
+# endpoint description are hashed into a sparse HASHING_FEATURES-wide TF-IDF vector and
+# reduced to HASHING_EMBEDDING_DIM dense components with randomized truncated SVD, fit on
+# at most HASHING_SVD_SAMPLE endpoints. No download, no GPU — it trades the transformer's
+# semantic nuance for speed on edge hardware.
+HASHING_FEATURES = 2 ** 18
+HASHING_EMBEDDING_DIM = 256
+HASHING_SVD_SAMPLE = 2048
+# The model name the hashing backend records. Its SVD basis is refit by every compute
+# run, so a saved finder baseline can never score its vectors (see jaws-finder --score).
+HASHING_MODEL_NAME = f"hashing-tfidf-svd{HASHING_EMBEDDING_DIM}"
+
+# Neo4j vector index over ENDPOINT.EMBEDDING (created by initialize_schema), queried by
+# the MCP's similar_endpoints tool for indexed k-NN lookups instead of pulling every
+# vector. No fixed dimension is configured, so one index serves every embedding backend
+# (768-dim local models, 3072-dim OpenAI); cosine matches the L2-normalized embeddings.
+ENDPOINT_EMBEDDING_INDEX = "endpoint_embedding_index"
+
 # Saves plots to this location.
 FINDER_ENDPOINT = os.getenv("JAWS_FINDER_ENDPOINT")
+
+# Persistent on-disk artifacts (e.g. the finder's fitted baseline), one subdirectory per
+# database. Falls back to a temp dir, like the plot endpoint, when JAWS_DATA_DIR is unset.
+DATA_DIR = os.getenv("JAWS_DATA_DIR") or os.path.join(tempfile.gettempdir(), "jaws")
+
+# jaws-finder fits PCA in memory while the embedding matrix (as float64) is estimated
+# below this many MB; above it, IncrementalPCA streams the matrix in chunks of about
+# PCA_CHUNK_MB, bounding peak memory by the chunk instead of the endpoint count.
+PCA_MEMORY_LIMIT_MB = float(os.getenv("JAWS_PCA_MEMORY_LIMIT_MB", "2048"))
+PCA_CHUNK_MB = float(os.getenv("JAWS_PCA_CHUNK_MB", "64"))
+
+# jaws-finder --score refits its baseline once it is older than this many hours, so a
+# scheduled --score run doubles as the scheduled refit.
+BASELINE_MAX_AGE_HOURS = float(os.getenv("JAWS_BASELINE_MAX_AGE_HOURS", "24"))
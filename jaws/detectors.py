@@ -0,0 +1,316 @@
+import os
+import multiprocessing
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from scipy.sparse import csr_matrix
+from sklearn.cluster import DBSCAN, HDBSCAN
+from sklearn.ensemble import IsolationForest
+from sklearn.metrics import silhouette_score
+from sklearn.neighbors import NearestNeighbors, LocalOutlierFactor
+
+
+# Outlier detectors for jaws-finder. Every detector takes the finder's feature matrix
+# (text PCA components blended with the behavioral block) and returns the same pair:
+# `labels`, one per endpoint with -1 marking an outlier (cluster ids otherwise, or 0 for
+# detectors that don't cluster), and `scores`, a continuous anomaly score where higher is
+# more anomalous. is_outlier and detector_score in the finder's ranking come from these,
+# whichever detector produced them. DBSCAN is the default and the only one the saved
+# baseline (--fit / --score), --ablate and --sweep understand — they reason about eps.
+
+
+# Neighbors kept per endpoint in the shared k-NN graph (beyond the min_samples - 1 the
+# k-distance needs). The DBSCAN outlier verdict is exact for any eps as long as every
+# endpoint keeps at least min_samples - 1 neighbors: a non-core point has fewer than that
+# within eps, so its row holds all of them, and symmetrizing puts it in each core's row.
+# The extra neighbors only keep dense clusters from splitting into several cluster ids.
+NEIGHBOR_GRAPH_K = 16
+
+
+def build_neighbor_graph(features, min_samples):
+    """One k-NN pass feeding both the k-distance knee and DBSCAN.
+
+    Returns (graph, k_distances): `graph` is a symmetric sparse distance matrix (CSR,
+    rows sorted by distance, explicit zeros kept for duplicate endpoints) ready for
+    DBSCAN(metric='precomputed'), and `k_distances` is each endpoint's distance to its
+    (min_samples - 1)-th other neighbor — the same k-distance as fitting
+    NearestNeighbors(n_neighbors=min_samples) with the point itself counted first, which
+    is also how DBSCAN counts min_samples. Re-clustering the graph at a different eps
+    needs no further neighbor search.
+    """
+    n = len(features)
+    k = min(n - 1, max(min_samples - 1, NEIGHBOR_GRAPH_K))
+    distances, indices = NearestNeighbors(n_neighbors=k).fit(features).kneighbors()
+    k_distances = distances[:, min(min_samples - 1, k) - 1]
+
+    # Symmetrize: keep each directed edge and its reverse, de-duplicated by (row, col),
+    # then order every row by distance so the precomputed input needs no re-sorting.
+    rows = np.concatenate([np.repeat(np.arange(n), k), indices.ravel()])
+    cols = np.concatenate([indices.ravel(), np.repeat(np.arange(n), k)])
+    dists = np.concatenate([distances.ravel(), distances.ravel()])
+    _, unique = np.unique(rows * n + cols, return_index=True)
+    rows, cols, dists = rows[unique], cols[unique], dists[unique]
+    order = np.lexsort((dists, rows))
+    rows, cols, dists = rows[order], cols[order], dists[order]
+    indptr = np.concatenate([[0], np.cumsum(np.bincount(rows, minlength=n))])
+    graph = csr_matrix((dists, cols, indptr), shape=(n, n))
+    return graph, k_distances
+
+
+def cluster_neighbor_graph(graph, eps, min_samples):
+    """DBSCAN labels from a precomputed neighbor graph (see build_neighbor_graph)."""
+    return DBSCAN(eps=eps, min_samples=min_samples, metric="precomputed").fit_predict(graph)
+
+
+def recommend_eps(sorted_k_distances):
+    """Knee-recommended DBSCAN eps from a sorted k-distance curve, with a median fallback.
+
+    The same auto-eps procedure jaws-finder's main() uses, shared so the ablation and
+    sweep tune each space by an identical rule (a fixed eps is meaningless across
+    spaces of different scale/dimensionality). Returns (eps, knee_index); knee_index is
+    None when no knee was found and the median was used.
+    """
+    # kneed is only needed when eps is auto-recommended, so it is imported here.
+    from kneed import KneeLocator
+    kneedle = KneeLocator(range(len(sorted_k_distances)), sorted_k_distances,
+                          curve='convex', direction='increasing')
+    if kneedle.knee is not None:
+        knee_index = int(kneedle.knee)
+        return float(sorted_k_distances[knee_index]), knee_index
+    return float(np.median(sorted_k_distances)), None
+
+
+def dbscan_core_mask(graph, eps, min_samples):
+    """DBSCAN core points of a neighbor graph at eps (the point itself counts toward min_samples)."""
+    within = csr_matrix((graph.data <= eps, graph.indices, graph.indptr), shape=graph.shape)
+    return np.asarray(within.sum(axis=1)).ravel() + 1 >= min_samples
+
+
+class Detector(ABC):
+    """Base detector: fit_predict(features) -> (labels, scores). See the module comment."""
+    name = None
+
+    def __init__(self, min_samples):
+        self.min_samples = min_samples
+
+    @abstractmethod
+    def fit_predict(self, features):
+        """(labels, scores) for every row of `features`."""
+
+    def params(self):
+        """The settings the run used, reported alongside its result."""
+        return {"min_samples": self.min_samples}
+
+
+class DBSCANDetector(Detector):
+    """DBSCAN over the shared k-NN graph, eps from the k-distance knee unless given.
+
+    Split into fit (the neighbor search), recommend (the knee) and predict (clustering at
+    an eps) so the finder can show the k-distance curve and prompt for eps in between;
+    fit_predict runs all three. The score is an endpoint's k-distance over eps — above 1
+    it has too few neighbors within eps to be a core point.
+    """
+    name = "dbscan"
+
+    def __init__(self, min_samples, eps=None):
+        super().__init__(min_samples)
+        self.eps = eps
+        self.knee_index = None
+        self.graph = None
+        self.k_distances = None
+
+    def fit(self, features):
+        self.graph, self.k_distances = build_neighbor_graph(features, self.min_samples)
+        return self
+
+    def recommend(self):
+        return recommend_eps(np.sort(self.k_distances))
+
+    def predict(self, eps=None):
+        if eps is not None:
+            self.eps = eps
+        if self.eps is None:
+            self.eps, self.knee_index = self.recommend()
+        labels = cluster_neighbor_graph(self.graph, self.eps, self.min_samples)
+        scores = self.k_distances / self.eps if self.eps > 0 else np.full(len(labels), np.inf)
+        return labels, scores
+
+    def fit_predict(self, features):
+        return self.fit(features).predict()
+
+    def params(self):
+        return {"min_samples": self.min_samples, "eps": None if self.eps is None else round(float(self.eps), 4)}
+
+
+class HDBSCANDetector(Detector):
+    """HDBSCAN: DBSCAN over every eps at once, keeping the most persistent clusters.
+
+    No eps to tune, which is what the finder's eps-retry advice exists for. The score is
+    1 - cluster membership probability, so every noise point scores 1.0 and ties there;
+    the robust-z anomaly_score still orders them.
+    """
+    name = "hdbscan"
+
+    def fit_predict(self, features):
+        model = HDBSCAN(min_cluster_size=self.min_samples, min_samples=self.min_samples, copy=True)
+        labels = model.fit_predict(features)
+        return labels, 1.0 - model.probabilities_
+
+
+class IsolationForestDetector(Detector):
+    """Isolation forest: endpoints that random axis-aligned splits isolate quickly.
+
+    Linear in the endpoint count with no neighbor search, so it stays fast on captures
+    far past where the k-NN based detectors slow down. The score is the forest's
+    anomaly score. sklearn's default cut (score above 0.5) flags roughly a tenth of a
+    clustered capture, so an endpoint is flagged only when its score sits CUT_ROBUST_Z
+    robust deviations above the population's — a cut that adapts to the capture
+    rather than a fixed contamination share.
+    """
+    name = "isolation-forest"
+    N_ESTIMATORS = 100
+    CUT_ROBUST_Z = 3.0
+
+    def fit_predict(self, features):
+        model = IsolationForest(n_estimators=self.N_ESTIMATORS, random_state=0, n_jobs=-1).fit(features)
+        scores = -model.score_samples(features)
+        median = np.median(scores)
+        scale = 1.4826 * np.median(np.abs(scores - median))
+        flags = scores > median + self.CUT_ROBUST_Z * (scale if scale > 1e-9 else scores.std())
+        return np.where(flags, -1, 0), scores
+
+    def params(self):
+        return {"min_samples": self.min_samples, "n_estimators": self.N_ESTIMATORS}
+
+
+class LOFDetector(Detector):
+    """Local outlier factor: density relative to the endpoint's own neighbors.
+
+    Catches endpoints that are sparse next to a dense cluster even when they sit within
+    a global eps. The score is the LOF itself (about 1 for inliers, higher is sparser).
+    """
+    name = "lof"
+    MIN_NEIGHBORS = 20
+
+    def __init__(self, min_samples):
+        super().__init__(min_samples)
+        self.n_neighbors = None  # set by fit_predict, clamped to the endpoint count
+
+    def fit_predict(self, features):
+        self.n_neighbors = min(len(features) - 1, max(self.min_samples, self.MIN_NEIGHBORS))
+        model = LocalOutlierFactor(n_neighbors=self.n_neighbors, contamination="auto", n_jobs=-1)
+        flags = model.fit_predict(features)
+        return np.where(flags == -1, -1, 0), -model.negative_outlier_factor_
+
+    def params(self):
+        return {"min_samples": self.min_samples, "n_neighbors": self.n_neighbors}
+
+
+DETECTORS = {cls.name: cls for cls in (DBSCANDetector, HDBSCANDetector, IsolationForestDetector, LOFDetector)}
+DEFAULT_DETECTOR = DBSCANDetector.name
+
+
+def make_detector(name, min_samples, eps=None):
+    """A detector by name; eps applies to DBSCAN only."""
+    if name == DBSCANDetector.name:
+        return DBSCANDetector(min_samples, eps)
+    return DETECTORS[name](min_samples)
+
+
+# Silhouette is O(n^2) in the clustered points; above this many it is estimated on a
+# fixed-seed random sample of them, which is ample for comparing conditions or settings.
+SILHOUETTE_SAMPLE = 5000
+
+
+def clustered_silhouette(features, labels):
+    """Silhouette of the clustered (non-noise) points, or None when it is undefined.
+
+    Silhouette needs >= 2 clusters and more clustered points than clusters; noise is
+    excluded so the score rates the clusters DBSCAN formed, not the outliers it left out.
+    """
+    clustered = labels != -1
+    n_clusters = len(set(labels[clustered]))
+    if n_clusters < 2 or clustered.sum() <= n_clusters:
+        return None
+    try:
+        sample = SILHOUETTE_SAMPLE if clustered.sum() > SILHOUETTE_SAMPLE else None
+        return float(silhouette_score(features[clustered], labels[clustered], sample_size=sample, random_state=0))
+    except ValueError:
+        return None
+
+
+# The finder's --ablate and --sweep fan independent clustering tasks out to a process
+# pool. The workers live here, not in jaws_finder, because a spawned worker imports the
+# module its task function comes from: this one needs only numpy/scipy/sklearn, where
+# the finder pulls in the database and reporting stack. Even so a spawned worker costs
+# about a second to start, while a task over a few thousand endpoints clusters in tens
+# of milliseconds — so the pool is only used once the tasks hold POOL_MIN_ROWS feature
+# rows between them (several seconds of clustering run in order); below that, or with
+# one worker, they run in order in this process.
+POOL_MIN_ROWS = 100_000
+
+
+def process_pool(workers):
+    """A process pool that is safe to start from threaded hosts (e.g. the MCP server).
+
+    'spawn' avoids forking a process that holds driver/BLAS threads; tasks must be
+    top-level functions of importable modules.
+    """
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+def map_tasks(worker, tasks, workers=None):
+    """[worker(*task) for task in tasks], in a process pool when the work repays one.
+
+    Each task's first argument is its feature matrix; their row total is the size test
+    (see POOL_MIN_ROWS). `workers` defaults to the CPU count.
+    """
+    workers = min(len(tasks), workers or os.cpu_count() or 1)
+    if workers > 1 and sum(len(task[0]) for task in tasks) >= POOL_MIN_ROWS:
+        with process_pool(workers) as pool:
+            return list(pool.map(worker, *zip(*tasks)))
+    return [worker(*task) for task in tasks]
+
+
+def ablation_condition(features, min_samples):
+    """Ablation worker: cluster one condition's space (or a subsample of it) by the shared rule."""
+    graph, k_distances = build_neighbor_graph(features, min_samples)
+    eps, _ = recommend_eps(np.sort(k_distances))
+    labels = cluster_neighbor_graph(graph, eps, min_samples)
+    clustered = labels != -1
+    return {
+        "eps": eps,
+        "clusters": int(len(set(labels[clustered]))),
+        "outlier_indices": np.flatnonzero(~clustered),
+        "silhouette": clustered_silhouette(features, labels),
+    }
+
+
+def sweep_space(features, min_samples, eps_values, eps_scales):
+    """Sweep worker: cluster one (components, feature_weight) space at every eps.
+
+    Builds the space's neighbor graph once and re-clusters it per eps (cheap — see
+    build_neighbor_graph). `eps_values` None means `eps_scales` × the space's own knee
+    eps. Returns (knee_eps, cells); each cell carries the outlier indices so the caller
+    can measure stability across neighboring cells.
+    """
+    graph, k_distances = build_neighbor_graph(features, min_samples)
+    knee_eps, _ = recommend_eps(np.sort(k_distances))
+    if eps_values is None:
+        grid = [(knee_eps * scale, scale) for scale in eps_scales]
+    else:
+        grid = [(eps, None) for eps in eps_values]
+    cells = []
+    for eps, scale in grid:
+        labels = cluster_neighbor_graph(graph, eps, min_samples)
+        clustered = labels != -1
+        sil = clustered_silhouette(features, labels)
+        cells.append({
+            "eps": round(float(eps), 4),
+            "eps_scale": scale,
+            "clusters": int(len(set(labels[clustered]))),
+            "outliers": int((~clustered).sum()),
+            "silhouette": round(sil, 4) if sil is not None else None,
+            "outlier_indices": np.flatnonzero(~clustered),
+        })
+    return knee_eps, cells
@@ -0,0 +1,124 @@
+import os
+import json
+import glob
+import hashlib
+from datetime import datetime, timezone
+import numpy as np
+from jaws.config import DATA_DIR
+
+
+# Local sidecar of the endpoint embeddings, written by jaws-compute next to the graph
+# copy so jaws-finder can memory-map one contiguous float32 matrix instead of pulling
+# N × dim floats through Bolt on every run. Each write is a new generation: a matrix
+# (embeddings-<gen>.npy), an IP index (ips-<gen>.json, row order plus each row's content
+# hash) and a manifest naming them, swapped in last so a reader never sees a torn set.
+# The graph stays the source of truth: every ENDPOINT carries EMBEDDING_HASH, and the
+# finder uses a sidecar row only when its IP and hash still match the graph's.
+STORE_VERSION = 1
+STORE_SUBDIR = "embeddings"
+MANIFEST_FILE = "manifest.json"
+
+
+class StoreRows:
+    """Selected rows of the memory-mapped sidecar matrix, read from disk only on demand.
+
+    The finder's embedding matrix when the sidecar is fresh but the fetched endpoints are
+    a subset or reordering of its rows. Indexing by rows (a slice, index array or mask)
+    returns another view, so chunked readers such as the out-of-core PCA pull one block
+    at a time; np.asarray(view) gathers everything into memory.
+    """
+
+    def __init__(self, matrix, rows):
+        self.matrix = matrix
+        self.rows = rows
+
+    @property
+    def shape(self):
+        return (len(self.rows), self.matrix.shape[1])
+
+    @property
+    def dtype(self):
+        return self.matrix.dtype
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __getitem__(self, index):
+        if isinstance(index, tuple):
+            return np.asarray(self)[index]
+        return StoreRows(self.matrix, self.rows[index])
+
+    def __array__(self, dtype=None, copy=None):
+        block = self.matrix[self.rows]
+        return block if dtype is None else block.astype(dtype, copy=False)
+
+
+def store_dir(database):
+    return os.path.join(DATA_DIR, database, STORE_SUBDIR)
+
+
+def embedding_hash(vector):
+    """Content hash of one embedding, over its float32 bytes (matches the sidecar's dtype)."""
+    return hashlib.blake2b(np.asarray(vector, dtype=np.float32).tobytes(), digest_size=8).hexdigest()
+
+
+def save_embedding_store(database, ips, embeddings, model):
+    """Write a new sidecar generation for `ips` (row-aligned with `embeddings`) and prune older ones."""
+    directory = store_dir(database)
+    os.makedirs(directory, exist_ok=True)
+    previous = load_manifest(database)
+    generation = previous["generation"] + 1 if previous else 1
+    matrix = np.asarray(embeddings, dtype=np.float32).reshape(len(ips), -1)
+    matrix_file = f"embeddings-{generation}.npy"
+    index_file = f"ips-{generation}.json"
+    np.save(os.path.join(directory, matrix_file), matrix)
+    with open(os.path.join(directory, index_file), "w") as fh:
+        json.dump({"ips": list(ips), "hashes": [embedding_hash(row) for row in matrix]}, fh)
+
+    manifest = {
+        "version": STORE_VERSION,
+        "generation": generation,
+        "model": model,
+        "rows": int(matrix.shape[0]),
+        "dim": int(matrix.shape[1]),
+        "matrix": matrix_file,
+        "index": index_file,
+        "written_at": datetime.now(timezone.utc).isoformat(),
+    }
+    tmp = os.path.join(directory, f"{MANIFEST_FILE}.tmp")
+    with open(tmp, "w") as fh:
+        json.dump(manifest, fh)
+    os.replace(tmp, os.path.join(directory, MANIFEST_FILE))
+
+    # Older generations are unreferenced once the manifest moves on; a finder that
+    # already mapped one keeps its open file until it exits.
+    for path in glob.glob(os.path.join(directory, "embeddings-*.npy")) + glob.glob(os.path.join(directory, "ips-*.json")):
+        if os.path.basename(path) not in (matrix_file, index_file):
+            os.remove(path)
+    return manifest
+
+
+def load_manifest(database):
+    try:
+        with open(os.path.join(store_dir(database), MANIFEST_FILE)) as fh:
+            manifest = json.load(fh)
+    except (OSError, ValueError):
+        return None
+    return manifest if manifest.get("version") == STORE_VERSION else None
+
+
+def load_embedding_store(database):
+    """(manifest, ips, hashes, matrix) with `matrix` memory-mapped read-only, or None when absent/unreadable."""
+    manifest = load_manifest(database)
+    if manifest is None:
+        return None
+    directory = store_dir(database)
+    try:
+        with open(os.path.join(directory, manifest["index"])) as fh:
+            index = json.load(fh)
+        matrix = np.load(os.path.join(directory, manifest["matrix"]), mmap_mode="r")
+    except (OSError, ValueError, KeyError):
+        return None
+    if matrix.shape != (manifest["rows"], manifest["dim"]) or len(index["ips"]) != manifest["rows"]:
+        return None
+    return manifest, index["ips"], index["hashes"], matrix
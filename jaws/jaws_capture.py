@@ -8,8 +8,11 @@ import pyshark
 from rich.console import Group
 from jaws.config import CONSOLE, DATABASE
 from jaws.jaws_utils import (
+    bump_generation,
     dbms_connection,
     initialize_schema,
+    rollup_conversations,
+    upsert_conversations,
     Reporter,
     render_info_panel,
     render_activity_panel
@@ -48,8 +51,10 @@ BATCH_SIZE = 100
 
 
 def add_packets_to_database(driver, packets_batch, database):
-    with driver.session(database=database) as session:
-        session.execute_write(lambda tx: tx.run("""
+    # The batch's CONVERSATION rollup deltas are applied in the same transaction as its
+    # packets, so the rollups never disagree with the PACKET nodes they summarize.
+    def write(tx):
+        tx.run("""
         UNWIND $packets AS packet
         MERGE (src_ip_address:IP_ADDRESS {IP_ADDRESS: packet.src_ip_address})
         MERGE (dst_ip_address:IP_ADDRESS {IP_ADDRESS: packet.dst_ip_address})
@@ -70,7 +75,12 @@ def add_packets_to_database(driver, packets_batch, database):
 
         CREATE (src_port)-[:SENT]->(p)
         CREATE (p)-[:RECEIVED]->(dst_port)
-        """, packets=packets_batch))
+        """, packets=packets_batch)
+        upsert_conversations(tx, rollup_conversations(packets_batch))
+        bump_generation(tx)
+
+    with driver.session(database=database) as session:
+        session.execute_write(write)
 
 
 def process_packet(packet, local_ip):
@@ -97,15 +107,18 @@ def process_packet(packet, local_ip):
     return packet_data, packet_string
 
 
-def main():
+def main(argv=None, reporter=None, handoff=None):
+    # `handoff` (jaws-pipeline) is a dict the next stage reads instead of the graph: it
+    # receives every captured packet dict and the run's start time, which bounds the
+    # packets already in the graph from the ones this run holds in memory.
     parser = argparse.ArgumentParser(description="Collect packets from a network interface and stores them in the database.")
     parser.add_argument("--interface", default="Ethernet", help="Specify the network interface to use (default: 'Ethernet').")
     parser.add_argument("--file", dest="capture_file", help="Path to a Wireshark capture file.")
     parser.add_argument("--duration", type=int, default=10, help="Specify the duration of the capture in seconds (default: 10).")
     parser.add_argument("--database", default=DATABASE, help=f"Specify the database to connect to (default: '{DATABASE}').")
     parser.add_argument("--list", action="store_true", help="List available network interfaces.")
-    args = parser.parse_args()
-    reporter = Reporter()
+    args = parser.parse_args(argv)
+    reporter = reporter or Reporter()
     local_ip = get_local_ip()
     driver = dbms_connection(args.database, reporter)
     if driver is None:
@@ -114,6 +127,8 @@ def main():
     capture = None
     packets = []
     batch = []
+    captured = [] if handoff is not None else None
+    started_at = datetime.now(timezone.utc).isoformat()
 
     def flush_batch():
         if batch:
@@ -169,6 +184,8 @@ def main():
                 packet_data, packet_string = process_packet(packet, local_ip)
                 batch.append(packet_data)
                 packets.append(packet_string)
+                if captured is not None:
+                    captured.append(packet_data)
                 if len(batch) >= BATCH_SIZE:
                     flush_batch()
                 update()
@@ -176,6 +193,8 @@ def main():
                     break
 
         flush_batch()
+        if handoff is not None:
+            handoff.update({"packets": captured, "captured_after": started_at})
 
         source = args.capture_file if args.capture_file else args.interface
         reporter.result(
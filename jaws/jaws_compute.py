@@ -2,40 +2,67 @@ import argparse
 from rich.console import Group
 import numpy as np
 import pandas as pd
+import scipy.fft
 import torch
 from sentence_transformers import SentenceTransformer
+from sklearn.decomposition import TruncatedSVD
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
+from sklearn.preprocessing import normalize
 from jaws.config import (
     CONSOLE,
     DATABASE,
     PACKET_MODELS,
     DEFAULT_PACKET_MODEL,
     OPENAI_EMBEDDING_MODEL,
+    HASHING_FEATURES,
+    HASHING_EMBEDDING_DIM,
+    HASHING_SVD_SAMPLE,
+    HASHING_MODEL_NAME,
     get_openai_client,
 )
+from jaws.embedding_store import embedding_hash, save_embedding_store
 from jaws.jaws_utils import (
     dbms_connection,
+    parse_window,
+    write_generation,
     Reporter,
     render_info_panel,
     render_activity_panel
 )
 
 
-def fetch_packets(driver, database):
+def fetch_packets(driver, database, before=None):
     # PACKET nodes carry the 5-tuple + size as properties, so per-IP aggregation
-    # reads straight off them (one scan) — no traversal needed.
+    # reads straight off them (one scan) — no traversal needed. `before` (an ISO
+    # timestamp) limits the read to packets stored earlier — jaws-pipeline already
+    # holds the ones its own capture wrote.
     query = """
     MATCH (p:PACKET)
+    WHERE $before IS NULL OR p.TIMESTAMP < datetime($before)
     RETURN p.SRC_IP AS src_ip, p.DST_IP AS dst_ip,
            p.SRC_PORT AS src_port, p.DST_PORT AS dst_port,
            p.SIZE AS size, p.PROTOCOL AS protocol,
            p.TIMESTAMP.epochMillis AS ts_ms
     """
     with driver.session(database=database) as session:
-        result = session.run(query)
+        result = session.run(query, before=before)
         df = pd.DataFrame([record.data() for record in result])
     return df
 
 
+def packets_frame(captured):
+    """jaws-capture's packet dicts as the frame fetch_packets returns, without a graph read."""
+    if not captured:
+        return pd.DataFrame()
+    df = pd.DataFrame(captured)
+    return pd.DataFrame({
+        "src_ip": df["src_ip_address"], "dst_ip": df["dst_ip_address"],
+        "src_port": df["src_port"], "dst_port": df["dst_port"],
+        "size": df["size"], "protocol": df["protocol"],
+        "ts_ms": (pd.to_datetime(df["timestamp"], utc=True, format="ISO8601") - pd.Timestamp(0, tz="UTC")) // pd.Timedelta(milliseconds=1),
+    })
+
+
 def fetch_ip_metadata(driver, database):
     # Org/hostname/location per IP, set by jaws_ipinfo (org name on the org node,
     # hostname/location on the IP node).
@@ -79,6 +106,131 @@ def endpoint_timing(ts_ms):
     return mean, cv
 
 
+# Periodicity (beacon) detection. Interleaved traffic hides a periodic callback from the
+# interval CV above, so every endpoint's combined stream AND every directed host→peer flow
+# is binned into a packet-count series on one shared time grid, and all series are
+# autocorrelated at once (FFT, zero-padded so the correlation is linear, not circular).
+# A series' dominant period is its highest autocorrelation peak between 2 bins and a
+# third of the capture (at least three repetitions); its strength is that peak's
+# normalized autocorrelation, 0 (no repetition) to 1 (a perfect pulse train). Bins are
+# PERIOD_BIN_SECONDS wide unless the capture spans more than PERIOD_MAX_BINS of them,
+# in which case they widen so the grid stays PERIOD_MAX_BINS long.
+PERIOD_BIN_SECONDS = 1.0
+PERIOD_MAX_BINS = 2048
+PERIOD_MIN_PACKETS = 8
+PERIOD_CHUNK_ROWS = 1024
+# A pulse train correlates almost as well at every multiple of its period as at the
+# period itself, so the reported period is the SHORTEST peak within this fraction of
+# the strongest, not the strongest (often a harmonic picked by jitter).
+PERIOD_HARMONIC_TOLERANCE = 0.9
+
+
+def series_periodicity(rows, bins, n_rows, n_bins, bin_seconds):
+    """Dominant period (seconds) and periodicity strength of many binned count series.
+
+    `rows` and `bins` give each packet's series index and time bin. Series with fewer
+    than PERIOD_MIN_PACKETS packets, or too short to repeat three times, get NaN for
+    both and are never transformed. The rest are processed PERIOD_CHUNK_ROWS at a time
+    as one dense (rows × bins) float32 matrix through a batched, multi-threaded rFFT, so
+    the cost is a few FFTs per thousand series rather than a Python loop per series.
+    """
+    period = np.full(n_rows, np.nan)
+    strength = np.full(n_rows, np.nan)
+    max_lag = n_bins // 3
+    if max_lag < 3 or not len(rows):
+        return period, strength
+    eligible = np.bincount(rows, minlength=n_rows) >= PERIOD_MIN_PACKETS
+    targets = np.flatnonzero(eligible)
+    keep = eligible[rows]
+    # Compact the eligible series to 0..len(targets)-1 and group their packets by series.
+    compact = np.cumsum(eligible) - 1
+    rows, bins = compact[rows[keep]], bins[keep]
+    order = np.argsort(rows, kind="stable")
+    rows, bins = rows[order], bins[order]
+    starts = np.searchsorted(rows, np.arange(0, len(targets) + PERIOD_CHUNK_ROWS, PERIOD_CHUNK_ROWS))
+    unbias = n_bins / (n_bins - np.arange(max_lag + 1))
+    for k, first in enumerate(range(0, len(targets), PERIOD_CHUNK_ROWS)):
+        count = min(PERIOD_CHUNK_ROWS, len(targets) - first)
+        a, b = starts[k], starts[k + 1]
+        series = np.bincount((rows[a:b] - first) * n_bins + bins[a:b], minlength=count * n_bins)
+        series = series.reshape(count, n_bins).astype(np.float32)
+        series -= series.mean(axis=1, keepdims=True)
+        # Zero-padded to 2N so the autocorrelation is linear rather than circular.
+        spectrum = scipy.fft.rfft(series, n=2 * n_bins, axis=1, workers=-1)
+        acf = scipy.fft.irfft(spectrum.real ** 2 + spectrum.imag ** 2, n=2 * n_bins, axis=1, workers=-1)[:, :max_lag + 1]
+        zero = acf[:, :1]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            # Normalized by lag 0 and unbiased: lag L overlaps only n_bins - L bins.
+            acf = acf / zero * unbias
+        # Candidate lags are local maxima of the autocorrelation in [2, max_lag).
+        inner = acf[:, 2:max_lag]
+        peaks = (inner >= acf[:, 1:max_lag - 1]) & (inner >= acf[:, 3:max_lag + 1])
+        scored = np.where(peaks, inner, -np.inf)
+        value = scored.max(axis=1)
+        shortest = (scored >= PERIOD_HARMONIC_TOLERANCE * value[:, None]).argmax(axis=1)
+        valid = (zero[:, 0] > 1e-6) & np.isfinite(value)
+        index = targets[first:first + count]
+        period[index] = np.where(valid, (shortest + 2) * bin_seconds, np.nan)
+        strength[index] = np.where(valid, np.clip(value, 0.0, 1.0), np.nan)
+    return period, strength
+
+
+def endpoint_periodicity(packets):
+    """Per-IP (period, periodicity, period_peer) from the endpoint's stream and its flows.
+
+    Every endpoint's combined stream and every directed flow it takes part in (either
+    direction, host→peer or peer→host) is scored by series_periodicity; the endpoint keeps
+    the strongest. `period_peer` names the other side of the flow that won, or is None
+    when the endpoint's own combined stream was the most periodic. IPs without a
+    periodicity estimate are absent from the result.
+    """
+    if packets.empty or "ts_ms" not in packets.columns:
+        return {}
+    packets = packets[packets["ts_ms"].notna()]
+    if packets.empty:
+        return {}
+    ts = packets["ts_ms"].to_numpy(dtype=float)
+    t0 = ts.min()
+    span_seconds = (ts.max() - t0) / 1000.0
+    bin_seconds = max(PERIOD_BIN_SECONDS, span_seconds / (PERIOD_MAX_BINS - 1))
+    n_bins = int(span_seconds // bin_seconds) + 1
+    bins = ((ts - t0) / 1000.0 // bin_seconds).astype(np.int64)
+
+    src = packets["src_ip"].to_numpy()
+    dst = packets["dst_ip"].to_numpy()
+    ips, codes = np.unique(np.concatenate([src, dst]), return_inverse=True)
+    src_code, dst_code = codes[:len(src)], codes[len(src):]
+
+    # Endpoint streams: a packet counts toward its source and (once) its destination.
+    self_flow = src_code == dst_code
+    ep_rows = np.concatenate([src_code, dst_code[~self_flow]])
+    ep_bins = np.concatenate([bins, bins[~self_flow]])
+    ep_period, ep_strength = series_periodicity(ep_rows, ep_bins, len(ips), n_bins, bin_seconds)
+
+    # Directed flows, one series per (src, dst) pair.
+    flow_keys, flow_rows = np.unique(src_code * len(ips) + dst_code, return_inverse=True)
+    flow_period, flow_strength = series_periodicity(flow_rows, bins, len(flow_keys), n_bins, bin_seconds)
+    flow_src, flow_dst = flow_keys // len(ips), flow_keys % len(ips)
+
+    best_strength = np.where(np.isnan(ep_strength), -1.0, ep_strength)
+    best_period = ep_period.copy()
+    best_peer = np.full(len(ips), -1)
+    usable = ~np.isnan(flow_strength)
+    # Visit flows weakest-first so each endpoint ends on its strongest flow.
+    for f in np.flatnonzero(usable)[np.argsort(flow_strength[usable], kind="stable")]:
+        for ip, peer in ((flow_src[f], flow_dst[f]), (flow_dst[f], flow_src[f])):
+            if flow_strength[f] > best_strength[ip]:
+                best_strength[ip] = flow_strength[f]
+                best_period[ip] = flow_period[f]
+                best_peer[ip] = peer
+
+    result = {}
+    for i in np.flatnonzero(best_strength >= 0):
+        result[ips[i]] = (float(best_period[i]), float(best_strength[i]),
+                          ips[best_peer[i]] if best_peer[i] >= 0 else None)
+    return result
+
+
 def build_endpoint_profiles(packets, metadata):
     """Aggregate every packet into one profile per IP address, split by direction.
 
@@ -119,6 +271,9 @@ def build_endpoint_profiles(packets, metadata):
         for ip in set(packets["src_ip"]) | set(packets["dst_ip"]):
             mask = (packets["src_ip"] == ip) | (packets["dst_ip"] == ip)
             timing[ip] = endpoint_timing(packets.loc[mask, "ts_ms"])
+    # Periodicity looks past the interleaving: each endpoint keeps the most periodic of
+    # its combined stream and its individual host→peer flows (see endpoint_periodicity).
+    periodicity = endpoint_periodicity(packets) if has_ts else {}
 
     profiles = []
     for ip in sorted(set(outbound) | set(inbound)):
@@ -126,6 +281,7 @@ def build_endpoint_profiles(packets, metadata):
         inb = inbound.get(ip, {})
         meta = metadata.get(ip, {})
         interval_mean, interval_cv = timing.get(ip, (None, None))
+        period, period_strength, period_peer = periodicity.get(ip, (None, None, None))
         profiles.append({
             "ip_address": ip,
             "org": meta.get("org"),
@@ -142,10 +298,90 @@ def build_endpoint_profiles(packets, metadata):
             "protocols": sorted(set(out.get("protocols", [])) | set(inb.get("protocols", []))),
             "interval_mean": interval_mean,
             "interval_cv": interval_cv,
+            "period": period,
+            "periodicity": period_strength,
+            "period_peer": period_peer,
         })
     return profiles
 
 
+# Sliding-window profiles (--window): the same directional counts as an endpoint
+# profile, but one row per (IP, window) so a short burst isn't averaged into a whole
+# capture. Windows are aligned to the epoch (window_start = floor(ts / window)), so
+# reruns over a growing capture land on the same windows and MERGE in place. Every
+# packet is bucketed once; the per-window sums and distinct-peer counts are bincounts
+# over the (ip, window) pairs present in the packets, not a pass per window.
+def build_window_profiles(packets, window_seconds):
+    """One directional traffic profile per (IP, window) the IP was active in.
+
+    Returns dicts with ip_address, window_start (epoch ms), window_seconds and the
+    bytes/packets/peers counts of build_endpoint_profiles, split by direction.
+    """
+    if packets.empty or "ts_ms" not in packets.columns:
+        return []
+    packets = packets[(packets["src_ip"] != "0.0.0.0") & (packets["dst_ip"] != "0.0.0.0") & packets["ts_ms"].notna()]
+    if packets.empty:
+        return []
+    window_ms = window_seconds * 1000
+    starts, window = np.unique(packets["ts_ms"].to_numpy(dtype=np.int64) // window_ms, return_inverse=True)
+    src = packets["src_ip"].to_numpy()
+    dst = packets["dst_ip"].to_numpy()
+    ips, codes = np.unique(np.concatenate([src, dst]), return_inverse=True)
+    src_code, dst_code = codes[:len(src)], codes[len(src):]
+    size = packets["size"].fillna(0).to_numpy(dtype=np.int64)
+    # Cells are the (ip, window) pairs that actually occur, as either side of a packet —
+    # compacted by np.unique, so every array below is sized by active pairs, never by
+    # every IP × every window of the capture's history.
+    cells, cell = np.unique(np.concatenate([src_code, dst_code]) * len(starts) + np.tile(window, 2),
+                            return_inverse=True)
+    src_cell, dst_cell = cell[:len(src)], cell[len(src):]
+
+    def direction(ip_cell, peer_code):
+        total_bytes = np.bincount(ip_cell, weights=size, minlength=len(cells))
+        total_packets = np.bincount(ip_cell, minlength=len(cells))
+        distinct = np.unique(ip_cell * len(ips) + peer_code) // len(ips)
+        return total_bytes, total_packets, np.bincount(distinct, minlength=len(cells))
+
+    bytes_out, packets_out, out_peers = direction(src_cell, dst_code)
+    bytes_in, packets_in, in_peers = direction(dst_cell, src_code)
+    ip_index, window_index = np.divmod(cells, len(starts))
+    return [
+        {
+            "ip_address": ips[i],
+            "window_start": int(starts[w] * window_ms),
+            "window_seconds": window_seconds,
+            "bytes_out": int(bytes_out[c]),
+            "packets_out": int(packets_out[c]),
+            "out_peers": int(out_peers[c]),
+            "bytes_in": int(bytes_in[c]),
+            "packets_in": int(packets_in[c]),
+            "in_peers": int(in_peers[c]),
+        }
+        for c, (i, w) in enumerate(zip(ip_index.tolist(), window_index.tolist()))
+    ]
+
+
+WINDOW_UPSERT_QUERY = """
+UNWIND $windows AS w
+MATCH (ip:IP_ADDRESS {IP_ADDRESS: w.ip_address})
+MERGE (ip)-[:WINDOW]->(win:ENDPOINT_WINDOW {IP_ADDRESS: w.ip_address, WINDOW_SECONDS: w.window_seconds, WINDOW_START: w.window_start})
+SET win.BYTES_OUT = w.bytes_out,
+    win.PACKETS_OUT = w.packets_out,
+    win.OUT_PEERS = w.out_peers,
+    win.BYTES_IN = w.bytes_in,
+    win.PACKETS_IN = w.packets_in,
+    win.IN_PEERS = w.in_peers,
+    win.TIMESTAMP = datetime()
+"""
+
+
+def add_windows_to_database(windows, driver, database, batch_size=1000):
+    with driver.session(database=database) as session:
+        for start in range(0, len(windows), batch_size):
+            batch = windows[start:start + batch_size]
+            session.execute_write(lambda tx: tx.run(WINDOW_UPSERT_QUERY, windows=batch))
+
+
 def build_endpoint_description(p):
     return (
         f"IP: {p['ip_address']} | Organization: {p['org']} | Hostname: {p['hostname']} | Location: {p['location']}\n"
@@ -160,6 +396,7 @@ def add_endpoint_to_database(profile, embedding, driver, database):
     MATCH (ip:IP_ADDRESS {IP_ADDRESS: $ip_address})
     MERGE (ip)-[:PROFILE]->(endpoint:ENDPOINT {IP_ADDRESS: $ip_address})
     SET endpoint.EMBEDDING = $embedding,
+        endpoint.EMBEDDING_HASH = $embedding_hash,
         endpoint.ORGANIZATION = $org,
         endpoint.HOSTNAME = $hostname,
         endpoint.LOCATION = $location,
@@ -174,11 +411,15 @@ def add_endpoint_to_database(profile, embedding, driver, database):
         endpoint.PROTOCOLS = $protocols,
         endpoint.INTERVAL_MEAN = $interval_mean,
         endpoint.INTERVAL_CV = $interval_cv,
+        endpoint.PERIOD = $period,
+        endpoint.PERIODICITY = $periodicity,
+        endpoint.PERIOD_PEER = $period_peer,
         endpoint.TIMESTAMP = datetime()
     """
     with driver.session(database=database) as session:
         session.run(query,
                     ip_address=profile["ip_address"], embedding=embedding,
+                    embedding_hash=embedding_hash(embedding),
                     org=profile["org"], hostname=profile["hostname"], location=profile["location"],
                     bytes_out=profile["bytes_out"], packets_out=profile["packets_out"],
                     out_peers=profile["out_peers"], out_ports=profile["out_ports"],
@@ -186,7 +427,10 @@ def add_endpoint_to_database(profile, embedding, driver, database):
                     in_peers=profile["in_peers"], in_ports=profile["in_ports"],
                     protocols=profile["protocols"],
                     interval_mean=profile.get("interval_mean"),
-                    interval_cv=profile.get("interval_cv"))
+                    interval_cv=profile.get("interval_cv"),
+                    period=profile.get("period"),
+                    periodicity=profile.get("periodicity"),
+                    period_peer=profile.get("period_peer"))
 
 
 device = "cuda" if torch.cuda.is_available() else "cpu"
@@ -201,24 +445,76 @@ def compute_openai_embedding(client, input):
     return response.data[0].embedding
 
 
-def main():
-    parser = argparse.ArgumentParser(description="Compute per-IP endpoint embeddings using either OpenAI or Transformers.")
-    parser.add_argument("--api", choices=["openai", "transformers"], default="openai", help="Specify the API to use for computing embeddings, either 'openai' or 'transformers' (default: 'openai').")
+# Description tokens are the values between the field separators, so IPs, hostnames,
+# org names and port lists hash as whole tokens rather than being split on dots.
+HASHING_TOKEN_PATTERN = r"[^\s|,:\[\]'()]+"
+
+
+def compute_hashing_embeddings(descriptions):
+    """Embed every description at once with hashed word n-grams + TF-IDF + randomized SVD.
+
+    Hashing needs no fitted vocabulary, so vectorizing is a single sparse pass; TF-IDF
+    down-weights the tokens every description shares (the field labels). Truncated SVD
+    is fit on a sample of at most HASHING_SVD_SAMPLE endpoints, restricted to the hash
+    buckets that sample actually uses (the dense SVD work scales with columns, and almost
+    all 2**18 buckets are empty), then every endpoint is projected with one sparse matmul.
+    Components are only comparable within one compute run — which is what the finder
+    clusters. Vectors are zero-padded to HASHING_EMBEDDING_DIM when there are fewer
+    endpoints than dimensions, then L2-normalized to match the cosine geometry of the
+    transformer path. Returns one list of floats per description.
+    """
+    if not descriptions:
+        return []
+    vectorizer = HashingVectorizer(ngram_range=(1, 2), token_pattern=HASHING_TOKEN_PATTERN, lowercase=True,
+                                   n_features=HASHING_FEATURES, alternate_sign=False, norm=None)
+    tfidf = TfidfTransformer(sublinear_tf=True).fit_transform(vectorizer.transform(descriptions))
+
+    reduced = np.zeros((len(descriptions), HASHING_EMBEDDING_DIM), dtype=np.float32)
+    sample = np.arange(tfidf.shape[0])
+    if len(sample) > HASHING_SVD_SAMPLE:
+        sample = np.sort(np.random.default_rng(0).choice(sample, HASHING_SVD_SAMPLE, replace=False))
+    fit_rows = tfidf[sample]
+    columns = np.unique(fit_rows.indices)
+    n_components = min(HASHING_EMBEDDING_DIM, len(sample) - 1, len(columns) - 1)
+    if n_components >= 1:
+        svd = TruncatedSVD(n_components=n_components, algorithm="randomized", n_iter=2, random_state=0)
+        svd.fit(fit_rows[:, columns])
+        reduced[:, :n_components] = tfidf[:, columns] @ svd.components_.T
+    return normalize(reduced).tolist()
+
+
+def main(argv=None, reporter=None, handoff=None):
+    # `handoff` (jaws-pipeline): when it holds the packets jaws-capture just wrote, only
+    # older packets are read from the graph; the embedded profiles are left in it for
+    # jaws-finder under "endpoints", and the model that embedded them under "embedding_model".
+    parser = argparse.ArgumentParser(description="Compute per-IP endpoint embeddings using OpenAI, Transformers, or a model-free hashing embedder.")
+    parser.add_argument("--api", choices=["openai", "transformers", "hashing"], default="openai", help="Specify the API to use for computing embeddings: 'openai', 'transformers', or 'hashing' (hashed n-gram TF-IDF + randomized SVD — no model download, fastest on edge hardware) (default: 'openai').")
     parser.add_argument("--model", choices=list(PACKET_MODELS), default=DEFAULT_PACKET_MODEL, help=f"Local transformers model to use when --api transformers (default: '{DEFAULT_PACKET_MODEL}'). Add more in config.PACKET_MODELS.")
     parser.add_argument("--database", default=DATABASE, help=f"Specify the database to connect to (default: '{DATABASE}').")
-    args = parser.parse_args()
-    reporter = Reporter()
+    parser.add_argument("--window", type=parse_window, default=None, help="Also write one ENDPOINT_WINDOW profile per IP per time window of this length (e.g. 300, 30s, 5m, 1h), so jaws-finder --windows can score short bursts against each IP's own history. Windows are epoch-aligned, so reruns update them in place (default: off).")
+    args = parser.parse_args(argv)
+    reporter = reporter or Reporter()
     driver = dbms_connection(args.database, reporter)
     if driver is None:
         return
 
-    packets = fetch_packets(driver, args.database)
+    if handoff is not None and "packets" in handoff:
+        frames = [fetch_packets(driver, args.database, before=handoff["captured_after"]), packets_frame(handoff["packets"])]
+        frames = [f for f in frames if not f.empty]
+        packets = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    else:
+        packets = fetch_packets(driver, args.database)
     metadata = fetch_ip_metadata(driver, args.database)
     profiles = build_endpoint_profiles(packets, metadata)
 
-    model_name = PACKET_MODELS[args.model] if args.api == "transformers" else OPENAI_EMBEDDING_MODEL
+    model_name = {
+        "transformers": PACKET_MODELS[args.model],
+        "hashing": HASHING_MODEL_NAME,
+    }.get(args.api, OPENAI_EMBEDDING_MODEL)
     embedding_strings = []
     embedding_tensors = []
+    embedded_ips = []
+    embedded_profiles = []
     embedder = None
 
     processing_message = f"Embedding {len(profiles)} endpoint profiles using: {model_name}{f' ({device})' if args.api == 'transformers' else ''}"
@@ -234,20 +530,51 @@ def main():
         if args.api == "transformers":
             embedder = SentenceTransformer(model_name, device=device, trust_remote_code=True)
 
+        descriptions = [build_endpoint_description(profile) for profile in profiles]
+        # The hashing embedder vectorizes the whole batch in one sparse pass (its SVD is
+        # fit across endpoints), so it runs up front rather than once per profile.
+        hashed = compute_hashing_embeddings(descriptions) if args.api == "hashing" else None
+
         with reporter.activity(render) as update:
-            for profile in profiles:
-                description = build_endpoint_description(profile)
+            for i, (profile, description) in enumerate(zip(profiles, descriptions)):
                 if args.api == "transformers":
                     embedding = compute_transformer_embedding(description, embedder)
+                elif args.api == "hashing":
+                    embedding = hashed[i]
                 else:
                     embedding = compute_openai_embedding(get_openai_client(), description)
 
                 if embedding is not None:
                     add_endpoint_to_database(profile, embedding, driver, args.database)
+                    embedded_ips.append(profile["ip_address"])
+                    embedded_profiles.append(profile)
                     embedding_strings.append(description)
                     embedding_tensors.append(embedding)
                     update()
 
+        # The memory-mapped sidecar jaws-finder reads instead of pulling every vector
+        # back through Bolt (see jaws.embedding_store). Rows it misses or that no longer
+        # match the graph's EMBEDDING_HASH are fetched from the graph, so a failed write
+        # only costs the finder speed.
+        store = None
+        if embedded_ips:
+            try:
+                manifest = save_embedding_store(args.database, embedded_ips, embedding_tensors, model_name)
+                store = {"generation": manifest["generation"], "rows": manifest["rows"], "dim": manifest["dim"]}
+            except OSError as e:
+                reporter.info("STORE", f"Could not write the embedding sidecar ({e}); jaws-finder will read vectors from the graph.")
+
+        windows = None
+        if args.window:
+            window_profiles = build_window_profiles(packets, args.window)
+            add_windows_to_database(window_profiles, driver, args.database)
+            windows = {"window_seconds": args.window, "profiles": len(window_profiles)}
+        if embedded_ips or windows:
+            write_generation(driver, args.database)
+        if handoff is not None:
+            handoff["endpoints"] = (embedded_profiles, embedding_tensors)
+            handoff["embedding_model"] = model_name
+
         reporter.result(
             {
                 "database": args.database,
@@ -255,8 +582,11 @@ def main():
                 "model": model_name,
                 "endpoints_embedded": len(embedding_strings),
                 "packets": len(packets),
+                "embedding_store": store,
+                "windows": windows,
             },
-            summary=f"Embedded {len(embedding_strings)} endpoint profiles (one per IP) from {len(packets)} packets via {args.api} in: '{args.database}'",
+            summary=f"Embedded {len(embedding_strings)} endpoint profiles (one per IP) from {len(packets)} packets via {args.api} in: '{args.database}'"
+                    + (f"; wrote {windows['profiles']} {args.window}s window profiles" if windows else ""),
         )
         return
 
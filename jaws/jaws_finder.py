@@ -1,18 +1,38 @@
 import os
 import argparse
+import json
 import tempfile
+from datetime import datetime, timezone
 import numpy as np
-from sklearn.decomposition import PCA
-from sklearn.cluster import DBSCAN
+from sklearn.decomposition import PCA, IncrementalPCA
 from sklearn.neighbors import NearestNeighbors
 from sklearn.preprocessing import StandardScaler
-from sklearn.metrics import silhouette_score
-from kneed import KneeLocator
-import matplotlib.pyplot as plt
-import plotille
-from jaws.config import DATABASE, FINDER_ENDPOINT
+from jaws.config import (
+    DATABASE,
+    FINDER_ENDPOINT,
+    DATA_DIR,
+    BASELINE_MAX_AGE_HOURS,
+    PCA_MEMORY_LIMIT_MB,
+    PCA_CHUNK_MB,
+    HASHING_MODEL_NAME
+)
+from jaws.plots import LABEL_TOP_OUTLIERS
+from jaws.embedding_store import StoreRows, embedding_hash, load_embedding_store, load_manifest
+from jaws.detectors import (
+    DETECTORS,
+    DEFAULT_DETECTOR,
+    DBSCANDetector,
+    make_detector,
+    dbscan_core_mask,
+    map_tasks,
+    ablation_condition,
+    sweep_space
+)
 from jaws.jaws_utils import (
+    bump_generation,
     dbms_connection,
+    ensure_conversations,
+    parse_window,
     Reporter
 )
 
@@ -39,7 +59,11 @@ RATIO_FEATURES = {
 # regular callbacks (C2-like), a high CV means bursty/human traffic. INTERVAL_MEAN is
 # the typical period. Endpoints with too few packets carry None and are median-imputed
 # below so they read as "average regularity" rather than as perfect beacons.
-TIMING_FEATURES = ["interval_mean", "interval_cv"]
+# PERIOD / PERIODICITY come from jaws_compute's autocorrelation pass over the endpoint's
+# stream and each of its host→peer flows: the dominant repeat interval and how strongly
+# the traffic repeats at it (0-1). Unlike INTERVAL_CV they survive interleaving, so a
+# beacon hidden inside a busy host still stands out as a high-periodicity reason.
+TIMING_FEATURES = ["interval_mean", "interval_cv", "period", "periodicity"]
 
 NUMERIC_FEATURE_COUNT = len(BASE_FEATURES) + len(RATIO_FEATURES) + len(TIMING_FEATURES)
 
@@ -63,6 +87,8 @@ FEATURE_UNITS = {
     "bytes_per_peer": "bytes/peer",
     "interval_mean": "seconds",
     "interval_cv": "ratio",
+    "period": "seconds",
+    "periodicity": "ratio",
 }
 
 # A feature must deviate by at least this robust-z to be cited as a reason an
@@ -119,28 +145,98 @@ def host_relative_gloss(feature, is_local):
     return (HOST_FRAME_LOCAL if is_local else HOST_FRAME_REMOTE)[flow]
 
 
-def build_numeric_features(data):
+# The finder's working set, column-oriented: one typed array per field and the
+# embeddings as a single contiguous float32 matrix (half the memory of float64, and what
+# PCA and the neighbor search consume directly). Feature building, robust-z and reason
+# extraction are whole-column numpy operations, so nothing walks a per-endpoint dict.
+LABEL_COLUMNS = ["ip_address", "org", "hostname", "location"]
+
+
+class EndpointTable:
+    """Fetched endpoints as columns: `table["bytes_out"]` is an array, `len(table)` the row count.
+
+    Label columns are object arrays of strings, BASE_FEATURES are int64 counts, and
+    TIMING_FEATURES are float64 with NaN where an endpoint had too few packets to time,
+    and "embedding_hash" holds each row's EMBEDDING_HASH (None when the graph has none).
+    `embeddings` is the (n_endpoints, dim) float32 matrix, row-aligned with the columns.
+    """
+
+    def __init__(self, columns, embeddings):
+        self.columns = columns
+        self.embeddings = embeddings
+
+    def __len__(self):
+        return len(self.embeddings)
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def take(self, rows):
+        """The subset (or resample) at the given row indices / boolean mask."""
+        return EndpointTable({k: v[rows] for k, v in self.columns.items()}, self.embeddings[rows])
+
+    @classmethod
+    def from_rows(cls, rows, embeddings, hashes):
+        """Build from value tuples ordered LABEL_COLUMNS + BASE_FEATURES + TIMING_FEATURES.
+
+        Missing labels read 'Unknown' and missing counts 0; missing timing stays NaN so
+        build_numeric_features median-imputes it. `hashes` is row-aligned with `rows`.
+        """
+        names = LABEL_COLUMNS + BASE_FEATURES + TIMING_FEATURES
+        values = list(zip(*rows)) if rows else [()] * len(names)
+        columns = {}
+        for name, col in zip(names, values):
+            if name in LABEL_COLUMNS:
+                columns[name] = np.array([v or "Unknown" for v in col], dtype=object)
+            elif name in BASE_FEATURES:
+                columns[name] = np.nan_to_num(np.array(col, dtype=float)).astype(np.int64)
+            else:
+                columns[name] = np.array(col, dtype=float)
+        columns["embedding_hash"] = np.array(list(hashes), dtype=object)
+        return cls(columns, embeddings)
+
+
+def timing_medians(data):
+    """Median of each timing feature's present values (0.0 when none are present)."""
+    medians = []
+    for f in TIMING_FEATURES:
+        present = data[f][~np.isnan(data[f])]
+        medians.append(float(np.median(present)) if len(present) else 0.0)
+    return medians
+
+
+def build_numeric_features(data, timing_fill=None):
     """Assemble the raw numeric matrix: base counts + derived ratios + timing.
 
-    Timing columns may contain None (sparse endpoints); each is imputed with the
-    median of its present values so missingness reads as neutral, not anomalous.
+    `data` is an EndpointTable (RATIO_FEATURES evaluate on whole columns). Timing
+    columns may be NaN (sparse endpoints); each is imputed with the median of its
+    present values so missingness reads as neutral, not anomalous. `timing_fill`
+    overrides those medians (one per TIMING_FEATURES entry) — scoring against a saved
+    baseline imputes with the baseline's medians, not the new batch's.
     Returns a float array of shape (n_endpoints, NUMERIC_FEATURE_COUNT).
     """
-    base = [[float(d[f]) for f in BASE_FEATURES] for d in data]
-    ratios = [[fn(d) for fn in RATIO_FEATURES.values()] for d in data]
+    fill = timing_fill if timing_fill is not None else timing_medians(data)
+    columns = [data[f].astype(float) for f in BASE_FEATURES]
+    columns += [np.asarray(fn(data), dtype=float) for fn in RATIO_FEATURES.values()]
+    columns += [np.where(np.isnan(data[f]), median, data[f]) for f, median in zip(TIMING_FEATURES, fill)]
+    return np.column_stack(columns) if len(data) else np.empty((0, NUMERIC_FEATURE_COUNT))
 
-    timing_cols = []
-    for f in TIMING_FEATURES:
-        col = [d.get(f) for d in data]
-        present = [v for v in col if v is not None]
-        median = float(np.median(present)) if present else 0.0
-        timing_cols.append([float(v) if v is not None else median for v in col])
-    timing = np.array(timing_cols).T if timing_cols else np.empty((len(data), 0))
 
-    return np.hstack([np.array(base), np.array(ratios), timing])
+def robust_z_fit(raw):
+    """The (median, scale) location/scale robust_z_scores applies, per column.
+
+    See robust_z_scores for the method. Split out so a saved baseline can score new
+    endpoints against the population it was fit on rather than against themselves.
+    """
+    x = np.log1p(raw)
+    median = np.median(x, axis=0)
+    mad = np.median(np.abs(x - median), axis=0)
+    scale = 1.4826 * mad
+    scale = np.where(scale > 1e-9, scale, x.std(axis=0))
+    return median, scale
 
 
-def robust_z_scores(raw):
+def robust_z_scores(raw, stats=None):
     """Per-column robust z-scores: (x - median) / (1.4826 * MAD), on log1p-scaled
     features.
 
@@ -149,21 +245,19 @@ def robust_z_scores(raw):
     mean/std so the location and scale aren't dragged toward the very outlier being
     measured. Where MAD is ~0 (e.g. many identical median-imputed timing values) it
     falls back to the standard deviation, and to 0 for a genuinely constant column —
-    both avoid the div-by-zero infinities a naive MAD-z produces. Returns an array
-    shaped like `raw`, columns aligned with NUMERIC_FEATURE_NAMES.
+    both avoid the div-by-zero infinities a naive MAD-z produces. `stats` is a
+    (median, scale) pair from robust_z_fit; by default it is fit on `raw` itself.
+    Returns an array shaped like `raw`, columns aligned with NUMERIC_FEATURE_NAMES.
     """
     x = np.log1p(raw)
-    median = np.median(x, axis=0)
-    mad = np.median(np.abs(x - median), axis=0)
-    scale = 1.4826 * mad
-    scale = np.where(scale > 1e-9, scale, x.std(axis=0))
+    median, scale = stats if stats is not None else robust_z_fit(raw)
     z = np.zeros_like(x)
     usable = scale > 1e-9
     z[:, usable] = (x[:, usable] - median[usable]) / scale[usable]
     return z
 
 
-def score_endpoints(data, clusters):
+def score_endpoints(data, clusters, z_stats=None, timing_fill=None, detector_scores=None):
     """Attach a rankable anomaly score and reason codes to every endpoint.
 
     `anomaly_score` is the L2 norm of an endpoint's per-feature robust-z vector — its
@@ -172,63 +266,75 @@ def score_endpoints(data, clusters):
     flags nothing. `reasons` cites the features whose |robust-z| clears
     REASON_Z_THRESHOLD, each with its raw value, unit, and direction, turning
     'flagged' into 'flagged because bytes_out is far above the typical host'.
-    `is_outlier` carries the DBSCAN verdict so the geometric flag and the
-    interpretable score coexist. Returns the full list sorted by score descending.
+    `is_outlier` carries the detector's verdict (DBSCAN by default) so the geometric
+    flag and the interpretable score coexist, and `detector_scores`, when given, is the
+    detector's own continuous score, attached as `detector_score`. `z_stats` /
+    `timing_fill` score against a saved baseline's population instead of `data` itself.
+    Returns the full list sorted by anomaly_score descending.
     """
-    raw = build_numeric_features(data)
-    z = robust_z_scores(raw)
-    scores = np.linalg.norm(z, axis=1)
-
-    ranked = []
-    for i, item in enumerate(data):
-        # The clustered set is remote by default; a remote endpoint's *_out is data it sent
-        # TO the host (a download). is_local flips the host-frame gloss for the capture host.
-        is_local = item["org"] == LOCAL_ORG
-        reasons = []
-        for j, name in enumerate(NUMERIC_FEATURE_NAMES):
-            zj = float(z[i, j])
-            if abs(zj) >= REASON_Z_THRESHOLD:
-                reason = {
-                    "feature": name,
-                    "value": round(float(raw[i, j]), 4),
-                    "unit": FEATURE_UNITS[name],
-                    "robust_z": round(zj, 2),
-                    "direction": "high" if zj > 0 else "low",
-                }
-                # Defender-frame disambiguation so "bytes_out high" on a remote IP reads as
-                # a host download, not exfil (omitted for non-directional features).
-                gloss = host_relative_gloss(name, is_local)
-                if gloss:
-                    reason["host_relative"] = gloss
-                reasons.append(reason)
-        reasons.sort(key=lambda r: abs(r["robust_z"]), reverse=True)
-        ranked.append({
-            "ip_address": item["ip_address"],
-            "org": item["org"],
-            "hostname": item["hostname"],
-            "location": item["location"],
-            "bytes_out": item["bytes_out"],
-            "packets_out": item["packets_out"],
-            "bytes_in": item["bytes_in"],
-            "packets_in": item["packets_in"],
-            "interval_mean": item["interval_mean"],
-            "interval_cv": item["interval_cv"],
-            "anomaly_score": round(float(scores[i]), 4),
-            "is_outlier": bool(clusters[i] == -1),
-            "reasons": reasons,
-        })
-    ranked.sort(key=lambda e: e["anomaly_score"], reverse=True)
-    return ranked
+    raw = build_numeric_features(data, timing_fill)
+    z = robust_z_scores(raw, z_stats)
+    scores = np.round(np.linalg.norm(z, axis=1), 4)
+
+    # Reasons from one thresholded mask: the (endpoint, feature) cells clearing the
+    # cutoff, ordered by endpoint then |robust-z| descending, split into per-endpoint
+    # runs. Only those cells become reason dicts.
+    abs_z = np.abs(z)
+    rows, cols = np.nonzero(abs_z >= REASON_Z_THRESHOLD)
+    order = np.lexsort((-abs_z[rows, cols], rows))
+    rows, cols = rows[order], cols[order]
+    # The clustered set is remote by default; a remote endpoint's *_out is data it sent
+    # TO the host (a download). is_local flips the host-frame gloss for the capture host.
+    is_local = (data["org"] == LOCAL_ORG)[rows].tolist()
+    cell_z = np.round(z[rows, cols], 2).tolist()
+    cell_values = np.round(raw[rows, cols], 4).tolist()
+    cell_reasons = []
+    for j, zj, value, local in zip(cols.tolist(), cell_z, cell_values, is_local):
+        name = NUMERIC_FEATURE_NAMES[j]
+        reason = {
+            "feature": name,
+            "value": value,
+            "unit": FEATURE_UNITS[name],
+            "robust_z": zj,
+            "direction": "high" if zj > 0 else "low",
+        }
+        # Defender-frame disambiguation so "bytes_out high" on a remote IP reads as
+        # a host download, not exfil (omitted for non-directional features).
+        gloss = host_relative_gloss(name, local)
+        if gloss:
+            reason["host_relative"] = gloss
+        cell_reasons.append(reason)
+    bounds = np.searchsorted(rows, np.arange(len(data) + 1))
+
+    # Rows are assembled already in rank order (anomaly_score descending, ties in fetch
+    # order): every column is permuted once, then zipped into the per-endpoint dicts.
+    order = np.argsort(-scores, kind="stable")
+
+    def column(name):
+        col = data[name][order]
+        return np.where(np.isnan(col), None, col).tolist() if col.dtype.kind == "f" else col.tolist()
+
+    fields = ["ip_address", "org", "hostname", "location", "bytes_out", "packets_out",
+              "bytes_in", "packets_in", "interval_mean", "interval_cv", "period", "periodicity", "anomaly_score", "is_outlier"]
+    values = [column(name) for name in fields[:-2]]
+    values += [scores[order].tolist(), (np.asarray(clusters)[order] == -1).tolist()]
+    if detector_scores is not None:
+        fields.append("detector_score")
+        values.append(np.round(np.asarray(detector_scores)[order], 4).tolist())
+    fields.append("reasons")
+    values.append([cell_reasons[a:b] for a, b in zip(bounds[order].tolist(), bounds[order + 1].tolist())])
+    return [dict(zip(fields, row)) for row in zip(*values)]
 
 
 # The host-outbound view answers the tool's stated purpose directly — "unusual outbound
 # traffic FROM the capture host." Clustering excludes the host (a structural hub), so its
 # real outbound is scattered as small bytes_in across many remote endpoints and never
 # dominates an anomaly_score; the remote-endpoint ranking is driven by inbound/download
-# volume instead. This view re-centers on the host: for every destination the host SENT to,
-# it measures the host's own upload (host as packet SOURCE, computed from raw packets so it
-# isolates host→peer flow rather than the peer's total inbound from all sources) and ranks
-# destinations on that distribution. upload_download_ratio >> 1 is the exfil shape.
+# volume instead. This view re-centers on the host: for every destination the host SENT
+# to, it measures the host's own upload (host as packet SOURCE, read from the
+# per-direction conversation rollups so it isolates host→peer flow rather than the
+# peer's total inbound from all sources) and ranks destinations on that distribution.
+# upload_download_ratio >> 1 is the exfil shape.
 HOST_OUTBOUND_FEATURES = ["upload_bytes", "upload_packets", "upload_download_ratio"]
 HOST_OUTBOUND_UNITS = {
     "upload_bytes": "bytes",
@@ -293,17 +399,201 @@ def score_host_outbound(rows):
     return ranked
 
 
-def _whole_number_formatter(val, chars, delta, left=False):
-    # plotille label formatter: render axis tick labels as whole numbers instead of
-    # full float precision (e.g. 4 rather than 3.73886505).
-    s = f"{val:.0f}"
-    return f"{s:<{chars}}" if left else f"{s:>{chars}}"
+# Time-resolved scoring (--windows) over the ENDPOINT_WINDOW profiles jaws-compute
+# --window writes: one row per (IP, window). Each window is scored twice on the base and
+# ratio features — against the whole population of windows (robust-z as above) and
+# against its own IP's other windows (per-IP median/MAD) — so a host that bursts for
+# two minutes stands out against its own quiet hours even when that burst is ordinary
+# for the population. An IP needs WINDOW_MIN_HISTORY windows before it has a history to
+# depart from; a window is flagged when a feature departs from its own history by at
+# least WINDOW_OUTLIER_Z. Only the WINDOW_REPORT_LIMIT top-ranked windows are returned.
+WINDOW_FEATURE_NAMES = BASE_FEATURES + list(RATIO_FEATURES)
+WINDOW_MIN_HISTORY = 4
+WINDOW_OUTLIER_Z = 3.5
+WINDOW_REPORT_LIMIT = 100
+
+
+def fetch_windows(driver, database, include_local=False, window_seconds=None):
+    """(columns, window_seconds, excluded_local) for one window size — the most recently
+    written size when `window_seconds` is None. Columns are arrays keyed by field name,
+    with the rows grouped by IP; columns is None when no windows exist."""
+    with driver.session(database=database) as session:
+        if not window_seconds:
+            record = session.run("""
+            MATCH (w:ENDPOINT_WINDOW)
+            RETURN w.WINDOW_SECONDS AS size ORDER BY w.TIMESTAMP DESC LIMIT 1
+            """).single()
+            if record is None:
+                return None, None, 0
+            window_seconds = record["size"]
+        result = session.run("""
+        MATCH (w:ENDPOINT_WINDOW {WINDOW_SECONDS: $size})
+        OPTIONAL MATCH (ip:IP_ADDRESS {IP_ADDRESS: w.IP_ADDRESS})<-[:OWNERSHIP]-(org:ORGANIZATION)
+        RETURN w.IP_ADDRESS AS ip_address,
+               COALESCE(org.ORGANIZATION, 'Unknown') AS org,
+               w.WINDOW_START AS window_start,
+               w.BYTES_OUT AS bytes_out,
+               w.BYTES_IN AS bytes_in,
+               w.PACKETS_OUT AS packets_out,
+               w.PACKETS_IN AS packets_in,
+               w.OUT_PEERS AS out_peers,
+               w.IN_PEERS AS in_peers
+        ORDER BY ip_address, window_start
+        """, size=window_seconds)
+        rows = [r.values() for r in result]
+    excluded_local = sum(1 for r in rows if r[1] == LOCAL_ORG)
+    if not include_local:
+        rows = [r for r in rows if r[1] != LOCAL_ORG]
+    names = ["ip_address", "org", "window_start"] + BASE_FEATURES
+    values = list(zip(*rows)) if rows else [()] * len(names)
+    columns = {name: np.array(col, dtype=object) for name, col in zip(names[:2], values[:2])}
+    columns.update({name: np.array(col, dtype=np.int64) for name, col in zip(names[2:], values[2:])})
+    return columns, window_seconds, (0 if include_local else excluded_local)
+
+
+def group_robust_z(raw, groups, fallback_scale):
+    """Robust-z of every row against its own group's rows (log1p, median/MAD per group).
+
+    `groups` are dense codes 0..G-1. Group medians come from one lexsort per column
+    (rows ordered by group, then value) rather than a loop over groups. A group whose MAD
+    is ~0 (a steady IP) borrows the column's `fallback_scale`, and groups with fewer
+    than WINDOW_MIN_HISTORY rows get z = 0 — no history to depart from.
+    """
+    x = np.log1p(raw)
+    counts = np.bincount(groups)
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+
+    def group_median(values):
+        median = np.empty((len(counts), values.shape[1]))
+        for j in range(values.shape[1]):
+            ordered = values[np.lexsort((values[:, j], groups)), j]
+            median[:, j] = (ordered[starts + (counts - 1) // 2] + ordered[starts + counts // 2]) / 2
+        return median
+
+    median = group_median(x)
+    deviation = x - median[groups]
+    scale = 1.4826 * group_median(np.abs(deviation))
+    scale = np.where(scale > 1e-9, scale, fallback_scale)[groups]
+    usable = scale > 1e-9
+    z = np.where(usable, deviation / np.where(usable, scale, 1.0), 0.0)
+    z[counts[groups] < WINDOW_MIN_HISTORY] = 0.0
+    return z
+
+
+def score_windows(columns, window_seconds, limit=WINDOW_REPORT_LIMIT):
+    """Rank windows by their larger departure — from the population or their own IP's history.
+
+    Returns (ranked, flagged_count, flagged_keys): the top `limit` windows as dicts with
+    `self_score` / `population_score` (L2 norms of each robust-z vector), `anomaly_score`
+    (the larger), `is_outlier`, and `reasons` tagged with the `basis` they were measured
+    against; flagged_keys is every flagged (ip_address, window_start), for the graph write.
+    """
+    n = len(columns["ip_address"])
+    if not n:
+        return [], 0, []
+    raw = np.column_stack([columns[f].astype(float) for f in BASE_FEATURES]
+                          + [np.asarray(fn(columns), dtype=float) for fn in RATIO_FEATURES.values()])
+    median, scale = robust_z_fit(raw)
+    population_z = robust_z_scores(raw, (median, scale))
+    _, groups = np.unique(columns["ip_address"], return_inverse=True)
+    self_z = group_robust_z(raw, groups, scale)
+    self_scores = np.linalg.norm(self_z, axis=1)
+    population_scores = np.linalg.norm(population_z, axis=1)
+    scores = np.maximum(self_scores, population_scores)
+    outlier = np.abs(self_z).max(axis=1) >= WINDOW_OUTLIER_Z
+    flagged = np.flatnonzero(outlier)
+    flagged_keys = [{"ip_address": columns["ip_address"][i], "window_start": int(columns["window_start"][i])} for i in flagged]
+
+    ranked = []
+    for i in np.argsort(-scores, kind="stable")[:limit]:
+        local = columns["org"][i] == LOCAL_ORG
+        reasons = []
+        for basis, z in (("self", self_z), ("population", population_z)):
+            for j in np.flatnonzero(np.abs(z[i]) >= REASON_Z_THRESHOLD):
+                name = WINDOW_FEATURE_NAMES[j]
+                reason = {
+                    "feature": name,
+                    "basis": basis,
+                    "value": round(float(raw[i, j]), 4),
+                    "unit": FEATURE_UNITS[name],
+                    "robust_z": round(float(z[i, j]), 2),
+                    "direction": "high" if z[i, j] > 0 else "low",
+                }
+                gloss = host_relative_gloss(name, local)
+                if gloss:
+                    reason["host_relative"] = gloss
+                reasons.append(reason)
+        reasons.sort(key=lambda r: abs(r["robust_z"]), reverse=True)
+        start = int(columns["window_start"][i])
+        entry = {
+            "ip_address": columns["ip_address"][i],
+            "org": columns["org"][i],
+            "window_start": datetime.fromtimestamp(start / 1000, timezone.utc).isoformat(),
+            "window_end": datetime.fromtimestamp(start / 1000 + window_seconds, timezone.utc).isoformat(),
+        }
+        entry.update({f: int(columns[f][i]) for f in BASE_FEATURES})
+        entry.update({
+            "self_score": round(float(self_scores[i]), 4),
+            "population_score": round(float(population_scores[i]), 4),
+            "anomaly_score": round(float(scores[i]), 4),
+            "is_outlier": bool(outlier[i]),
+            "reasons": reasons,
+        })
+        ranked.append(entry)
+    return ranked, len(flagged), flagged_keys
+
 
+def add_window_outliers_to_database(window_seconds, flagged_keys, driver, database):
+    # Same three-state OUTLIER as add_outlier_to_database, per window: every window of
+    # the scored size is reset to false, then the flagged ones set true.
+    reset_query = """
+    MATCH (w:ENDPOINT_WINDOW {WINDOW_SECONDS: $size})
+    SET w.OUTLIER = false
+    """
+    flag_query = """
+    UNWIND $flagged AS f
+    MATCH (w:ENDPOINT_WINDOW {WINDOW_SECONDS: $size, IP_ADDRESS: f.ip_address, WINDOW_START: f.window_start})
+    SET w.OUTLIER = true
+    """
+    with driver.session(database=database) as session:
+        session.run(reset_query, size=window_seconds)
+        session.run(flag_query, size=window_seconds, flagged=flagged_keys)
+        session.execute_write(bump_generation)
 
-def new_plotille_figure():
-    fig = plotille.Figure()
-    fig.register_label_formatter(float, _whole_number_formatter)
-    return fig
+
+def pca_chunk_rows(embeddings, components):
+    """Rows per streamed PCA chunk: about PCA_CHUNK_MB of float64, never fewer than components."""
+    return max(components, int(PCA_CHUNK_MB * 2**20 // (8 * max(1, embeddings.shape[1]))))
+
+
+def fit_text_pca(embeddings, components, whiten):
+    """Fit PCA on the embedding matrix and project it; returns (text_block, pca).
+
+    Exact in-memory PCA while the matrix, as the float64 PCA works in, is estimated
+    under PCA_MEMORY_LIMIT_MB. Above that, IncrementalPCA partially fits chunk by chunk
+    and a second pass projects each chunk, so only one chunk (plus the n × components
+    output) is resident — with the memory-mapped embedding sidecar the chunks stream
+    from disk. Both expose the same fitted attributes, so the baseline saves either.
+    """
+    n, dim = embeddings.shape
+    if n * dim * 8 <= PCA_MEMORY_LIMIT_MB * 2**20:
+        pca = PCA(n_components=components, whiten=whiten)
+        return pca.fit_transform(np.asarray(embeddings)), pca
+
+    chunk = pca_chunk_rows(embeddings, components)
+    # partial_fit needs at least `components` rows per batch, so a short tail chunk
+    # is folded into the one before it.
+    bounds = list(range(0, n, chunk))
+    if len(bounds) > 1 and n - bounds[-1] < components:
+        bounds.pop()
+    bounds.append(n)
+    pca = IncrementalPCA(n_components=components, whiten=whiten)
+    for start, stop in zip(bounds[:-1], bounds[1:]):
+        pca.partial_fit(np.asarray(embeddings[start:stop], dtype=np.float64))
+    text_block = np.empty((n, components))
+    for start, stop in zip(bounds[:-1], bounds[1:]):
+        text_block[start:stop] = pca.transform(np.asarray(embeddings[start:stop], dtype=np.float64))
+    return text_block, pca
 
 
 def build_feature_matrix(embeddings, data, components, whiten, feature_weight):
@@ -314,116 +604,225 @@ def build_feature_matrix(embeddings, data, components, whiten, feature_weight):
     contributes little instead of having its noise amplified to unit scale. The numeric
     block is log-scaled and standardized to unit variance, and `feature_weight` scales it
     relative to the text (0.0 = embedding-only / original behavior, higher = more
-    volume/fan-out influence). Returns (features_for_clustering, pca_object).
+    volume/fan-out influence). Returns (features_for_clustering, pca_object, scaler);
+    scaler is None when the numeric block is disabled.
     """
-    embeddings_array = np.array(embeddings)
-    pca = PCA(n_components=components, whiten=whiten)
-    text_block = pca.fit_transform(embeddings_array)
+    text_block, pca = fit_text_pca(embeddings, components, whiten)
 
     if feature_weight <= 0:
-        return text_block, pca
+        return text_block, pca, None
 
-    raw = build_numeric_features(data)
-    numeric_block = StandardScaler().fit_transform(np.log1p(raw))
+    scaler = StandardScaler()
+    numeric_block = scaler.fit_transform(np.log1p(build_numeric_features(data)))
     features = np.hstack([text_block, feature_weight * numeric_block])
-    return features, pca
-
-
-def fetch_data_for_dbscan(driver, database, include_local=False):
+    return features, pca, scaler
+
+
+def standardized_numeric_block(data):
+    """The behavioral block as clustered: log1p-scaled numeric features at unit variance."""
+    return StandardScaler().fit_transform(np.log1p(build_numeric_features(data)))
+
+
+def fetch_data_for_dbscan(driver, database, include_local=False, known_hashes=None, use_store=True):
+    # `known_hashes` (EMBEDDING_HASH values) restricts the fetch to endpoints whose
+    # embedding is not among them — the new/changed set --score projects onto a saved
+    # baseline, which records the hashes it was fit on. Content hashes rather than
+    # TIMESTAMP: jaws-compute re-stamps every endpoint it re-embeds, changed or not, and
+    # a database-clock stamp can't be compared with the baseline's own clock.
+    # Embeddings come from jaws-compute's memory-mapped sidecar when it exists (see
+    # jaws.embedding_store): the query then returns each endpoint's EMBEDDING_HASH
+    # instead of the vector, and only endpoints the sidecar lacks or holds a stale vector
+    # for are fetched from the graph. Returns (EndpointTable, excluded_local,
+    # embedding_source), where the source is "store", "graph", or "store+graph" for a
+    # partial hit. The RETURN order matches EndpointTable.from_rows, with the embedding
+    # and its hash last.
+    store = load_embedding_store(database) if use_store else None
     query = """
     MATCH (endpoint:ENDPOINT)
+    WHERE endpoint.EMBEDDING IS NOT NULL
+      AND ($known IS NULL OR endpoint.EMBEDDING_HASH IS NULL OR NOT endpoint.EMBEDDING_HASH IN $known)
     OPTIONAL MATCH (ip:IP_ADDRESS {IP_ADDRESS: endpoint.IP_ADDRESS})<-[:OWNERSHIP]-(org:ORGANIZATION)
     RETURN endpoint.IP_ADDRESS AS ip_address,
            COALESCE(endpoint.ORGANIZATION, org.ORGANIZATION, 'Unknown') AS org,
            COALESCE(endpoint.HOSTNAME, ip.HOSTNAME, 'Unknown') AS hostname,
            COALESCE(endpoint.LOCATION, ip.LOCATION, 'Unknown') AS location,
            endpoint.BYTES_OUT AS bytes_out,
-           endpoint.PACKETS_OUT AS packets_out,
-           endpoint.OUT_PEERS AS out_peers,
            endpoint.BYTES_IN AS bytes_in,
+           endpoint.PACKETS_OUT AS packets_out,
            endpoint.PACKETS_IN AS packets_in,
+           endpoint.OUT_PEERS AS out_peers,
            endpoint.IN_PEERS AS in_peers,
            endpoint.INTERVAL_MEAN AS interval_mean,
            endpoint.INTERVAL_CV AS interval_cv,
-           endpoint.EMBEDDING AS embedding
+           endpoint.PERIOD AS period,
+           endpoint.PERIODICITY AS periodicity,
+           CASE WHEN $with_vectors THEN endpoint.EMBEDDING END AS embedding,
+           endpoint.EMBEDDING_HASH AS embedding_hash
     """
     with driver.session(database=database) as session:
-        result = session.run(query)
-        embeddings = []
-        data = []
+        result = session.run(query, {"known": known_hashes, "with_vectors": store is None})
+        rows = []
+        vectors = []
+        hashes = []
         excluded_local = 0
         for record in result:
-            if record['embedding'] is not None:  # Only process endpoints with embeddings
-                if not include_local and record['org'] == LOCAL_ORG:
-                    excluded_local += 1
-                    continue
-                embeddings.append(np.array(record['embedding']))
-                data.append({
-                    'ip_address': record['ip_address'] or 'Unknown',
-                    'org': record['org'] or 'Unknown',
-                    'hostname': record['hostname'] or 'Unknown',
-                    'location': record['location'] or 'Unknown',
-                    'bytes_out': record['bytes_out'] or 0,
-                    'packets_out': record['packets_out'] or 0,
-                    'out_peers': record['out_peers'] or 0,
-                    'bytes_in': record['bytes_in'] or 0,
-                    'packets_in': record['packets_in'] or 0,
-                    'in_peers': record['in_peers'] or 0,
-                    # None when the endpoint had too few packets to time — kept as
-                    # None so build_numeric_features median-imputes it.
-                    'interval_mean': record['interval_mean'],
-                    'interval_cv': record['interval_cv'],
-                })
-        return embeddings, data, excluded_local
+            if not include_local and record['org'] == LOCAL_ORG:
+                excluded_local += 1
+                continue
+            values = record.values()
+            rows.append(values[:-2])
+            vectors.append(values[-2])
+            hashes.append(values[-1])
+
+    if store is None:
+        embeddings = np.array(vectors, dtype=np.float32) if vectors else np.empty((0, 0), dtype=np.float32)
+        return EndpointTable.from_rows(rows, embeddings, hashes), excluded_local, "graph"
+
+    embeddings, source = embeddings_from_store(driver, database, store, [r[0] for r in rows], hashes)
+    if embeddings is None:
+        return fetch_data_for_dbscan(driver, database, include_local, known_hashes, use_store=False)
+    return EndpointTable.from_rows(rows, embeddings, hashes), excluded_local, source
+
+
+def endpoint_table(profiles, embeddings, include_local=False, known_hashes=None):
+    """fetch_data_for_dbscan's result built from jaws-compute's in-memory profiles.
+
+    jaws-pipeline hands the profiles and vectors compute just wrote straight to the
+    finder, so they are not read back. Labels fall back to 'Unknown', and the local host
+    and `known_hashes` are excluded exactly as the graph read does — each vector hashes
+    to the EMBEDDING_HASH compute stored with it. The embedding source reads "memory".
+    """
+    known = set(known_hashes) if known_hashes is not None else set()
+    rows = []
+    vectors = []
+    hashes = []
+    excluded_local = 0
+    for profile, vector in zip(profiles, embeddings):
+        if not include_local and profile.get("org") == LOCAL_ORG:
+            excluded_local += 1
+            continue
+        content = embedding_hash(vector)
+        if content in known:
+            continue
+        rows.append(tuple(profile.get(name) for name in LABEL_COLUMNS + BASE_FEATURES + TIMING_FEATURES))
+        vectors.append(vector)
+        hashes.append(content)
+    matrix = np.array(vectors, dtype=np.float32) if vectors else np.empty((0, 0), dtype=np.float32)
+    return EndpointTable.from_rows(rows, matrix, hashes), excluded_local, "memory"
+
+
+def embeddings_from_store(driver, database, store, ips, hashes):
+    """Embedding rows for `ips` from the sidecar, topping up stale or missing rows from the graph.
+
+    A sidecar row is used only when its IP is indexed and its content hash equals the
+    graph's EMBEDDING_HASH. When every row is fresh and already in sidecar order the
+    memory map itself is returned (no copy), and for a fresh subset or reordering a
+    StoreRows view over it (read lazily); otherwise the rows are gathered in memory.
+    Returns (matrix, source), or (None, None) when the graph's vectors no longer share
+    the sidecar's dimension (a different embedding backend) and the caller should
+    read everything from the graph.
+    """
+    manifest, store_ips, store_hashes, matrix = store
+    row_of = {ip: i for i, ip in enumerate(store_ips)}
+    rows = np.array([row_of.get(ip, -1) for ip in ips], dtype=np.int64)
+    fresh = rows >= 0
+    fresh[fresh] = [store_hashes[r] == h for r, h in zip(rows[fresh].tolist(), np.array(hashes, dtype=object)[fresh])]
+    if fresh.all():
+        if len(rows) == len(matrix) and np.array_equal(rows, np.arange(len(matrix))):
+            return matrix, "store"
+        return StoreRows(matrix, rows), "store"
+
+    stale_ips = [ip for ip, ok in zip(ips, fresh.tolist()) if not ok]
+    query = """
+    UNWIND $ips AS ip_address
+    MATCH (endpoint:ENDPOINT {IP_ADDRESS: ip_address})
+    RETURN endpoint.IP_ADDRESS AS ip_address, endpoint.EMBEDDING AS embedding
+    """
+    with driver.session(database=database) as session:
+        fetched = {r["ip_address"]: r["embedding"] for r in session.run(query, {"ips": stale_ips})}
+    if any(fetched.get(ip) is None or len(fetched[ip]) != manifest["dim"] for ip in stale_ips):
+        return None, None
+    embeddings = np.empty((len(ips), manifest["dim"]), dtype=np.float32)
+    embeddings[fresh] = matrix[rows[fresh]]
+    embeddings[~fresh] = np.array([fetched[ip] for ip in stale_ips], dtype=np.float32)
+    return embeddings, "store+graph" if fresh.any() else "graph"
+
+
+# Bin widths of the size-over-port histogram. The database aggregates packets into
+# (size bin × port bin) counts, so the plot's cost depends on the number of occupied
+# bins — never on the packet count.
+PORTSIZE_SIZE_BIN = 64     # bytes
+PORTSIZE_PORT_BIN = 512    # ports → 128 bins across 0-65535
 
 
-def fetch_data_for_portsize(driver, database):
+def fetch_portsize_histogram(driver, database, size_bin=PORTSIZE_SIZE_BIN, port_bin=PORTSIZE_PORT_BIN):
+    """2D packet-count histogram of size × port, aggregated in Neo4j.
+
+    Reads the SIZE/SRC_PORT/DST_PORT properties straight off each PACKET (no
+    SENT/RECEIVED traversal) and returns only occupied bins. Returns a dict with
+    `size_edges` / `port_edges` (bin edges) and dense `src` / `dst` count grids shaped
+    (size bins, port bins) — one per port role.
+    """
     query = """
-    MATCH (src_port:PORT)-[:SENT]->(packet:PACKET)-[:RECEIVED]->(dst_port:PORT)
-    RETURN packet.SIZE AS size, src_port.PORT AS src_port, dst_port.PORT AS dst_port
+    MATCH (p:PACKET)
+    UNWIND [['src', p.SRC_PORT], ['dst', p.DST_PORT]] AS side
+    WITH side[0] AS role,
+         toInteger(p.SIZE) / $size_bin AS size_bin,
+         toInteger(side[1]) / $port_bin AS port_bin
+    RETURN role, size_bin, port_bin, count(*) AS packets
     """
     with driver.session(database=database) as session:
-        result = session.run(query)
-        plot_data = [{'size': record['size'], 'src_port': record['src_port'], 'dst_port': record['dst_port']}
-                     for record in result]
-    return plot_data
+        rows = [record.data() for record in session.run(query, {"size_bin": size_bin, "port_bin": port_bin})]
+    rows = [r for r in rows if r["size_bin"] is not None and r["port_bin"] is not None]
+
+    n_size = max((r["size_bin"] for r in rows), default=0) + 1
+    n_port = max((r["port_bin"] for r in rows), default=0) + 1
+    grids = {"src": np.zeros((n_size, n_port)), "dst": np.zeros((n_size, n_port))}
+    for r in rows:
+        grids[r["role"]][r["size_bin"], r["port_bin"]] = r["packets"]
+    return {
+        "size_edges": np.arange(n_size + 1) * size_bin,
+        "port_edges": np.arange(n_port + 1) * port_bin,
+        **grids,
+    }
 
 
 def fetch_host_outbound(driver, database):
-    """Aggregate the capture host's outbound traffic per destination, from raw packets.
+    """Aggregate the capture host's outbound traffic per destination, from conversation rollups.
 
     Finds the host IP(s) (owned by LOCAL_ORG), then for every peer the host exchanged
     packets with sums the host's upload (host as SOURCE) and download (host as
     DESTINATION) separately — so each row is the true host→peer flow, not the peer's total
-    inbound from every source. Rows are restricted to peers the host actually sent to
-    (upload_packets > 0). Returns (local_ips, rows); local_ips is empty when the host was
-    never captured (e.g. an imported pcap with no local endpoint), in which case rows is
-    empty too and the caller surfaces an empty host-outbound view rather than crashing.
+    inbound from every source. Reads the CONVERSATION relationships capture maintains
+    (see jaws_utils.rollup_conversations), so the cost is the host's degree, not its packet
+    count. Rows are restricted to peers the host actually sent to (upload_packets > 0).
+    Returns (local_ips, rows); local_ips is empty when the host was never captured (e.g. an
+    imported pcap with no local endpoint), in which case rows is empty too and the caller
+    surfaces an empty host-outbound view rather than crashing.
     """
     local_query = """
     MATCH (org:ORGANIZATION {ORGANIZATION: $local_org})-[:OWNERSHIP]->(ip:IP_ADDRESS)
     RETURN collect(ip.IP_ADDRESS) AS local_ips
     """
-    # peer = the non-local side of each packet; outbound = the host was the source. Group
-    # by peer, split bytes/packets by direction, then join the peer's OSINT metadata.
+    # peer = the non-local end of each host conversation; outbound = the host is its
+    # source. Group by peer, split bytes/packets by direction, then join the peer's OSINT
+    # metadata straight off the peer node.
     peer_query = """
-    MATCH (p:PACKET)
-    WHERE p.SRC_IP IN $local_ips OR p.DST_IP IN $local_ips
-    WITH p,
-         CASE WHEN p.SRC_IP IN $local_ips THEN p.DST_IP ELSE p.SRC_IP END AS peer,
-         (p.SRC_IP IN $local_ips) AS outbound
-    WHERE NOT peer IN $local_ips AND peer <> '0.0.0.0'
+    MATCH (host:IP_ADDRESS)-[c:CONVERSATION]-(peer:IP_ADDRESS)
+    WHERE host.IP_ADDRESS IN $local_ips
+      AND NOT peer.IP_ADDRESS IN $local_ips AND peer.IP_ADDRESS <> '0.0.0.0'
+    WITH peer, c, startNode(c) = host AS outbound
     WITH peer,
-         sum(CASE WHEN outbound THEN p.SIZE ELSE 0 END) AS upload_bytes,
-         sum(CASE WHEN outbound THEN 1 ELSE 0 END) AS upload_packets,
-         sum(CASE WHEN NOT outbound THEN p.SIZE ELSE 0 END) AS download_bytes,
-         sum(CASE WHEN NOT outbound THEN 1 ELSE 0 END) AS download_packets
+         sum(CASE WHEN outbound THEN c.BYTES ELSE 0 END) AS upload_bytes,
+         sum(CASE WHEN outbound THEN c.PACKETS ELSE 0 END) AS upload_packets,
+         sum(CASE WHEN NOT outbound THEN c.BYTES ELSE 0 END) AS download_bytes,
+         sum(CASE WHEN NOT outbound THEN c.PACKETS ELSE 0 END) AS download_packets
     WHERE upload_packets > 0
-    OPTIONAL MATCH (pip:IP_ADDRESS {IP_ADDRESS: peer})<-[:OWNERSHIP]-(porg:ORGANIZATION)
-    RETURN peer AS ip_address,
+    OPTIONAL MATCH (peer)<-[:OWNERSHIP]-(porg:ORGANIZATION)
+    RETURN peer.IP_ADDRESS AS ip_address,
            COALESCE(porg.ORGANIZATION, 'Unknown') AS org,
-           COALESCE(pip.HOSTNAME, 'Unknown') AS hostname,
-           COALESCE(pip.LOCATION, 'Unknown') AS location,
+           COALESCE(peer.HOSTNAME, 'Unknown') AS hostname,
+           COALESCE(peer.LOCATION, 'Unknown') AS location,
            upload_bytes, upload_packets, download_bytes, download_packets
     ORDER BY upload_bytes DESC
     """
@@ -455,84 +854,175 @@ def add_outlier_to_database(scored_list, flagged_list, driver, database):
     with driver.session(database=database) as session:
         session.run(reset_query, {'scored': [e['ip_address'] for e in scored_list]})
         session.run(flag_query, {'outliers': flagged_list})
+        session.execute_write(bump_generation)
+
+
+# Saved finder baseline for incremental scoring (--fit / --score): the fitted PCA,
+# scaler and robust-z statistics plus the DBSCAN core samples, so new endpoints are
+# projected and judged against the population without refitting, and the EMBEDDING_HASH
+# of every endpoint it was fit on, so --score can pick out the new/changed ones. Bump
+# BASELINE_VERSION whenever the artifact's fields or the feature definitions change —
+# an artifact of another version is refit rather than misread. The baseline's PCA only
+# means something for vectors from the model it was fit on, so it records that model
+# (the embedding sidecar's, or the one jaws-pipeline hands over) and --score refits when
+# the current embeddings came from another one — or from the hashing backend, whose SVD
+# basis changes with every compute run even at the same dimension.
+BASELINE_VERSION = 4
+BASELINE_FILE = "finder_baseline.npz"
+
+
+def baseline_path(database):
+    return os.path.join(DATA_DIR, database, BASELINE_FILE)
+
+
+def fit_baseline(data, features, pca, scaler, graph, eps, min_samples, feature_weight, include_local, embedding_model):
+    """Capture everything --score needs from a completed clustering run."""
+    fill = timing_medians(data)
+    z_median, z_scale = robust_z_fit(build_numeric_features(data, fill))
+    core = dbscan_core_mask(graph, eps, min_samples)
+    return {
+        "meta": {
+            "version": BASELINE_VERSION,
+            "fitted_at": datetime.now(timezone.utc).isoformat(),
+            "endpoints": len(data),
+            "core_samples": int(core.sum()),
+            "embedding_dim": int(pca.mean_.shape[0]),
+            "embedding_model": embedding_model,
+            "components": int(pca.n_components_),
+            "whiten": bool(pca.whiten),
+            "feature_weight": float(feature_weight),
+            "eps": float(eps),
+            "min_samples": int(min_samples),
+            "include_local": bool(include_local),
+        },
+        "pca_mean": pca.mean_,
+        "pca_components": pca.components_,
+        "pca_variance": pca.explained_variance_,
+        "scaler_mean": scaler.mean_ if scaler is not None else np.empty(0),
+        "scaler_scale": scaler.scale_ if scaler is not None else np.empty(0),
+        "z_median": z_median,
+        "z_scale": z_scale,
+        "timing_fill": np.array(fill),
+        "core_samples": features[core].astype(np.float32),
+        "embedding_hashes": np.array([h for h in data["embedding_hash"] if h], dtype=str),
+    }
+
+
+def save_baseline(path, baseline):
+    # Written to a temp file and renamed so a concurrent --score never reads a torn artifact.
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    arrays = {k: v for k, v in baseline.items() if k != "meta"}
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as fh:
+        np.savez(fh, meta=np.array(json.dumps(baseline["meta"])), **arrays)
+    os.replace(tmp, path)
+
+
+def load_baseline(path):
+    """The saved baseline, or None when it is missing, unreadable or another version."""
+    try:
+        with np.load(path) as archive:
+            meta = json.loads(str(archive["meta"]))
+            if meta.get("version") != BASELINE_VERSION:
+                return None
+            return {"meta": meta, **{k: archive[k] for k in archive.files if k != "meta"}}
+    except (OSError, ValueError, KeyError):
+        return None
 
 
-def plot_size_over_ports(plot_data, jaws_finder_endpoint):
-    plt.figure(num='Packet Size over Ports', figsize=(6, 4))
-    for item in plot_data:
-        plt.scatter(item['size'], item['src_port'], c=item['size'], cmap='winter', marker='^', s=50, alpha=0.1, zorder=10)
-        plt.scatter(item['size'], item['dst_port'], c=item['size'], cmap='ocean', marker='^', s=50, alpha=0.1, zorder=10)
-
-    plt.xlabel('SIZE', fontsize=8, color='#666666')
-    plt.ylabel('PORT', fontsize=8, color='#666666')
-    plt.legend(['SRC_PORT', 'DST_PORT'], loc='upper right', fontsize=8)
-    plt.xticks(fontsize=8)
-    plt.yticks(fontsize=8)
-    plt.grid(True, linewidth=0.5, color='#BEBEBE', alpha=0.5)
-    plt.tight_layout()
-    save_portsize = os.path.join(jaws_finder_endpoint, 'size_over_port.png')
-    plt.savefig(save_portsize, dpi=90)
-
-    portsize_plotille = new_plotille_figure()
-    portsize_plotille.x_label = 'SIZE'
-    portsize_plotille.y_label = 'PORT'
-    portsize_plotille.color_mode = 'byte'
-    portsize_plotille.width = 80
-    portsize_plotille.height = 20
-    portsize_plotille.set_x_limits(min_=0)
-    portsize_plotille.set_y_limits(min_=0)
-    for item in plot_data:
-        portsize_plotille.scatter([item['size']], [item['src_port']], marker=">")
-        portsize_plotille.scatter([item['size']], [item['dst_port']], marker="<")
-    display_portsize = portsize_plotille.show(legend=False)
-    print(display_portsize)
-
-
-def plot_k_distances(sorted_k_distances, jaws_finder_endpoint):
-    plt.figure(num='Sorted K-Distance', figsize=(6, 2))
-    plt.plot(sorted_k_distances, color='seagreen', marker='o', linestyle='-', linewidth=0.5, alpha=0.8)
-    plt.grid(color='#BEBEBE', linestyle='-', linewidth=0.25, alpha=0.5)
-    plt.xlabel('INDEX', fontsize=8, color='#666666')
-    plt.ylabel('K-DISTANCE', fontsize=8, color='#666666')
-    plt.xticks(fontsize=8)
-    plt.yticks(fontsize=8)
-    plt.tight_layout()
-    save_kdistance = os.path.join(jaws_finder_endpoint, 'sorted_k_distance.png')
-    plt.savefig(save_kdistance, dpi=90)
-
-    kdistance_plotille = new_plotille_figure()
-    kdistance_plotille.x_label = 'INDEX'
-    kdistance_plotille.y_label = 'K-DISTANCE'
-    kdistance_plotille.color_mode = 'byte'
-    kdistance_plotille.width = 80
-    kdistance_plotille.height = 20
-    kdistance_plotille.set_x_limits(min_=0)
-    kdistance_plotille.set_y_limits(min_=0)
-    plotille_plot_x = list(range(len(sorted_k_distances)))
-    kdistance_plotille.plot(plotille_plot_x, sorted_k_distances, marker="o", lc=40)
-    display_kdistance = kdistance_plotille.show(legend=False)
-    print(display_kdistance)
-
-
-def recommend_eps(features, min_samples):
-    """Knee-recommended DBSCAN eps for a feature space, with a median fallback.
-
-    The same auto-eps procedure main() uses, factored out so the ablation can tune
-    each condition's space by an identical rule (a fixed eps is meaningless across
-    spaces of different scale/dimensionality).
+def current_embedding_model(database, handoff=None):
+    """The model that embedded the endpoints: jaws-pipeline's handoff, else the sidecar manifest's (None when unknown)."""
+    if handoff is not None and "embedding_model" in handoff:
+        return handoff["embedding_model"]
+    manifest = load_manifest(database)
+    return manifest.get("model") if manifest else None
+
+
+def baseline_stale_reason(meta, embedding_model):
+    """Why a saved baseline can't score the current embeddings, or None when it can."""
+    if baseline_age_hours(meta) > BASELINE_MAX_AGE_HOURS:
+        return f"Baseline is older than {BASELINE_MAX_AGE_HOURS:g}h"
+    if HASHING_MODEL_NAME in (meta["embedding_model"], embedding_model):
+        return "Hashing embeddings are refit by every jaws-compute run, so no baseline can score them"
+    if embedding_model is None:
+        return "The model behind the current embeddings is unknown (no embedding sidecar)"
+    if embedding_model != meta["embedding_model"]:
+        return f"Embeddings now come from {embedding_model}, not the baseline's {meta['embedding_model']}"
+    return None
+
+
+def baseline_age_hours(meta):
+    fitted_at = datetime.fromisoformat(meta["fitted_at"])
+    return (datetime.now(timezone.utc) - fitted_at).total_seconds() / 3600.0
+
+
+def project_onto_baseline(baseline, embeddings, data):
+    """Map endpoints into a baseline's clustering space with its fitted PCA and scaler."""
+    meta = baseline["meta"]
+    components = baseline["pca_components"]
+    text = np.empty((len(embeddings), components.shape[0]))
+    chunk = pca_chunk_rows(embeddings, components.shape[0])
+    for start in range(0, len(embeddings), chunk):
+        block = np.asarray(embeddings[start:start + chunk], dtype=float)
+        text[start:start + chunk] = (block - baseline["pca_mean"]) @ components.T
+    if meta["whiten"]:
+        text /= np.sqrt(baseline["pca_variance"])
+    if meta["feature_weight"] <= 0:
+        return text
+    raw = build_numeric_features(data, baseline["timing_fill"].tolist())
+    numeric = (np.log1p(raw) - baseline["scaler_mean"]) / baseline["scaler_scale"]
+    return np.hstack([text, meta["feature_weight"] * numeric])
+
+
+def score_against_baseline(baseline, embeddings, data):
+    """Score endpoints against a saved baseline without refitting anything.
+
+    An endpoint is flagged by DBSCAN's own membership rule: it joins a cluster only if it
+    lies within eps of a core sample, so `core_distance` (to the nearest baseline core
+    sample) > eps marks it an outlier. anomaly_score and reasons use the baseline's
+    robust-z medians/MADs, so a few new endpoints are judged against the population
+    rather than against each other. Returns the ranked list (see score_endpoints), each
+    entry carrying its `core_distance`.
     """
-    nearest_neighbors = NearestNeighbors(n_neighbors=min_samples)
-    nearest_neighbors.fit(features)
-    distances, _ = nearest_neighbors.kneighbors(features)
-    sorted_k_distances = np.sort(distances[:, min_samples - 1])
-    kneedle = KneeLocator(range(len(sorted_k_distances)), sorted_k_distances,
-                          curve='convex', direction='increasing')
-    if kneedle.knee is not None:
-        return float(sorted_k_distances[int(kneedle.knee)])
-    return float(np.median(sorted_k_distances))
-
-
-def run_ablation(embeddings, data, components, whiten, feature_weight):
+    meta = baseline["meta"]
+    features = project_onto_baseline(baseline, embeddings, data)
+    core = baseline["core_samples"]
+    if len(core):
+        core_distance = NearestNeighbors(n_neighbors=1).fit(core).kneighbors(features)[0][:, 0]
+    else:
+        core_distance = np.full(len(data), np.inf)
+    labels = np.where(core_distance > meta["eps"], -1, 0)
+    ranked = score_endpoints(data, labels, (baseline["z_median"], baseline["z_scale"]),
+                             baseline["timing_fill"].tolist())
+    distance_by_ip = dict(zip(data["ip_address"].tolist(), core_distance.tolist()))
+    for entry in ranked:
+        dist = distance_by_ip[entry["ip_address"]]
+        entry["core_distance"] = round(float(dist), 4) if np.isfinite(dist) else None
+    return ranked
+
+
+# Bootstrapped ablation: besides the full-data run, each condition is re-clustered on
+# ABLATION_BOOTSTRAP random subsamples of ABLATION_SUBSAMPLE of the endpoints, and every
+# statistic is reported with its mean and ABLATION_CI percentile interval. Subsamples are
+# drawn without replacement: a with-replacement resample duplicates endpoints, and
+# duplicates are dense by construction, which would turn lone outliers into DBSCAN cores.
+ABLATION_BOOTSTRAP = 16
+ABLATION_SUBSAMPLE = 0.8
+ABLATION_CI = 0.95
+
+
+def _interval(values):
+    """Mean and ABLATION_CI percentile interval of the defined values, or None when there are none."""
+    values = np.array([v for v in values if v is not None], dtype=float)
+    if not len(values):
+        return None
+    tail = 50 * (1 - ABLATION_CI)
+    low, high = np.percentile(values, [tail, 100 - tail])
+    return {"mean": round(float(values.mean()), 4), "ci_low": round(float(low), 4),
+            "ci_high": round(float(high), 4), "n": int(len(values))}
+
+
+def run_ablation(embeddings, data, components, whiten, feature_weight, bootstrap=ABLATION_BOOTSTRAP, workers=None):
     """Compare three feature-block conditions on the SAME endpoints, no DB writes.
 
     Answers "how much does the text embedding actually contribute vs the behavioral
@@ -541,61 +1031,96 @@ def run_ablation(embeddings, data, components, whiten, feature_weight):
     (silhouette) plus which endpoints each flags (outlier sets + pairwise Jaccard).
 
       text-only    — the stored embedding alone (feature_weight 0)
-      numeric-only — the 12 behavioral features alone, no embedding
+      numeric-only — the 14 behavioral features alone, no embedding
       blended      — both, at the requested feature_weight
 
+    The condition spaces are built once; the full-data run and `bootstrap` subsample
+    runs of every condition are independent tasks (see detectors.map_tasks), and each
+    subsample is shared by the three conditions so their Jaccard compares like with like. The
+    `bootstrap` section gives the mean and confidence interval of every statistic.
     Reuses embeddings already on the nodes — nothing is re-embedded.
     """
-    text_only, _ = build_feature_matrix(embeddings, data, components, whiten, 0.0)
-    numeric_only = StandardScaler().fit_transform(np.log1p(build_numeric_features(data)))
-    blended, _ = build_feature_matrix(embeddings, data, components, whiten,
+    text_only, _, _ = build_feature_matrix(embeddings, data, components, whiten, 0.0)
+    numeric_only = standardized_numeric_block(data)
+    blended, _, _ = build_feature_matrix(embeddings, data, components, whiten,
                                       feature_weight if feature_weight > 0 else 1.0)
     conditions = {"text-only": text_only, "numeric-only": numeric_only, "blended": blended}
+    names = list(conditions)
 
     min_samples = 2 * components
-    ips = [d["ip_address"] for d in data]
+    n = len(data)
+    size = max(min_samples + 1, int(round(ABLATION_SUBSAMPLE * n)))
+    rng = np.random.default_rng(0)
+    samples = [np.arange(n)] + [np.sort(rng.choice(n, size, replace=False)) for _ in range(bootstrap if size < n else 0)]
+    tasks = [(conditions[name][rows], min_samples) for rows in samples for name in names]
+    outcomes = map_tasks(ablation_condition, tasks, workers)
+
+    # runs[s][name]: the outcome of condition `name` on sample s, its outlier indices
+    # mapped back to endpoint rows so sets from different samples are comparable.
+    runs = []
+    for s, rows in enumerate(samples):
+        run = {}
+        for k, name in enumerate(names):
+            outcome = outcomes[s * len(names) + k]
+            outcome["outliers"] = set(rows[outcome.pop("outlier_indices")].tolist())
+            run[name] = outcome
+        runs.append(run)
+
+    pairs = [(names[i], names[j]) for i in range(len(names)) for j in range(i + 1, len(names))]
+    ips = data["ip_address"].tolist()
+    full = runs[0]
     summaries = {}
-    outlier_sets = {}
-    for name, feats in conditions.items():
-        eps = recommend_eps(feats, min_samples)
-        labels = DBSCAN(eps=eps, min_samples=min_samples).fit_predict(feats)
-        clustered = labels != -1
-        n_clusters = len(set(labels[clustered]))
-        # silhouette needs >=2 clusters and more clustered points than clusters.
-        sil = None
-        if n_clusters >= 2 and clustered.sum() > n_clusters:
-            try:
-                sil = float(silhouette_score(feats[clustered], labels[clustered]))
-            except ValueError:
-                sil = None
-        outlier_sets[name] = {ips[i] for i in range(len(ips)) if labels[i] == -1}
+    for name in names:
+        sil = full[name]["silhouette"]
         summaries[name] = {
-            "dims": int(feats.shape[1]),
-            "eps": round(eps, 4),
-            "clusters": int(n_clusters),
-            "outliers": int((~clustered).sum()),
+            "dims": int(conditions[name].shape[1]),
+            "eps": round(full[name]["eps"], 4),
+            "clusters": full[name]["clusters"],
+            "outliers": len(full[name]["outliers"]),
             "silhouette": round(sil, 4) if sil is not None else None,
         }
-
     # Pairwise Jaccard of the flagged sets — high overlap means text is decorative
     # (numeric drives the flags); low overlap means the embedding changes outcomes.
-    names = list(conditions)
-    jaccard = {}
-    for i in range(len(names)):
-        for j in range(i + 1, len(names)):
-            a, b = outlier_sets[names[i]], outlier_sets[names[j]]
-            union = a | b
-            jaccard[f"{names[i]} vs {names[j]}"] = round(len(a & b) / len(union), 4) if union else 1.0
+    jaccard = {f"{a} vs {b}": round(_jaccard(full[a]["outliers"], full[b]["outliers"]), 4) for a, b in pairs}
+
+    resampled = runs[1:]
+    stats = None
+    if resampled:
+        stats = {
+            "resamples": len(resampled),
+            "subsample_fraction": ABLATION_SUBSAMPLE,
+            "ci": ABLATION_CI,
+            "conditions": {
+                name: {
+                    "eps": _interval([r[name]["eps"] for r in resampled]),
+                    "clusters": _interval([r[name]["clusters"] for r in resampled]),
+                    "outliers": _interval([len(r[name]["outliers"]) for r in resampled]),
+                    "silhouette": _interval([r[name]["silhouette"] for r in resampled]),
+                }
+                for name in names
+            },
+            "outlier_jaccard": {
+                f"{a} vs {b}": _interval([_jaccard(r[a]["outliers"], r[b]["outliers"]) for r in resampled])
+                for a, b in pairs
+            },
+        }
 
     return {
-        "endpoints": len(data),
+        "endpoints": n,
         "min_samples": min_samples,
         "conditions": summaries,
         "outlier_jaccard": jaccard,
-        "outlier_sets": {k: sorted(v) for k, v in outlier_sets.items()},
+        "outlier_sets": {name: sorted(ips[i] for i in full[name]["outliers"]) for name in names},
+        "bootstrap": stats,
     }
 
 
+def _format_interval(stat, width):
+    if stat is None:
+        return f"{'n/a':>{width}}"
+    return f"{stat['mean']:.3f} [{stat['ci_low']:.3f}, {stat['ci_high']:.3f}]".rjust(width)
+
+
 def format_ablation_table(result):
     """Render the ablation result as a fixed-width text table for the reporter."""
     header = f"{'CONDITION':<13}{'DIMS':>5}{'EPS':>9}{'CLUSTERS':>10}{'OUTLIERS':>10}{'SILHOUETTE':>12}"
@@ -607,10 +1132,138 @@ def format_ablation_table(result):
     rows.append("Outlier-set agreement (Jaccard):")
     for pair, jac in result["outlier_jaccard"].items():
         rows.append(f"  {pair:<28}{jac:.4f}")
+
+    stats = result["bootstrap"]
+    if stats is not None:
+        rows.append("")
+        rows.append(f"Bootstrap: mean [{stats['ci']:.0%} CI] over {stats['resamples']} subsamples of "
+                    f"{stats['subsample_fraction']:.0%} of the endpoints")
+        rows.append(f"{'CONDITION':<13}{'OUTLIERS':>28}{'SILHOUETTE':>28}")
+        for name, s in stats["conditions"].items():
+            rows.append(f"{name:<13}{_format_interval(s['outliers'], 28)}{_format_interval(s['silhouette'], 28)}")
+        for pair, jac in stats["outlier_jaccard"].items():
+            rows.append(f"  {pair:<28}{_format_interval(jac, 28)}")
     return "\n".join(rows)
 
 
-def main():
+# Default sweep grid. eps defaults to fractions of each space's own knee eps (the knee
+# tends to overshoot on small captures; 50-70% of it is the usual manual retry), since an
+# absolute eps is meaningless across spaces of different dimensionality and weighting.
+SWEEP_COMPONENTS = [2, 3, 4]
+SWEEP_FEATURE_WEIGHTS = [0.0, 0.5, 1.0, 2.0]
+SWEEP_EPS_SCALES = [0.5, 0.6, 0.7, 0.85, 1.0]
+# Outliers are the rare case: a cell flagging more than this share of endpoints has
+# an eps too small for its space (large flagged sets also look trivially "stable"), so
+# it is never recommended as `best`.
+SWEEP_MAX_OUTLIER_FRACTION = 0.1
+
+
+def _jaccard(a, b):
+    union = a | b
+    return len(a & b) / len(union) if union else 1.0
+
+
+def run_sweep(embeddings, data, components_grid, weight_grid, eps_grid, whiten, workers=None):
+    """Evaluate a components × feature_weight × eps grid in one process, no DB writes.
+
+    The fetched endpoints are shared by every cell, PCA is fit ONCE at the largest
+    component count (a smaller count is a prefix of the same projection), and the numeric
+    block is standardized once. Each (components, feature_weight) space is one task (see
+    detectors.map_tasks): it builds its neighbor graph once and re-clusters it at every eps.
+
+    Per cell: outlier/cluster counts, silhouette, and `stability` — the mean Jaccard of
+    its outlier set with the cells one grid step away on any single axis, so a setting
+    whose flags survive small parameter changes scores high. `best` is the most stable
+    cell that flags at least one outlier and at most SWEEP_MAX_OUTLIER_FRACTION of the
+    endpoints (silhouette breaks ties); None when no cell qualifies.
+    """
+    components_grid = sorted({max(2, int(c)) for c in components_grid})
+    weight_grid = sorted({float(w) for w in weight_grid})
+    max_components = min(components_grid[-1], len(data), embeddings.shape[1])
+    components_grid = [c for c in components_grid if c <= max_components] or [max_components]
+
+    text, _ = fit_text_pca(embeddings, max_components, whiten)
+    numeric = standardized_numeric_block(data)
+    spaces = [(c, w) for c in components_grid for w in weight_grid]
+
+    def space_features(c, w):
+        return text[:, :c] if w <= 0 else np.hstack([text[:, :c], w * numeric])
+
+    tasks = [(space_features(c, w), 2 * c, eps_grid, SWEEP_EPS_SCALES) for c, w in spaces]
+    outcomes = map_tasks(sweep_space, tasks, workers)
+
+    ips = data["ip_address"].tolist()
+    grid = {}
+    knee = {}
+    for (c, w), (knee_eps, cells) in zip(spaces, outcomes):
+        knee[(c, w)] = knee_eps
+        for k, cell in enumerate(cells):
+            grid[(components_grid.index(c), weight_grid.index(w), k)] = {
+                "components": c, "feature_weight": w, "min_samples": 2 * c, **cell,
+            }
+
+    for (ci, wi, ei), cell in grid.items():
+        flagged = set(cell["outlier_indices"].tolist())
+        neighbors = [grid[key] for key in ((ci - 1, wi, ei), (ci + 1, wi, ei), (ci, wi - 1, ei),
+                                           (ci, wi + 1, ei), (ci, wi, ei - 1), (ci, wi, ei + 1)) if key in grid]
+        scores = [_jaccard(flagged, set(n["outlier_indices"].tolist())) for n in neighbors]
+        cell["stability"] = round(float(np.mean(scores)), 4) if scores else None
+
+    cells = [grid[key] for key in sorted(grid)]
+    max_outliers = SWEEP_MAX_OUTLIER_FRACTION * len(data)
+    candidates = [c for c in cells if 0 < c["outliers"] <= max_outliers]
+    best = max(candidates, key=lambda c: (c["stability"] or 0.0,
+                                          c["silhouette"] if c["silhouette"] is not None else -1.0),
+               default=None)
+    if best is not None:
+        best = {**best, "outlier_ips": sorted(ips[i] for i in best["outlier_indices"])}
+        del best["outlier_indices"]
+    for cell in cells:
+        del cell["outlier_indices"]
+
+    return {
+        "endpoints": len(data),
+        "whiten": whiten,
+        "grid": {
+            "components": components_grid,
+            "feature_weight": weight_grid,
+            "eps": eps_grid if eps_grid is not None else {"knee_scales": SWEEP_EPS_SCALES},
+        },
+        "knee_eps": [{"components": c, "feature_weight": w, "eps": round(float(e), 4)} for (c, w), e in knee.items()],
+        "cells": cells,
+        "best": best,
+    }
+
+
+def format_sweep_table(result):
+    """Render the sweep cells as a fixed-width text table for the reporter."""
+    header = f"{'COMP':>5}{'WEIGHT':>8}{'EPS':>9}{'CLUSTERS':>10}{'OUTLIERS':>10}{'SILHOUETTE':>12}{'STABILITY':>11}"
+    rows = [header]
+    for c in result["cells"]:
+        sil = "n/a" if c["silhouette"] is None else f"{c['silhouette']:.4f}"
+        stab = "n/a" if c["stability"] is None else f"{c['stability']:.4f}"
+        rows.append(f"{c['components']:>5}{c['feature_weight']:>8.2f}{c['eps']:>9.4f}{c['clusters']:>10}{c['outliers']:>10}{sil:>12}{stab:>11}")
+    best = result["best"]
+    rows.append("")
+    if best is None:
+        rows.append("No setting flagged a plausible number of outliers.")
+    else:
+        rows.append(f"Best: --components {best['components']} --feature-weight {best['feature_weight']} --eps {best['eps']} "
+                    f"({best['outliers']} outlier(s), stability {best['stability']})")
+    return "\n".join(rows)
+
+
+def _float_list(text):
+    """argparse type: comma-separated floats, e.g. '0,0.5,1'."""
+    try:
+        return [float(v) for v in text.split(",") if v.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected comma-separated numbers, got {text!r}")
+
+
+def main(argv=None, reporter=None, handoff=None):
+    # `handoff` (jaws-pipeline): when jaws-compute left its embedded profiles in it, they
+    # are clustered directly instead of being fetched back from the graph.
     parser = argparse.ArgumentParser(description="Perform DBSCAN clustering on embeddings fetched from the database.")
     parser.add_argument("--database", default=DATABASE, help=f"Specify the database to connect to (default: '{DATABASE}').")
     parser.add_argument("--components", type=int, default=2, help="Number of PCA components to retain for clustering. The first 2 are always used for plotting, so values below 2 are clamped (default: 2).")
@@ -619,20 +1272,120 @@ def main():
     parser.add_argument("--feature-weight", type=float, default=1.0, help="Influence of the behavioral numeric features (bytes/packets/peers, in & out) on clustering. The numeric block is standardized to unit variance and scaled by this weight; the text embedding keeps its natural scale. 0 = embedding-only (text/org/protocol structure), higher = more volume/fan-out influence to surface behavioral anomalies. Default 1.0.")
     parser.add_argument("--include-local", action="store_true", help="Include the capture host ('YOU ARE HERE') in the clustered set. Off by default — it is a structural hub that dominates clustering. Its outbound traffic still appears as each remote endpoint's inbound, so outbound anomalies are detectable without it.")
     parser.add_argument("--ablate", action="store_true", help="Ablation mode: cluster the same endpoints three ways — text-only (embedding alone), numeric-only (behavioral features alone), and blended — and report cluster quality (silhouette) and outlier-set agreement (Jaccard) to quantify how much the embedding contributes. Reuses stored embeddings, writes nothing, generates no plots.")
-    args = parser.parse_args()
-    reporter = Reporter()
+    parser.add_argument("--bootstrap", type=int, default=ABLATION_BOOTSTRAP, help=f"Subsample resamples per --ablate condition, run alongside the full-data run (across cores on large captures); the result adds the mean and {ABLATION_CI * 100:.0f}%% confidence interval of each statistic (default: {ABLATION_BOOTSTRAP}; 0 = full-data run only).")
+    parser.add_argument("--sweep", action="store_true", help="Sweep mode: evaluate a grid of --sweep-components × --sweep-weights × --sweep-eps in one process (shared fetch and PCA fit, grid spaces clustered across cores on large captures) and report outlier counts, silhouette and outlier-set stability per cell, plus the best setting. Writes nothing, generates no plots.")
+    parser.add_argument("--sweep-components", type=_float_list, default=SWEEP_COMPONENTS, help=f"Comma-separated PCA component counts for --sweep (default: {','.join(map(str, SWEEP_COMPONENTS))}).")
+    parser.add_argument("--sweep-weights", type=_float_list, default=SWEEP_FEATURE_WEIGHTS, help=f"Comma-separated feature weights for --sweep (default: {','.join(map(str, SWEEP_FEATURE_WEIGHTS))}).")
+    parser.add_argument("--sweep-eps", type=_float_list, default=None, help=f"Comma-separated absolute eps values for --sweep. When omitted, each space is swept at {','.join(map(str, SWEEP_EPS_SCALES))} × its own knee eps.")
+    parser.add_argument("--fit", action="store_true", help="Run the normal clustering and also save it as the baseline (PCA, scaler, robust-z medians/MADs, DBSCAN core samples) that --score projects new endpoints onto. Schedule it to refresh the baseline.")
+    parser.add_argument("--score", action="store_true", help=f"Incremental mode: score only endpoints whose embedding is new or changed since the saved baseline (by EMBEDDING_HASH), projecting them with its fitted models and flagging by DBSCAN's core-distance rule — no refit. Falls back to a full --fit when the baseline is missing, older than {BASELINE_MAX_AGE_HOURS:g}h (JAWS_BASELINE_MAX_AGE_HOURS), or fit on embeddings from a different model or dimension. Hashing embeddings (jaws-compute --api hashing) are re-based by every compute run, so they always refit.")
+    parser.add_argument("--detector", choices=list(DETECTORS), default=DEFAULT_DETECTOR, help=f"Outlier detector run on the feature matrix (default: {DEFAULT_DETECTOR}). dbscan flags endpoints outside every dense cluster at --eps; hdbscan needs no eps; isolation-forest scales linearly and suits very large captures; lof flags endpoints sparse relative to their own neighbors. All set is_outlier and a continuous detector_score per endpoint. --fit/--score, --ablate and --sweep are DBSCAN-only.")
+    parser.add_argument("--windows", nargs="?", type=parse_window, const=0, default=None, metavar="WINDOW", help="Window mode: score the ENDPOINT_WINDOW profiles written by jaws-compute --window instead of the endpoints — each window against the population of windows and against its own IP's other windows — flag bursts that depart from an IP's own history, and report the top-ranked windows. Optionally names the window size (e.g. 5m); defaults to the most recently written size. Writes OUTLIER on the windows only, generates no plots.")
+    parser.add_argument("--no-store", action="store_true", help="Read every embedding from the graph, ignoring the memory-mapped sidecar jaws-compute writes under JAWS_DATA_DIR. By default the sidecar is used for every endpoint whose EMBEDDING_HASH still matches it.")
+    parser.add_argument("--plots", action="store_true", help="Render and save the plots even in agent mode (headless: PNGs only, no windows or terminal charts). Interactive runs always render; agent/MCP runs skip rendering entirely unless this is set.")
+    parser.add_argument("--label-top", type=int, default=LABEL_TOP_OUTLIERS, help=f"Label only the N most anomalous outliers on the PCA/DBSCAN scatter (default: {LABEL_TOP_OUTLIERS}).")
+    args = parser.parse_args(argv)
+    reporter = reporter or Reporter()
     if args.components < 2:
         args.components = 2
+    if args.ablate or args.sweep:
+        args.score = False
+    if args.detector != DEFAULT_DETECTOR and (args.fit or args.score or args.ablate or args.sweep):
+        reporter.error("ERROR", f"--fit, --score, --ablate and --sweep are DBSCAN-only; drop them or use --detector {DEFAULT_DETECTOR}.")
+        return
+    # Interactive runs render (windows + terminal charts); agent runs render headless PNGs
+    # only when asked. When nothing renders, jaws.plots — and with it matplotlib and
+    # plotille — is never imported.
+    render = not reporter.agent or args.plots
     # Where plots are written. Falls back to a temp dir when JAWS_FINDER_ENDPOINT
     # is unset (e.g. a bare MCP/headless run) so saving never crashes, and the
     # directory is created if missing.
     endpoint = FINDER_ENDPOINT or os.path.join(tempfile.gettempdir(), "jaws")
-    os.makedirs(endpoint, exist_ok=True)
+    if render:
+        os.makedirs(endpoint, exist_ok=True)
     driver = dbms_connection(args.database, reporter)
     if driver is None:
         return
 
-    embeddings, data, excluded_local = fetch_data_for_dbscan(driver, args.database, args.include_local)
+    if args.windows is not None:
+        columns, window_seconds, excluded_local = fetch_windows(driver, args.database, args.include_local, args.windows)
+        if columns is None or not len(columns["ip_address"]):
+            reporter.error("ERROR", "No window profiles to score. Run jaws-compute --window (e.g. --window 5m) first.")
+            driver.close()
+            return
+        ranked_windows, flagged, flagged_keys = score_windows(columns, window_seconds)
+        add_window_outliers_to_database(window_seconds, flagged_keys, driver, args.database)
+        reporter.result(
+            {
+                "mode": "windows",
+                "window_seconds": window_seconds,
+                "windows_scored": len(columns["ip_address"]),
+                "endpoints": int(len(np.unique(columns["ip_address"]))),
+                "outliers_flagged": flagged,
+                "excluded_local": excluded_local,
+                "units": FEATURE_UNITS,
+                "reason_z_threshold": REASON_Z_THRESHOLD,
+                "outlier_z": WINDOW_OUTLIER_Z,
+                "min_history": WINDOW_MIN_HISTORY,
+                "windows": ranked_windows,
+            },
+            summary=f"Scored {len(columns['ip_address'])} {window_seconds}s windows against their own IP's history and the population; {flagged} window(s) flagged.",
+        )
+        driver.close()
+        return
+
+    baseline = None
+    embedding_model = current_embedding_model(args.database, handoff)
+    if args.score:
+        baseline = load_baseline(baseline_path(args.database))
+        stale = baseline_stale_reason(baseline["meta"], embedding_model) if baseline is not None else None
+        if baseline is None:
+            reporter.info("BASELINE", "No saved baseline — running a full fit.")
+        elif stale:
+            reporter.info("BASELINE", f"{stale} — refitting.")
+            baseline = None
+        else:
+            # Score with the settings the baseline was fit under.
+            args.include_local = baseline["meta"]["include_local"]
+        args.fit = baseline is None
+
+    def fetch_endpoints(known_hashes=None):
+        if handoff is not None and "endpoints" in handoff:
+            return endpoint_table(*handoff["endpoints"], include_local=args.include_local, known_hashes=known_hashes)
+        return fetch_data_for_dbscan(driver, args.database, args.include_local, known_hashes, use_store=not args.no_store)
+
+    known_hashes = baseline["embedding_hashes"].tolist() if baseline is not None else None
+    data, excluded_local, embedding_source = fetch_endpoints(known_hashes)
+    if baseline is not None and len(data) and data.embeddings.shape[1] != baseline["meta"]["embedding_dim"]:
+        reporter.info("BASELINE", "Embeddings changed dimension since the baseline (a different embedding backend) — refitting.")
+        baseline, args.fit = None, True
+        data, excluded_local, embedding_source = fetch_endpoints()
+    embeddings = data.embeddings
+    if len(data):
+        reporter.info("INFO", f"Read {len(data)} endpoint embeddings from: {embedding_source}.")
+
+    if baseline is not None:
+        meta = baseline["meta"]
+        ranked_endpoints = score_against_baseline(baseline, embeddings, data) if len(data) else []
+        flagged = [e for e in ranked_endpoints if e["is_outlier"]]
+        add_outlier_to_database(ranked_endpoints, flagged, driver, args.database)
+        reporter.result(
+            {
+                "mode": "score",
+                "endpoints_scored": len(data),
+                "outliers_flagged": len(flagged),
+                "excluded_local": excluded_local,
+                "embedding_source": embedding_source,
+                "baseline": {**meta, "age_hours": round(baseline_age_hours(meta), 2)},
+                "units": FEATURE_UNITS,
+                "reason_z_threshold": REASON_Z_THRESHOLD,
+                "endpoints": ranked_endpoints,
+            },
+            summary=f"Scored {len(data)} new/changed endpoint(s) against the baseline fit at {meta['fitted_at']}; {len(flagged)} outlier(s) flagged.",
+        )
+        driver.close()
+        return
+
     if excluded_local:
         reporter.info("CONFIG", f"Excluding the local host ('{LOCAL_ORG}') from clustering. Pass --include-local to include it.")
 
@@ -642,20 +1395,42 @@ def main():
             reporter.error("ERROR", f"Ablation needs at least {min_samples} embedded endpoints (have {len(data)}). Capture more traffic or lower --components.")
             driver.close()
             return
-        result = run_ablation(embeddings, data, args.components, args.whiten, args.feature_weight)
+        result = run_ablation(embeddings, data, args.components, args.whiten, args.feature_weight, args.bootstrap)
         reporter.info("ABLATION", format_ablation_table(result))
         reporter.result(
             result,
-            summary=f"Ablation over {result['endpoints']} endpoints: text-only vs numeric-only vs blended (no DB writes).",
+            summary=f"Ablation over {result['endpoints']} endpoints: text-only vs numeric-only vs blended, {result['bootstrap']['resamples'] if result['bootstrap'] else 0} bootstrap subsample(s) (no DB writes).",
         )
         driver.close()
         return
 
-    plot_data = fetch_data_for_portsize(driver, args.database)
-    portsize_info_message = "The below plot shows the packet size over ports.\nIt is useful for identifying ports that are sending or receiving large amounts of data."
-    if not reporter.agent:
+    if args.sweep:
+        min_samples = 2 * max(2, int(min(args.sweep_components)))
+        if len(data) < min_samples:
+            reporter.error("ERROR", f"Sweep needs at least {min_samples} embedded endpoints (have {len(data)}). Capture more traffic or lower --sweep-components.")
+            driver.close()
+            return
+        result = run_sweep(embeddings, data, args.sweep_components, args.sweep_weights, args.sweep_eps, args.whiten)
+        reporter.info("SWEEP", format_sweep_table(result))
+        reporter.result(
+            result,
+            summary=f"Swept {len(result['cells'])} settings over {result['endpoints']} endpoints (no DB writes).",
+        )
+        driver.close()
+        return
+
+    min_samples = 2 * args.components
+    if len(data) < min_samples:
+        reporter.error("ERROR", f"Clustering needs at least {min_samples} embedded endpoints (have {len(data)}). Capture more traffic or lower --components.")
+        driver.close()
+        return
+
+    if render:
+        from jaws import plots
+        histogram = fetch_portsize_histogram(driver, args.database)
+        portsize_info_message = "The below plot shows the packet size over ports.\nIt is useful for identifying ports that are sending or receiving large amounts of data."
         reporter.info("INFO", portsize_info_message)
-        plot_size_over_ports(plot_data, endpoint)
+        plots.plot_size_over_ports(histogram, endpoint, interactive=not reporter.agent)
 
     feature_info_message = (
         f"Reducing {len(embeddings)} endpoint embeddings to {args.components} PCA dimensions"
@@ -666,10 +1441,8 @@ def main():
     reporter.info("INFO", feature_info_message)
 
     # Clustering runs on `features` (standardized text PCA components, optionally blended
-    # with standardized behavioral features). `plot_xy` is a 2D projection of that same
-    # space, so the scatter plot reflects what was actually clustered.
-    features, pca = build_feature_matrix(embeddings, data, args.components, args.whiten, args.feature_weight)
-    plot_xy = PCA(n_components=2).fit_transform(features) if features.shape[1] > 2 else features
+    # with standardized behavioral features).
+    features, pca, scaler = build_feature_matrix(embeddings, data, args.components, args.whiten, args.feature_weight)
 
     explained = pca.explained_variance_ratio_
     per_component = ", ".join(f"PC{i + 1} {v:.2%}" for i, v in enumerate(explained))
@@ -679,132 +1452,98 @@ def main():
     )
     reporter.info("INFO", explained_variance_message)
 
-    kdistance_info_message = "Measuring K-Distance. This is used to determine the optimal epsilon value\nfor DBSCAN."
-    reporter.info("INFO", kdistance_info_message)
-
-    min_samples = 2 * args.components
-    nearest_neighbors = NearestNeighbors(n_neighbors=min_samples)
-    nearest_neighbors.fit(features)
-    distances, _ = nearest_neighbors.kneighbors(features)
-    k_distances = distances[:, min_samples - 1]
-    sorted_k_distances = np.sort(k_distances)
-    if not reporter.agent:
-        plot_k_distances(sorted_k_distances, endpoint)
-
-    kneed_info_message = "Using Kneed to recommend EPS.\nKneed is a library that helps us find the knee point in the K-Distance plot."
-    reporter.info("INFO", kneed_info_message)
-
+    detector = make_detector(args.detector, min_samples, args.eps)
     knee_index = None
-    if args.eps is not None:
-        # Explicit override — skip the knee recommendation and the interactive prompt.
-        eps_value = args.eps
-        eps_source = "override"
-        reporter.info("CONFIG", f"Using provided EPS: {eps_value}")
-    else:
-        eps_source = "auto"
-        kneedle = KneeLocator(range(len(sorted_k_distances)), sorted_k_distances, curve='convex', direction='increasing')
-        knee_index = int(kneedle.knee) if kneedle.knee is not None else None
-        if knee_index is not None:
-            eps_value = sorted_k_distances[knee_index]
-            reporter.info("INFO", f"Knee point found at index: {knee_index}")
+    eps_value = eps_source = None
+    if isinstance(detector, DBSCANDetector):
+        kdistance_info_message = "Measuring K-Distance. This is used to determine the optimal epsilon value\nfor DBSCAN."
+        reporter.info("INFO", kdistance_info_message)
+
+        # One neighbor search serves both the k-distance curve (for the knee) and DBSCAN,
+        # which clusters the same sparse graph instead of recomputing every neighborhood.
+        detector.fit(features)
+        graph = detector.graph
+        sorted_k_distances = np.sort(detector.k_distances)
+        if render:
+            plots.plot_k_distances(sorted_k_distances, endpoint, interactive=not reporter.agent)
+
+        kneed_info_message = "Using Kneed to recommend EPS.\nKneed is a library that helps us find the knee point in the K-Distance plot."
+        reporter.info("INFO", kneed_info_message)
+
+        if args.eps is not None:
+            # Explicit override — skip the knee recommendation and the interactive prompt.
+            eps_value = args.eps
+            eps_source = "override"
+            reporter.info("CONFIG", f"Using provided EPS: {eps_value}")
         else:
-            reporter.info("INFO", "Knee point not found. Using default EPS.")
-            eps_value = np.median(sorted_k_distances)
-
-        if not reporter.agent:
-            user_input = input(f"[RECOMMENDED EPS] {eps_value:.2f} | Press ENTER to accept, or provide a value: ")
-            if user_input:
-                try:
-                    eps_value = float(user_input)
-                    eps_source = "manual"
-                except ValueError:
-                    reporter.error("ERROR", "Invalid input. Using the recommended EPS value.")
-            reporter.info("INFO", "Matplotlib plots will be generated after passing an EPS value.")
-        else:
-            reporter.info("CONFIG", "Skipping user input and passing the recommended EPS value.")
-
-    dbscan = DBSCAN(eps=eps_value, min_samples=min_samples)
-    clusters = dbscan.fit_predict(features)
-
-    if not reporter.agent:
-        reporter.info("INFO", "The below plot shows the PCA/DBSCAN outliers, in red, from the embeddings.\nAdditionally, embedding clusters are shown to help understand how outliers are distributed amongst noise.")
-
-    plt.figure(num=f'PCA/DBSCAN Outliers from Embeddings | n_components: {args.components}, min_samples: {min_samples}, eps: {eps_value}', figsize=(8, 7))
-    clustered_indices = clusters != -1
-    plt.scatter(plot_xy[clustered_indices, 0], plot_xy[clustered_indices, 1], 
-                c=clusters[clustered_indices], cmap='winter', edgecolors='none', marker='^', s=50, alpha=0.1, zorder=2)
-
-    outlier_indices = clusters == -1
-    plt.scatter(plot_xy[outlier_indices, 0], plot_xy[outlier_indices, 1], 
-                color='red', marker='o', s=50, label='Outliers', alpha=0.8, zorder=10)
-
-    for i, item in enumerate(data):
-        annotation_text = f"{item['ip_address']}\n{item['org']}\n{item['hostname']}\n{item['location']}\nout {item['bytes_out']}B/{item['packets_out']}p | in {item['bytes_in']}B/{item['packets_in']}p"
-        if clusters[i] == -1:
-            # Outlier
-            bbox_style = dict(boxstyle="round,pad=0.2", facecolor='#333333', edgecolor='none', alpha=0.9)
-            plt.annotate(annotation_text, 
-                        (plot_xy[i, 0], plot_xy[i, 1]), 
-                        fontsize=6,
-                        color='white', 
-                        bbox=bbox_style,
-                        horizontalalignment='center',
-                        verticalalignment='bottom',
-                        xytext=(0,10),
-                        textcoords='offset points',
-                        alpha=0.9,
-                        zorder=10)
-        else:
-            # Non-Outlier
-            bbox_style = dict(boxstyle="round,pad=0.2", facecolor='#BEBEBE', edgecolor='none', alpha=0.5)
-            plt.annotate(annotation_text, 
-                        (plot_xy[i, 0], plot_xy[i, 1]), 
-                        fontsize=6,
-                        color='#666666',
-                        bbox=bbox_style,
-                        horizontalalignment='center',
-                        verticalalignment='bottom',
-                        xytext=(0,10),
-                        textcoords='offset points',
-                        alpha=0.8,
-                        zorder=1)
-
-    plt.grid(color='#BEBEBE', linestyle='-', linewidth=0.25, alpha=0.5)
-    plt.xticks(fontsize=8)
-    plt.yticks(fontsize=8)
-    plt.tight_layout()
-    save_outliers = os.path.join(endpoint, 'pca_dbscan_outliers.png')
-    plt.savefig(save_outliers, dpi=90)
-
-    outlier_plotille = new_plotille_figure()
-    outlier_plotille.color_mode = 'byte'
-    outlier_plotille.width = 80
-    outlier_plotille.height = 20
-    clustered_indices_pc1 = plot_xy[clustered_indices, 0]
-    clustered_indices_pc2 = plot_xy[clustered_indices, 1]
-    outlier_indices_pc1 = plot_xy[outlier_indices, 0]
-    outlier_indices_pc2 = plot_xy[outlier_indices, 1]
-    outlier_plotille.scatter(clustered_indices_pc1, clustered_indices_pc2, marker="^")
-    outlier_plotille.scatter(outlier_indices_pc1, outlier_indices_pc2, marker="o")
-    display_outlier = outlier_plotille.show(legend=False)
-
-    if not reporter.agent:
-        reporter.raw(display_outlier)
+            eps_source = "auto"
+            eps_value, knee_index = detector.recommend()
+            if knee_index is not None:
+                reporter.info("INFO", f"Knee point found at index: {knee_index}")
+            else:
+                reporter.info("INFO", "Knee point not found. Using default EPS.")
+
+            if not reporter.agent:
+                user_input = input(f"[RECOMMENDED EPS] {eps_value:.2f} | Press ENTER to accept, or provide a value: ")
+                if user_input:
+                    try:
+                        eps_value = float(user_input)
+                        eps_source = "manual"
+                    except ValueError:
+                        reporter.error("ERROR", "Invalid input. Using the recommended EPS value.")
+                reporter.info("INFO", "Matplotlib plots will be generated after passing an EPS value.")
+            else:
+                reporter.info("CONFIG", "Skipping user input and passing the recommended EPS value.")
+        clusters, detector_scores = detector.predict(eps_value)
+    else:
+        reporter.info("INFO", f"Scoring endpoints with the {detector.name} detector.")
+        clusters, detector_scores = detector.fit_predict(features)
 
     # Every endpoint gets a rankable anomaly score and reason codes, sorted most
-    # anomalous first; `is_outlier` marks the DBSCAN-flagged ones. Returning the full
-    # ranked list (not just the flagged subset) means there is always something to
-    # triage — a 0-outlier DBSCAN run still yields a ranking.
-    ranked_endpoints = score_endpoints(data, clusters)
+    # anomalous first; `is_outlier` marks the detector-flagged ones and `detector_score`
+    # carries the detector's own score. Returning the full ranked list (not just the
+    # flagged subset) means there is always something to triage — a 0-outlier run still
+    # yields a ranking.
+    ranked_endpoints = score_endpoints(data, clusters, detector_scores=detector_scores)
     flagged = [e for e in ranked_endpoints if e["is_outlier"]]
 
+    if render:
+        # `plot_xy` is a 2D projection of the clustered space, so the scatter reflects
+        # what was actually clustered. Only the top outliers by anomaly_score are labeled.
+        if not reporter.agent:
+            reporter.info("INFO", "The below plot shows the PCA/DBSCAN outliers, in red, from the embeddings.\nAdditionally, embedding clusters are shown to help understand how outliers are distributed amongst noise.")
+        plot_xy = PCA(n_components=2).fit_transform(features) if features.shape[1] > 2 else features
+        row_by_ip = {ip: i for i, ip in enumerate(data["ip_address"].tolist())}
+        labels = [
+            (row_by_ip[e["ip_address"]],
+             f"{e['ip_address']}\n{e['org']}\n{e['hostname']}\n{e['location']}\n"
+             f"out {e['bytes_out']}B/{e['packets_out']}p | in {e['bytes_in']}B/{e['packets_in']}p")
+            for e in flagged[:max(0, args.label_top)]
+        ]
+        setting = f"eps: {eps_value}" if eps_value is not None else f"detector: {detector.name}"
+        title = f'PCA/DBSCAN Outliers from Embeddings | n_components: {args.components}, min_samples: {min_samples}, {setting}'
+        display_outlier = plots.plot_outliers(plot_xy, clusters, labels, title, endpoint, interactive=not reporter.agent)
+        if display_outlier is not None:
+            reporter.raw(display_outlier)
+
     add_outlier_to_database(ranked_endpoints, flagged, driver, args.database)
 
+    baseline_meta = None
+    if args.fit:
+        baseline = fit_baseline(data, features, pca, scaler, graph, eps_value, min_samples,
+                                args.feature_weight, args.include_local, embedding_model)
+        save_baseline(baseline_path(args.database), baseline)
+        baseline_meta = baseline["meta"]
+        reporter.info("BASELINE", f"Saved baseline ({baseline_meta['core_samples']} core samples) to: {baseline_path(args.database)}")
+
     # First-class host-outbound view: outbound FROM the capture host, per destination,
-    # isolated from raw packets (host as source). The remote-endpoint ranking above is
+    # isolated per host→peer conversation (host as source). The remote-endpoint ranking above is
     # dominated by inbound/download volume and structurally demotes the host's own outbound
     # (the documented purpose) — this re-centers on it, independent of clustering and the
     # --include-local flag. Empty when the host wasn't captured (e.g. an imported pcap).
+    # The view reads the conversation rollups, so a database captured before they were
+    # maintained gets them rebuilt here rather than an empty view.
+    ensure_conversations(driver, args.database, reporter)
     local_ips, host_rows = fetch_host_outbound(driver, args.database)
     host_destinations = score_host_outbound(host_rows)
     host_flagged = [d for d in host_destinations if d["reasons"]]
@@ -821,10 +1560,14 @@ def main():
     # not a failure — but anomaly_score still ranks every endpoint. `units` labels the
     # raw magnitudes; `reason_z_threshold` is the robust-z cutoff for citing a feature.
     result = {
+        "mode": "fit" if args.fit else "full",
         "endpoints_clustered": len(data),
         "outliers_flagged": len(flagged),
         "excluded_local": excluded_local,
-        "eps": round(float(eps_value), 4),
+        "embedding_source": embedding_source,
+        "detector": detector.name,
+        "detector_params": detector.params(),
+        "eps": round(float(eps_value), 4) if eps_value is not None else None,
         "eps_source": eps_source,
         "knee_index": knee_index,
         "min_samples": min_samples,
@@ -846,6 +1589,7 @@ def main():
             "sent to it (outbound from host). See each reason's host_relative field. The "
             "host_outbound section re-frames the same capture from the host's perspective."
         ),
+        "baseline": baseline_meta,
         "endpoints": ranked_endpoints,
         # The defender-frame counterpart to `endpoints`: the capture host's OWN outbound,
         # per destination, ranked on the host-upload distribution. Directly serves the
@@ -857,7 +1601,7 @@ def main():
             "flagged": len(host_flagged),
             "units": HOST_OUTBOUND_UNITS,
             "note": (
-                "Outbound FROM the capture host, per destination, isolated from raw packets "
+                "Outbound FROM the capture host, per destination, isolated from its per-direction conversations "
                 "(host as source, so upload_bytes is host→peer, not the peer's total inbound). "
                 "`outbound_score` ranks destinations on the host-upload distribution; "
                 "upload_download_ratio high = exfil-shaped (host sent far more than it received). "
@@ -867,10 +1611,16 @@ def main():
         },
     }
 
+    if render:
+        result["plots"] = endpoint
     if not reporter.agent:
-        plt.show()
+        plots.show()
 
-    reporter.result(result, summary=f"Clustered {len(data)} endpoints (per IP); {len(flagged)} outlier(s) flagged, all ranked by anomaly_score; {len(host_flagged)} host-outbound destination(s) flagged. Plots saved to: {endpoint}")
+    summary = (f"Clustered {len(data)} endpoints (per IP); {len(flagged)} outlier(s) flagged, all ranked by anomaly_score; "
+               f"{len(host_flagged)} host-outbound destination(s) flagged.")
+    if render:
+        summary += f" Plots saved to: {endpoint}"
+    reporter.result(result, summary=summary)
 
     driver.close()
 
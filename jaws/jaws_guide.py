@@ -61,6 +61,11 @@ def main():
     [orange1][WARNING][/] This will erase all data!
     [/]""")
 
+    print(f"""[gray100]
+    [grey85]To rebuild the conversation rollups of a database captured before they were maintained at capture:[/]
+    [green1][CLI][/] jaws-utils --rollup '{DATABASE}'
+    [/]""")
+
     print(f"""[gray100]
     [grey85]To capture or import packets:[/]
     [green1][CLI][/] jaws-capture [grey50]OPTIONAL[/] --interface 'Ethernet' OR --file PATH --duration 10 --database '{DATABASE}'
@@ -74,21 +79,33 @@ def main():
 
     print(f"""[gray100]
     [grey85]To compute embeddings:[/]
-    [green1][CLI][/] jaws-compute [grey50]OPTIONAL[/] --api 'openai', 'transformers' --model '{DEFAULT_PACKET_MODEL}' --database '{DATABASE}'
+    [green1][CLI][/] jaws-compute [grey50]OPTIONAL[/] --api 'openai', 'transformers', 'hashing' --model '{DEFAULT_PACKET_MODEL}' --database '{DATABASE}' --window 5m
     [turquoise2][DOCKER][/] docker exec -it jaws-container jaws-compute --api 'transformers'
     [grey85]--model selects a local transformers model when --api transformers (see config.PACKET_MODELS).[/]
+    [grey85]--api hashing embeds with hashed n-gram TF-IDF + randomized SVD: no model download, fastest on edge hardware.[/]
+    [grey85]--window also writes one profile per IP per time window (e.g. 30s, 5m, 1h) for jaws-finder --windows.[/]
     [/]""")
    
     print(f"""[gray100]
     [grey85]To cluster embeddings and surface outliers (PCA + DBSCAN, with a scored host-outbound view):[/]
-    [green1][CLI][/] jaws-finder [grey50]OPTIONAL[/] --database '{DATABASE}' --components 2 --whiten --eps 0.5 --feature-weight 1.0 --include-local --ablate
+    [green1][CLI][/] jaws-finder [grey50]OPTIONAL[/] --database '{DATABASE}' --components 2 --whiten --eps 0.5 --feature-weight 1.0 --detector dbscan --include-local --ablate --bootstrap 16 --sweep --fit --score --windows 5m --no-store --plots --label-top 10
     [turquoise2][DOCKER][/] docker exec -it jaws-container jaws-finder
     [grey85]--components sets the number of PCA dimensions to retain for clustering (min 2, default 2).[/]
     [grey85]--whiten scales each PCA component to unit variance (default: off).[/]
     [grey85]--eps overrides the DBSCAN epsilon; omit it to accept the auto-recommended knee value.[/]
     [grey85]--feature-weight sets the influence of the behavioral numeric features on clustering (0 = embedding-only, default 1.0).[/]
     [grey85]--include-local keeps the capture host in the clustered set (off by default — it is a structural hub).[/]
-    [grey85]--ablate compares text-only vs numeric-only vs blended clustering (silhouette + Jaccard) without writing to the database.[/]
+    [grey85]--ablate compares text-only vs numeric-only vs blended clustering (silhouette + Jaccard, with bootstrap confidence intervals) without writing to the database.[/]
+    [grey85]--plots saves PNG plots even when run headless (agent/MCP); --label-top N labels only the N most anomalous outliers.[/]
+    [grey85]--fit also saves the run as a baseline; --score scores only new/changed endpoints against it (refitting when stale).[/]
+    [grey85]--windows scores the jaws-compute --window profiles against each IP's own history and the population, flagging short bursts.[/]
+    [grey85]--sweep evaluates a grid of --sweep-components, --sweep-weights and --sweep-eps in parallel and reports the most stable setting (no DB writes).[/]
+    [/]""")
+
+    print(f"""[gray100]
+    [grey85]To run capture, enrichment, embedding and detection back to back in one process:[/]
+    [green1][CLI][/] jaws-pipeline [grey50]OPTIONAL[/] --interface 'Ethernet' --duration 60 --file 'capture.pcapng' --no-enrich --api 'hashing' --window 5m --detector dbscan --eps 0.5 --fit --database '{DATABASE}'
+    [grey85]Stages hand packets, profiles and embeddings to each other in memory (still writing the graph) and report their timings.[/]
     [/]""")
 
     print(f"""[gray100]
@@ -4,6 +4,7 @@ from rich.console import Group
 from jaws.config import CONSOLE, DATABASE, IPINFO_API_KEY
 from jaws.jaws_utils import (
     dbms_connection,
+    write_generation,
     Reporter,
     render_info_panel,
     render_activity_panel
@@ -50,11 +51,11 @@ def add_organization_to_database(ip_address, ipinfo, driver, database):
         })
         
 
-def main():
+def main(argv=None, reporter=None):
     parser = argparse.ArgumentParser(description="Update the database with IP organization information from Ipinfo.")
     parser.add_argument("--database", default=DATABASE, help=f"Specify the database to connect to (default: '{DATABASE}').")
-    args = parser.parse_args()
-    reporter = Reporter()
+    args = parser.parse_args(argv)
+    reporter = reporter or Reporter()
     driver = dbms_connection(args.database, reporter)
     if driver is None:
         return
@@ -86,6 +87,8 @@ def main():
                     org_string = f"{org_name} ➜ {ip_address}\n{ipinfo.get('hostname', 'Unknown')}, {ipinfo.get('loc', 'Unknown')}\n"
                     organizations.append(org_string)
                     update()
+        if organizations:
+            write_generation(driver, args.database)
         # `addresses_scanned` is the denominator — the undocumented IPs considered
         # this run — so a reader can see `organizations_added` is an incremental
         # count (this run only), not a running total of all endpoints. Any gap is
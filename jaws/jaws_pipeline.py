@@ -0,0 +1,154 @@
+import argparse
+import time
+from contextlib import ExitStack
+from jaws.config import CONSOLE, DATABASE, DEFAULT_PACKET_MODEL, IPINFO_API_KEY, PACKET_MODELS
+from jaws.detectors import DETECTORS, DEFAULT_DETECTOR
+from jaws.jaws_utils import (
+    dbms_connection,
+    parse_window,
+    render_info_panel,
+    share_driver,
+    CollectingReporter,
+    Reporter
+)
+from jaws import jaws_capture, jaws_ipinfo, jaws_compute, jaws_finder
+
+
+# capture → enrich → embed → detect in one process. Run one by one, every stage opens
+# its own connection and re-reads what the stage before it just wrote: compute pulls
+# every PACKET back through Bolt, the finder every embedding. Here the stages share one
+# driver and a `handoff` dict instead — capture leaves its decoded packets in it,
+# compute reads only the packets stored before this run and leaves its embedded
+# profiles, and the finder clusters those directly. Every stage still persists to the
+# graph as it does on its own, so the standalone tools and the MCP read tools see the
+# same state afterwards. Each stage reports through its own CollectingReporter; its
+# narration is relayed here and its envelope is kept, with its wall time, per stage.
+# Its item counts go to the parent's progress callback when it has one (an in-process
+# MCP run), else through the parent's own activity() — the "[PROGRESS] n" lines a
+# subprocess run's job runner reads, or a live count in a terminal.
+
+
+def run_stage(name, main, argv, reporter, **kwargs):
+    """Run one stage's main() in-process; returns its {"stage", "ok", "seconds"} record and its envelope."""
+    relay = getattr(reporter, "progress", None)
+    count = [0]
+
+    def progress(message=None, items=None):
+        if message is not None:
+            reporter.info(name.upper(), message)
+        elif relay is not None:
+            relay(items=items)
+        else:
+            count[0] = items
+            update()
+
+    child = CollectingReporter(progress=progress)
+    start = time.perf_counter()
+    with ExitStack() as stack:
+        if relay is None:
+            update = stack.enter_context(reporter.activity(
+                lambda: render_info_panel(name.upper(), f"{count[0]} item(s) processed", CONSOLE)))
+        try:
+            main(argv, reporter=child, **kwargs)
+        except SystemExit as e:
+            child.error("ERROR", f"invalid arguments (exit status {e.code})")
+        except Exception as e:
+            child.error("ERROR", f"{type(e).__name__}: {e}")
+    seconds = round(time.perf_counter() - start, 3)
+    payload = child.payload or {"ok": False, "error": "stage produced no result"}
+    return {"stage": name, "ok": payload["ok"], "seconds": seconds}, payload
+
+
+def main(argv=None, reporter=None):
+    parser = argparse.ArgumentParser(description="Run capture, enrichment, embedding and anomaly detection back to back in one process, handing data between the stages in memory.")
+    parser.add_argument("--interface", default="Ethernet", help="Specify the network interface to capture from (default: 'Ethernet').")
+    parser.add_argument("--file", dest="capture_file", help="Import a Wireshark capture file instead of capturing live.")
+    parser.add_argument("--duration", type=int, default=10, help="Specify the duration of a live capture in seconds (default: 10).")
+    parser.add_argument("--database", default=DATABASE, help=f"Specify the database to connect to (default: '{DATABASE}').")
+    parser.add_argument("--no-enrich", action="store_true", help="Skip the Ipinfo enrichment stage. It is also skipped when IPINFO_API_KEY is unset.")
+    parser.add_argument("--api", choices=["openai", "transformers", "hashing"], default="openai", help="Embedding API for the compute stage, as in jaws-compute (default: 'openai').")
+    parser.add_argument("--model", choices=list(PACKET_MODELS), default=DEFAULT_PACKET_MODEL, help=f"Local transformers model when --api transformers (default: '{DEFAULT_PACKET_MODEL}').")
+    parser.add_argument("--window", type=parse_window, default=None, help="Also write per-IP window profiles of this length (e.g. 5m), as jaws-compute --window (default: off).")
+    parser.add_argument("--detector", choices=list(DETECTORS), default=DEFAULT_DETECTOR, help=f"Outlier detector for the detect stage, as in jaws-finder (default: {DEFAULT_DETECTOR}).")
+    parser.add_argument("--components", type=int, default=2, help="PCA components for the detect stage (default: 2).")
+    parser.add_argument("--feature-weight", type=float, default=1.0, help="Behavioral feature weight for the detect stage (default: 1.0).")
+    parser.add_argument("--eps", type=float, default=None, help="DBSCAN epsilon for the detect stage; auto-recommended when omitted.")
+    parser.add_argument("--include-local", action="store_true", help="Include the capture host in the clustered set.")
+    parser.add_argument("--fit", action="store_true", help="Also save the detect stage's clustering as the jaws-finder --score baseline.")
+    args = parser.parse_args(argv)
+    reporter = reporter or Reporter()
+    driver = dbms_connection(args.database, reporter)
+    if driver is None:
+        return
+
+    database = ["--database", args.database]
+    if args.capture_file:
+        capture_argv = database + ["--file", args.capture_file]
+    else:
+        capture_argv = database + ["--interface", args.interface, "--duration", str(args.duration)]
+    compute_argv = database + ["--api", args.api, "--model", args.model]
+    if args.window is not None:
+        compute_argv += ["--window", str(args.window)]
+    detect_argv = database + ["--detector", args.detector, "--components", str(args.components),
+                              "--feature-weight", str(args.feature_weight)]
+    if args.eps is not None:
+        detect_argv += ["--eps", str(args.eps)]
+    if args.include_local:
+        detect_argv.append("--include-local")
+    if args.fit:
+        detect_argv.append("--fit")
+
+    skip_enrich = "--no-enrich" if args.no_enrich else ("IPINFO_API_KEY is unset" if not IPINFO_API_KEY else None)
+    plan = [
+        ("capture", jaws_capture.main, capture_argv, True),
+        ("enrich", jaws_ipinfo.main, database, False),
+        ("compute", jaws_compute.main, compute_argv, True),
+        ("detect", jaws_finder.main, detect_argv, True),
+    ]
+
+    handoff = {}
+    stages = []
+    results = {}
+    previous = share_driver(driver)
+    start = time.perf_counter()
+    try:
+        for name, stage_main, stage_argv, takes_handoff in plan:
+            if name == "enrich" and skip_enrich:
+                reporter.info("ENRICH", f"Skipped ({skip_enrich}).")
+                stages.append({"stage": name, "ok": True, "seconds": 0.0, "skipped": skip_enrich})
+                continue
+            reporter.info("PIPELINE", f"Running {name}.")
+            kwargs = {"handoff": handoff} if takes_handoff else {}
+            stage, payload = run_stage(name, stage_main, stage_argv, reporter, **kwargs)
+            stages.append(stage)
+            if not payload["ok"]:
+                timings = ", ".join(f"{s['stage']} {s['seconds']}s" for s in stages)
+                reporter.error("ERROR", f"Pipeline stopped at {name}: {payload['error']} ({timings})")
+                return
+            payload.pop("ok")
+            results[name] = payload
+            reporter.info("PIPELINE", f"{name} finished in {stage['seconds']}s.")
+    finally:
+        share_driver(previous)
+        driver.close()
+
+    seconds = round(time.perf_counter() - start, 3)
+    detect = results["detect"]
+    reporter.result(
+        {
+            "database": args.database,
+            "seconds": seconds,
+            "stages": stages,
+            "packets_captured": results["capture"].get("packets_captured"),
+            "endpoints_embedded": results["compute"].get("endpoints_embedded"),
+            "outliers_flagged": detect.get("outliers_flagged"),
+            "results": results,
+        },
+        summary=f"Pipeline finished in {seconds}s ("
+                + ", ".join(f"{s['stage']} {s['seconds']}s" for s in stages)
+                + f"); {detect.get('outliers_flagged')} outlier(s) flagged.",
+    )
+
+
+if __name__ == "__main__":
+    main()
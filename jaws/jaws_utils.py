@@ -1,16 +1,17 @@
 import argparse
 import json
 import sys
+import time
 from contextlib import contextmanager
 from rich.text import Text
 from rich.panel import Panel
 from rich.live import Live
-from sentence_transformers import SentenceTransformer
 from jaws.config import (
     CONSOLE,
     AGENT_MODE,
     DATABASE,
     PACKET_MODELS,
+    ENDPOINT_EMBEDDING_INDEX,
     get_neo4j_driver,
 )
 
@@ -40,6 +41,10 @@ def render_activity_panel(title, recent_packets, console, height=10):
     return Panel(Text(text, justify="left"), title=f"{title}", title_align="left", border_style="cornflower_blue", width=width, height=height)
 
 
+# Minimum seconds between agent-mode "[PROGRESS] n" lines (see Reporter.activity).
+PROGRESS_INTERVAL = 1.0
+
+
 # Single output abstraction with two distinct surfaces:
 #   - pretty mode (interactive TTY): rich panels for a human.
 #   - agent mode (piped, e.g. the MCP server): a single structured JSON object on
@@ -92,20 +97,78 @@ class Reporter:
     def activity(self, render):
         """Drive a live-updating panel group while iterating (pretty mode only).
 
-        Yields an `update()` callable to invoke after each item. In agent mode it is
-        a no-op — per-item detail belongs in the final structured result(), not streamed
+        Yields an `update()` callable to invoke after each item. In agent mode it only
+        counts — per-item detail belongs in the final structured result(), not streamed
         onto the machine surface.
         """
         if self.agent:
-            yield lambda *a, **k: None
+            # Agent mode streams only a running item count, as a "[PROGRESS] n" line on
+            # stderr at most once per PROGRESS_INTERVAL seconds, which the MCP job runner
+            # turns into progress notifications; the items themselves stay off both streams.
+            count = [0, 0.0]
+
+            def update(*a, **k):
+                count[0] += 1
+                now = time.monotonic()
+                if now - count[1] >= PROGRESS_INTERVAL:
+                    count[1] = now
+                    print(f"[PROGRESS] {count[0]}", file=sys.stderr, flush=True)
+            yield update
         else:
             with Live(render(), console=CONSOLE, refresh_per_second=10) as live:
                 yield lambda *a, **k: live.update(render())
 
 
+class CollectingReporter(Reporter):
+    """Agent-mode Reporter that keeps its output instead of printing it.
+
+    For in-process callers (the MCP server): the terminal result()/error() becomes
+    `payload` — the same {"ok": ...} envelope agent mode prints, normalized through JSON
+    so it matches the subprocess output exactly — and info()/success() narration is kept
+    in `log`. The first terminal payload wins, as it would on a parsed stdout. When a
+    `progress(message=None, items=None)` callback is given, each narration line and
+    each activity update is also passed to it as it happens.
+    """
+
+    def __init__(self, progress=None):
+        super().__init__(agent=True)
+        self.payload = None
+        self.log = []
+        self.progress = progress
+
+    def info(self, title, message):
+        self.log.append(f"[{title}] {message}")
+        if self.progress:
+            self.progress(message=self.log[-1])
+
+    def success(self, title, message):
+        self.info(title, message)
+
+    def error(self, title, message):
+        if self.payload is None:
+            self.payload = {"ok": False, "error": message}
+
+    def result(self, obj, summary=None):
+        if self.payload is None:
+            self.payload = json.loads(json.dumps({"ok": True, **obj}, default=str))
+
+    @contextmanager
+    def activity(self, render):
+        count = [0]
+
+        def update(*a, **k):
+            count[0] += 1
+            if self.progress:
+                self.progress(items=count[0])
+        yield update
+
+
 # Downloads the models to the local device.
 # Nice if you do not want to wait for model downloads on first compute.
 def download_model(model, reporter):
+    # Imported here: sentence_transformers loads torch, which every other jaws-utils
+    # caller (and every process spawned from a jaws entry point) would pay for otherwise.
+    from sentence_transformers import SentenceTransformer
     try:
         reporter.info("INFO", f"Downloading: {model}")
         SentenceTransformer(model, trust_remote_code=True)
@@ -114,11 +177,38 @@ def download_model(model, reporter):
         reporter.error("ERROR", f"{model}\n\n{str(e)}")
 
 
+# A long-lived process running the scripts in-process (the MCP server) registers its
+# driver with share_driver(); dbms_connection then hands out a SharedDriver over it
+# instead of opening a new one, so every run reuses the same connection pool. The
+# scripts still close() what they were given — a no-op on the shared driver.
+_shared_driver = None
+
+
+class SharedDriver:
+    """Proxy over a shared Neo4j driver whose close() leaves it open."""
+
+    def __init__(self, driver):
+        self._driver = driver
+
+    def close(self):
+        pass
+
+    def __getattr__(self, name):
+        return getattr(self._driver, name)
+
+
+def share_driver(driver):
+    """Share `driver` (None to stop sharing); returns the previously shared driver."""
+    global _shared_driver
+    previous, _shared_driver = _shared_driver, driver
+    return previous
+
+
 # Support function, imported heavily throughtout the project.
 def dbms_connection(database, reporter=None):
     reporter = reporter or Reporter()
     try:
-        driver = get_neo4j_driver()
+        driver = SharedDriver(_shared_driver) if _shared_driver is not None else get_neo4j_driver()
         with driver.session(database=database) as session:
             session.run("RETURN 1")
         return driver
@@ -147,6 +237,22 @@ def initialize_schema(driver, database, local_ip, reporter):
             "properties": ["TIMESTAMP"],
             "query": "CREATE INDEX packet_timestamp_index IF NOT EXISTS FOR (p:PACKET) ON (p.TIMESTAMP)"
         },
+        {
+            # Per-IP packet lookups (inspect_endpoint's recent sample) resolve as two
+            # index seeks — one per direction, already ordered by time — not a scan.
+            "type": "index",
+            "name": "packet_src_ip_index",
+            "label": "PACKET",
+            "properties": ["SRC_IP", "TIMESTAMP"],
+            "query": "CREATE INDEX packet_src_ip_index IF NOT EXISTS FOR (p:PACKET) ON (p.SRC_IP, p.TIMESTAMP)"
+        },
+        {
+            "type": "index",
+            "name": "packet_dst_ip_index",
+            "label": "PACKET",
+            "properties": ["DST_IP", "TIMESTAMP"],
+            "query": "CREATE INDEX packet_dst_ip_index IF NOT EXISTS FOR (p:PACKET) ON (p.DST_IP, p.TIMESTAMP)"
+        },
         {
             "type": "index",
             "name": "port_composite_index",
@@ -174,6 +280,31 @@ def initialize_schema(driver, database, local_ip, reporter):
             "label": "ENDPOINT",
             "properties": ["IP_ADDRESS"],
             "query": "CREATE INDEX endpoint_ip_index IF NOT EXISTS FOR (e:ENDPOINT) ON (e.IP_ADDRESS)"
+        },
+        {
+            # fetch_traffic's window and keyset pages seek on TIMESTAMP rather than
+            # scanning every ENDPOINT per page.
+            "type": "index",
+            "name": "endpoint_timestamp_index",
+            "label": "ENDPOINT",
+            "properties": ["TIMESTAMP"],
+            "query": "CREATE INDEX endpoint_timestamp_index IF NOT EXISTS FOR (e:ENDPOINT) ON (e.TIMESTAMP)"
+        },
+        {
+            "type": "index",
+            "name": "endpoint_window_index",
+            "label": "ENDPOINT_WINDOW",
+            "properties": ["WINDOW_SECONDS", "IP_ADDRESS", "WINDOW_START"],
+            "query": "CREATE INDEX endpoint_window_index IF NOT EXISTS FOR (w:ENDPOINT_WINDOW) ON (w.WINDOW_SECONDS, w.IP_ADDRESS, w.WINDOW_START)"
+        },
+        {
+            # k-NN over endpoint embeddings (similar_endpoints). Dimensions are left
+            # unset so the index accepts whichever embedding backend compute used.
+            "type": "vector_index",
+            "name": ENDPOINT_EMBEDDING_INDEX,
+            "label": "ENDPOINT",
+            "properties": ["EMBEDDING"],
+            "query": f"CREATE VECTOR INDEX {ENDPOINT_EMBEDDING_INDEX} IF NOT EXISTS FOR (e:ENDPOINT) ON (e.EMBEDDING) OPTIONS {{indexConfig: {{`vector.similarity_function`: 'cosine'}}}}"
         }
     ]
     
@@ -191,6 +322,168 @@ def initialize_schema(driver, database, local_ip, reporter):
         else:
             reporter.info("CONFIG", f"Schema ready for: '{database}'")
 
+    # A database captured before the rollups existed gets them now, before this capture
+    # adds its own — afterwards the rollups exist and the check no longer fires.
+    ensure_conversations(driver, database, reporter)
+
+
+# Window lengths for jaws-compute --window and jaws-finder --windows, as a bare number
+# of seconds or with an s/m/h/d suffix.
+WINDOW_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_window(text):
+    """Window length in seconds from '300', '30s', '5m', '1h' or '1d'."""
+    text = text.strip().lower()
+    unit = WINDOW_UNITS.get(text[-1:]) if text[-1:].isalpha() else 1
+    number = text[:-1] if text[-1:].isalpha() else text
+    try:
+        seconds = float(number) * unit
+    except (TypeError, ValueError):
+        raise argparse.ArgumentTypeError(f"invalid window '{text}' (e.g. 300, 30s, 5m, 1h)")
+    if not seconds >= 1:
+        raise argparse.ArgumentTypeError(f"window '{text}' must be at least 1 second")
+    return int(seconds)
+
+
+# Write generation: one (:JAWS_META {KEY: 'graph'}) node whose GENERATION every writer
+# (capture, ipinfo, compute, finder, utils) bumps once it has changed the graph, with an
+# EPOCH drawn when the node is created — so a dropped and refilled database never
+# repeats a (epoch, generation) pair. Readers that cache query results (the MCP server)
+# compare the pair to tell whether a cached result may be stale.
+GENERATION_KEY = "graph"
+
+BUMP_GENERATION_QUERY = """
+MERGE (m:JAWS_META {KEY: $key})
+ON CREATE SET m.EPOCH = randomUUID(), m.GENERATION = 0
+SET m.GENERATION = m.GENERATION + 1, m.UPDATED = datetime()
+"""
+
+
+def bump_generation(tx):
+    """Advance the write generation inside the writer's own transaction."""
+    tx.run(BUMP_GENERATION_QUERY, key=GENERATION_KEY)
+
+
+def write_generation(driver, database):
+    """Advance the write generation in a transaction of its own."""
+    with driver.session(database=database) as session:
+        session.execute_write(bump_generation)
+
+
+READ_GENERATION_QUERY = "MATCH (m:JAWS_META {KEY: $key}) RETURN m.EPOCH AS epoch, m.GENERATION AS generation"
+
+
+# Host-to-host conversation rollups: one (src:IP_ADDRESS)-[:CONVERSATION]->(dst:IP_ADDRESS)
+# relationship per direction of every IP pair, carrying BYTES/PACKETS, FIRST_SEEN/LAST_SEEN
+# and the SRC_PORTS/DST_PORTS/PROTOCOLS seen. jaws-capture folds each packet batch into
+# them in the same transaction that writes the packets, so per-peer questions (the
+# finder's host-outbound view, the MCP peer breakdown) read O(degree) relationships
+# instead of aggregating every PACKET. Port sets are capped at CONVERSATION_PORT_LIMIT
+# per direction — ephemeral source ports would otherwise grow them without bound.
+CONVERSATION_PORT_LIMIT = 64
+
+CONVERSATION_UPSERT_QUERY = """
+UNWIND $conversations AS c
+MATCH (src:IP_ADDRESS {IP_ADDRESS: c.src})
+MATCH (dst:IP_ADDRESS {IP_ADDRESS: c.dst})
+MERGE (src)-[r:CONVERSATION]->(dst)
+ON CREATE SET r.BYTES = 0, r.PACKETS = 0, r.SRC_PORTS = [], r.DST_PORTS = [], r.PROTOCOLS = [],
+              r.FIRST_SEEN = datetime(c.first_seen), r.LAST_SEEN = datetime(c.last_seen)
+SET r.BYTES = r.BYTES + c.bytes,
+    r.PACKETS = r.PACKETS + c.packets,
+    r.FIRST_SEEN = CASE WHEN datetime(c.first_seen) < r.FIRST_SEEN THEN datetime(c.first_seen) ELSE r.FIRST_SEEN END,
+    r.LAST_SEEN = CASE WHEN datetime(c.last_seen) > r.LAST_SEEN THEN datetime(c.last_seen) ELSE r.LAST_SEEN END,
+    r.SRC_PORTS = (r.SRC_PORTS + [p IN c.src_ports WHERE NOT p IN r.SRC_PORTS])[..$port_limit],
+    r.DST_PORTS = (r.DST_PORTS + [p IN c.dst_ports WHERE NOT p IN r.DST_PORTS])[..$port_limit],
+    r.PROTOCOLS = r.PROTOCOLS + [p IN c.protocols WHERE NOT p IN r.PROTOCOLS]
+"""
+
+
+def rollup_conversations(packets):
+    """Fold packet dicts (jaws-capture's batch shape) into one delta per (src, dst) direction."""
+    rollups = {}
+    for p in packets:
+        key = (p["src_ip_address"], p["dst_ip_address"])
+        c = rollups.get(key)
+        if c is None:
+            c = rollups[key] = {"src": key[0], "dst": key[1], "bytes": 0, "packets": 0,
+                                "first_seen": p["timestamp"], "last_seen": p["timestamp"],
+                                "src_ports": set(), "dst_ports": set(), "protocols": set()}
+        c["bytes"] += p["size"]
+        c["packets"] += 1
+        c["first_seen"] = min(c["first_seen"], p["timestamp"])
+        c["last_seen"] = max(c["last_seen"], p["timestamp"])
+        c["src_ports"].add(p["src_port"])
+        c["dst_ports"].add(p["dst_port"])
+        if p["protocol"]:
+            c["protocols"].add(p["protocol"])
+    for c in rollups.values():
+        for field in ("src_ports", "dst_ports", "protocols"):
+            c[field] = sorted(c[field])
+    return list(rollups.values())
+
+
+def upsert_conversations(tx, conversations):
+    """Add rollup deltas (see rollup_conversations) to the CONVERSATION relationships."""
+    tx.run(CONVERSATION_UPSERT_QUERY, conversations=conversations, port_limit=CONVERSATION_PORT_LIMIT)
+
+
+# True when a database holds packets but no CONVERSATION rollups: it was captured before
+# capture maintained them, and every rollup reader (the finder's host-outbound view, the
+# MCP peer breakdown) would otherwise come back empty. Both patterns stop at the first match.
+ROLLUPS_MISSING_QUERY = """
+RETURN EXISTS { MATCH (:PACKET) } AND NOT EXISTS { MATCH ()-[:CONVERSATION]->() } AS missing
+"""
+
+
+def rollups_missing(driver, database):
+    with driver.session(database=database) as session:
+        return bool(session.run(ROLLUPS_MISSING_QUERY).single()["missing"])
+
+
+# Rebuilds every CONVERSATION from the PACKET nodes, for databases captured before the
+# rollups were maintained at ingest (or after packets were edited by hand). One
+# aggregate read, then the same upsert capture uses, in batches. Returns the number
+# of conversations and of packets they summarize.
+def backfill_conversations(driver, database, batch_size=1000):
+    aggregate_query = """
+    MATCH (p:PACKET)
+    WITH p.SRC_IP AS src, p.DST_IP AS dst,
+         sum(p.SIZE) AS bytes, count(p) AS packets,
+         toString(min(p.TIMESTAMP)) AS first_seen, toString(max(p.TIMESTAMP)) AS last_seen,
+         collect(DISTINCT p.SRC_PORT)[..$port_limit] AS src_ports,
+         collect(DISTINCT p.DST_PORT)[..$port_limit] AS dst_ports,
+         [x IN collect(DISTINCT p.PROTOCOL) WHERE x IS NOT NULL] AS protocols
+    RETURN src, dst, bytes, packets, first_seen, last_seen, src_ports, dst_ports, protocols
+    """
+    with driver.session(database=database) as session:
+        session.execute_write(lambda tx: tx.run("MATCH ()-[r:CONVERSATION]->() DELETE r"))
+        conversations = [r.data() for r in session.run(aggregate_query, port_limit=CONVERSATION_PORT_LIMIT)]
+        for start in range(0, len(conversations), batch_size):
+            session.execute_write(upsert_conversations, conversations[start:start + batch_size])
+        session.execute_write(bump_generation)
+    return len(conversations), sum(c["packets"] for c in conversations)
+
+
+def rebuild_conversations(driver, database, reporter):
+    """jaws-utils --rollup: rebuild the rollups and report the result."""
+    conversations, packets = backfill_conversations(driver, database)
+    return reporter.result(
+        {"database": database, "conversations": conversations, "packets": packets},
+        summary=f"Rebuilt {conversations} conversation rollups from {packets} packets in: '{database}'",
+    )
+
+
+def ensure_conversations(driver, database, reporter):
+    """Backfill the rollups of a database that predates them; the conversations rebuilt, or None."""
+    if not rollups_missing(driver, database):
+        return None
+    reporter.info("ROLLUP", f"'{database}' has packets but no conversation rollups (captured before they were maintained) — rebuilding them.")
+    conversations, packets = backfill_conversations(driver, database)
+    reporter.info("ROLLUP", f"Rebuilt {conversations} conversation rollups from {packets} packets.")
+    return conversations
+
 
 # Drops all entities from the database.
 def drop_database(driver, database, reporter):
@@ -208,17 +501,26 @@ def drop_database(driver, database, reporter):
         return reporter.result({"database": database, "dropped": count}, summary=f"Dropped({count}): '{database}'")
 
 
-def main():
+def main(argv=None, reporter=None):
     parser = argparse.ArgumentParser(description="Utility functions for JAWS | 1.) Download models 2.) Drop database")
     parser.add_argument("--drop", default=DATABASE, help=f"Specify a database to drop (default: '{DATABASE}').")
     parser.add_argument("--model", choices=list(PACKET_MODELS), help="Specify a model id to download (see config.PACKET_MODELS).")
-    args = parser.parse_args()
-    reporter = Reporter()
+    parser.add_argument("--rollup", nargs="?", const=DATABASE, help=f"Rebuild the CONVERSATION rollups of a database from its packets instead of dropping it — needed once for databases captured before capture maintained them (default: '{DATABASE}').")
+    args = parser.parse_args(argv)
+    reporter = reporter or Reporter()
 
     if args.model:
         download_model(PACKET_MODELS[args.model], reporter)
         return
 
+    if args.rollup:
+        driver = dbms_connection(args.rollup, reporter)
+        if driver is None:
+            return
+        rebuild_conversations(driver, args.rollup, reporter)
+        driver.close()
+        return
+
     driver = dbms_connection(args.drop, reporter)
     if driver is None:
         return
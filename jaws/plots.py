@@ -0,0 +1,173 @@
+import os
+
+
+# Rendering for jaws-finder. matplotlib and plotille are imported lazily, inside the
+# functions that draw, so agent/MCP runs that never render pay none of their import or
+# drawing cost. Headless renders (agent mode with --plots) use the non-interactive Agg
+# backend: PNGs are saved, no windows are opened and no terminal charts are printed.
+# Headless figures are closed once saved: a long-lived host (the MCP server runs the
+# finder in-process) would otherwise keep every run's figures, and the next run would
+# draw over the last one's under the same figure name. Interactive figures stay open
+# for show() and are cleared when a name is reused.
+
+# How many outliers the PCA/DBSCAN scatter labels, most anomalous first. Annotations are
+# per-artist matplotlib work, so labeling every endpoint dominated render time on large
+# captures; the rest are still drawn, just unlabeled.
+LABEL_TOP_OUTLIERS = 10
+
+
+def pyplot(interactive):
+    """matplotlib.pyplot, switched to the Agg backend first when rendering headless."""
+    import matplotlib
+    if not interactive:
+        matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def _whole_number_formatter(val, chars, delta, left=False):
+    # plotille label formatter: render axis tick labels as whole numbers instead of
+    # full float precision (e.g. 4 rather than 3.73886505).
+    s = f"{val:.0f}"
+    return f"{s:<{chars}}" if left else f"{s:>{chars}}"
+
+
+def new_plotille_figure():
+    import plotille
+    fig = plotille.Figure()
+    fig.register_label_formatter(float, _whole_number_formatter)
+    return fig
+
+
+def plot_size_over_ports(histogram, jaws_finder_endpoint, interactive=True):
+    """Packet size over ports from a server-side histogram (see fetch_portsize_histogram).
+
+    Source and destination port counts are summed into one grid and drawn as a single
+    log-scaled heatmap; the terminal chart marks each occupied bin once per port role.
+    Both cost scales with the number of bins, not the number of packets.
+    """
+    import numpy as np
+    from matplotlib.colors import LogNorm
+    plt = pyplot(interactive)
+    counts = histogram['src'] + histogram['dst']
+    fig = plt.figure(num='Packet Size over Ports', figsize=(6, 4), clear=True)
+    if counts.any():
+        mesh = plt.pcolormesh(histogram['size_edges'], histogram['port_edges'], np.ma.masked_equal(counts, 0).T,
+                              cmap='winter', norm=LogNorm(vmin=1, vmax=counts.max()), shading='flat')
+        colorbar = plt.colorbar(mesh)
+        colorbar.set_label('PACKETS (SRC + DST PORT)', fontsize=8, color='#666666')
+        colorbar.ax.tick_params(labelsize=8)
+
+    plt.xlabel('SIZE', fontsize=8, color='#666666')
+    plt.ylabel('PORT', fontsize=8, color='#666666')
+    plt.xticks(fontsize=8)
+    plt.yticks(fontsize=8)
+    plt.grid(True, linewidth=0.5, color='#BEBEBE', alpha=0.5)
+    plt.tight_layout()
+    save_portsize = os.path.join(jaws_finder_endpoint, 'size_over_port.png')
+    plt.savefig(save_portsize, dpi=90)
+
+    if not interactive:
+        plt.close(fig)
+        return
+    size_centers = (histogram['size_edges'][:-1] + histogram['size_edges'][1:]) / 2
+    port_centers = (histogram['port_edges'][:-1] + histogram['port_edges'][1:]) / 2
+    portsize_plotille = new_plotille_figure()
+    portsize_plotille.x_label = 'SIZE'
+    portsize_plotille.y_label = 'PORT'
+    portsize_plotille.color_mode = 'byte'
+    portsize_plotille.width = 80
+    portsize_plotille.height = 20
+    portsize_plotille.set_x_limits(min_=0)
+    portsize_plotille.set_y_limits(min_=0)
+    for role, marker in (('src', '>'), ('dst', '<')):
+        size_idx, port_idx = np.nonzero(histogram[role])
+        if len(size_idx):
+            portsize_plotille.scatter(size_centers[size_idx], port_centers[port_idx], marker=marker)
+    display_portsize = portsize_plotille.show(legend=False)
+    print(display_portsize)
+
+
+def plot_k_distances(sorted_k_distances, jaws_finder_endpoint, interactive=True):
+    plt = pyplot(interactive)
+    fig = plt.figure(num='Sorted K-Distance', figsize=(6, 2), clear=True)
+    plt.plot(sorted_k_distances, color='seagreen', marker='o', linestyle='-', linewidth=0.5, alpha=0.8)
+    plt.grid(color='#BEBEBE', linestyle='-', linewidth=0.25, alpha=0.5)
+    plt.xlabel('INDEX', fontsize=8, color='#666666')
+    plt.ylabel('K-DISTANCE', fontsize=8, color='#666666')
+    plt.xticks(fontsize=8)
+    plt.yticks(fontsize=8)
+    plt.tight_layout()
+    save_kdistance = os.path.join(jaws_finder_endpoint, 'sorted_k_distance.png')
+    plt.savefig(save_kdistance, dpi=90)
+
+    if not interactive:
+        plt.close(fig)
+        return
+    kdistance_plotille = new_plotille_figure()
+    kdistance_plotille.x_label = 'INDEX'
+    kdistance_plotille.y_label = 'K-DISTANCE'
+    kdistance_plotille.color_mode = 'byte'
+    kdistance_plotille.width = 80
+    kdistance_plotille.height = 20
+    kdistance_plotille.set_x_limits(min_=0)
+    kdistance_plotille.set_y_limits(min_=0)
+    plotille_plot_x = list(range(len(sorted_k_distances)))
+    kdistance_plotille.plot(plotille_plot_x, sorted_k_distances, marker="o", lc=40)
+    display_kdistance = kdistance_plotille.show(legend=False)
+    print(display_kdistance)
+
+
+def plot_outliers(plot_xy, clusters, labels, title, jaws_finder_endpoint, interactive=True):
+    """PCA/DBSCAN scatter: clustered points and outliers as two vectorized scatter calls.
+
+    `labels` is a list of (row_index, text) annotations — the caller passes only the
+    top outliers (see LABEL_TOP_OUTLIERS), so annotation cost no longer scales with the
+    endpoint count. Returns the plotille rendering for interactive runs, else None.
+    """
+    plt = pyplot(interactive)
+    fig = plt.figure(num=title, figsize=(8, 7), clear=True)
+    clustered_indices = clusters != -1
+    plt.scatter(plot_xy[clustered_indices, 0], plot_xy[clustered_indices, 1],
+                c=clusters[clustered_indices], cmap='winter', edgecolors='none', marker='^', s=50, alpha=0.1, zorder=2)
+
+    outlier_indices = clusters == -1
+    plt.scatter(plot_xy[outlier_indices, 0], plot_xy[outlier_indices, 1],
+                color='red', marker='o', s=50, label='Outliers', alpha=0.8, zorder=10)
+
+    bbox_style = dict(boxstyle="round,pad=0.2", facecolor='#333333', edgecolor='none', alpha=0.9)
+    for i, annotation_text in labels:
+        plt.annotate(annotation_text,
+                     (plot_xy[i, 0], plot_xy[i, 1]),
+                     fontsize=6,
+                     color='white',
+                     bbox=bbox_style,
+                     horizontalalignment='center',
+                     verticalalignment='bottom',
+                     xytext=(0, 10),
+                     textcoords='offset points',
+                     alpha=0.9,
+                     zorder=10)
+
+    plt.grid(color='#BEBEBE', linestyle='-', linewidth=0.25, alpha=0.5)
+    plt.xticks(fontsize=8)
+    plt.yticks(fontsize=8)
+    plt.tight_layout()
+    save_outliers = os.path.join(jaws_finder_endpoint, 'pca_dbscan_outliers.png')
+    plt.savefig(save_outliers, dpi=90)
+
+    if not interactive:
+        plt.close(fig)
+        return None
+    outlier_plotille = new_plotille_figure()
+    outlier_plotille.color_mode = 'byte'
+    outlier_plotille.width = 80
+    outlier_plotille.height = 20
+    outlier_plotille.scatter(plot_xy[clustered_indices, 0], plot_xy[clustered_indices, 1], marker="^")
+    outlier_plotille.scatter(plot_xy[outlier_indices, 0], plot_xy[outlier_indices, 1], marker="o")
+    return outlier_plotille.show(legend=False)
+
+
+def show():
+    """Open the interactive matplotlib windows for every figure drawn this run."""
+    pyplot(True).show()
@@ -104,6 +104,7 @@ setup(
            'jaws-compute = jaws.jaws_compute:main',
            'jaws-finder = jaws.jaws_finder:main',
            'jaws-utils = jaws.jaws_utils:main',
+           'jaws-pipeline = jaws.jaws_pipeline:main',
            'jaws-mcp = MCP.server:main',
        ],
     },